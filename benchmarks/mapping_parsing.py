@@ -0,0 +1,64 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+"""
+Measures the time to parse, normalize and partition a generated mapping with a given number of mapping rules. Each
+triples map generates five mapping rules (a class, a literal with a language tag, a typed literal, a constant and a
+referencing object map). Usage: python benchmarks/mapping_parsing.py [NUMBER_OF_MAPPING_RULES]
+"""
+
+
+import os
+import sys
+import time
+import tempfile
+
+from morph_kgc.args_parser import load_config_from_argument
+from morph_kgc.mapping.mapping_parser import retrieve_mappings
+
+
+TRIPLES_MAP = """
+ex:TM{i} a rr:TriplesMap;
+    rml:logicalSource [ rml:source "people.csv"; rml:referenceFormulation ql:CSV ];
+    rr:subjectMap [ rr:template "http://example.com/person{i}/{{id}}"; rr:class ex:Person{i} ];
+    rr:predicateObjectMap [ rr:predicate ex:name; rr:objectMap [ rml:reference "name"; rr:language "en" ] ];
+    rr:predicateObjectMap [ rr:predicate ex:age; rr:objectMap [ rml:reference "age"; rr:datatype xsd:integer ] ];
+    rr:predicateObjectMap [ rr:predicate ex:source; rr:object "people" ];
+    rr:predicateObjectMap [ rr:predicate ex:knows; rr:objectMap [ rr:parentTriplesMap ex:TM{parent};
+        rr:joinCondition [ rr:child "friend"; rr:parent "id" ] ] ].
+"""
+
+PREFIXES = """
+@prefix rr: <http://www.w3.org/ns/r2rml#> .
+@prefix rml: <http://semweb.mmlab.be/ns/rml#> .
+@prefix ql: <http://semweb.mmlab.be/ns/ql#> .
+@prefix xsd: <http://www.w3.org/2001/XMLSchema#> .
+@prefix ex: <http://example.com/> .
+"""
+
+
+def write_mapping(mapping_path, num_triples_maps):
+    with open(mapping_path, 'w') as mapping_file:
+        mapping_file.write(PREFIXES)
+        for i in range(num_triples_maps):
+            mapping_file.write(TRIPLES_MAP.format(i=i, parent=(i + 1) % num_triples_maps))
+
+
+if __name__ == '__main__':
+    num_rules = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path = os.path.join(temporary_dir, 'mapping.ttl')
+        write_mapping(mapping_path, max(1, num_rules // 5))
+
+        config = load_config_from_argument(f'[CONFIGURATION]\nlogging_level=WARNING\n'
+                                           f'[DataSource]\nmappings={mapping_path}')
+
+        start_time = time.time()
+        rml_df, fnml_df = retrieve_mappings(config)
+        print(f'{len(rml_df)} mapping rules parsed in {time.time() - start_time:.2f} seconds.')
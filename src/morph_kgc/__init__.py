@@ -9,19 +9,17 @@ __email__ = "arenas.guerrero.julian@outlook.com"
 
 import sys
 import logging
-import multiprocessing as mp
 
 from rdflib import Graph
 from pyoxigraph import Store
 from io import BytesIO
-from itertools import repeat
 
 from .args_parser import load_config_from_command_line
 from .mapping.mapping_parser import retrieve_mappings
 from .data_source.relational_db import setup_oracle
 from .materializer import _materialize_mapping_group_to_set
+from .scheduler import materialize_mapping_groups
 from .args_parser import load_config_from_argument
-from .constants import RML_TRIPLES_MAP_CLASS
 
 
 def materialize_set(config, python_source=None):
@@ -38,23 +36,8 @@ def materialize_set(config, python_source=None):
 
     rml_df, fnml_df = retrieve_mappings(config)
 
-    # keep only asserted mapping rules
-    asserted_mapping_df = rml_df.loc[rml_df['triples_map_type'] == RML_TRIPLES_MAP_CLASS]
-    mapping_groups = [group for _, group in asserted_mapping_df.groupby(by='mapping_partition')]
-
-    if config.is_multiprocessing_enabled():
-        logging.debug(f'Parallelizing with {config.get_number_of_processes()} cores.')
-
-        pool = mp.Pool(config.get_number_of_processes())
-        triples = set().union(*pool.starmap(_materialize_mapping_group_to_set,
-                                            zip(mapping_groups, repeat(rml_df), repeat(fnml_df), repeat(config),
-                                                repeat(python_source))))
-        pool.close()
-        pool.join()
-    else:
-        triples = set()
-        for mapping_group in mapping_groups:
-            triples.update(_materialize_mapping_group_to_set(mapping_group, rml_df, fnml_df, config, python_source))
+    triples = set().union(*materialize_mapping_groups(_materialize_mapping_group_to_set, rml_df, fnml_df, config,
+                                                      python_source))
 
     logging.info(f'Number of triples generated in total: {len(triples)}.')
 
@@ -0,0 +1,207 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from falcon.uri import encode_value
+from urllib.parse import quote
+
+from .constants import *
+from .utils import get_rml_rule, get_references_in_join_condition
+from .materializer import _add_references_in_join_condition, _compile_template, _get_iri_encoding_pattern, \
+    _get_references_in_rml_rule, _replace_object_map_with_parent_subject_map, LITERAL_ESCAPES, \
+    LITERAL_ESCAPE_PATTERN, SOURCE_PARTITION_CHUNK_SIZE
+from .data_source.data_file import get_file_arrow_tables
+
+
+def _cast_to_string(values):
+    """
+    Casts an Arrow array to strings. Floats and booleans are written as with Python str() (e.g., `1.0` and `True`),
+    so that the generated triples are the same as with the PANDAS execution engine.
+    """
+
+    if pa.types.is_string(values.type):
+        return values
+    elif pa.types.is_large_string(values.type) or pa.types.is_integer(values.type):
+        return pc.cast(values, pa.string())
+    elif pa.types.is_floating(values.type):
+        values = pc.cast(values, pa.string())
+        return pc.if_else(pc.match_substring_regex(values, '^-?[0-9]+$'),
+                          pc.binary_join_element_wise(values, '.0', ''), values)
+    elif pa.types.is_boolean(values.type):
+        return pc.if_else(values, 'True', 'False')
+    else:
+        return pa.array([None if value is None else str(value) for value in values.to_pylist()], type=pa.string())
+
+
+def _preprocess_table(table, references, config):
+    """
+    Casts the references to strings and removes the rows with NULL values in any reference and the duplicated rows.
+    """
+
+    references = sorted(references)
+    table = pa.table({reference: _cast_to_string(table.column(reference)) for reference in references})
+
+    na_values = pa.array(config.get_na_values(), type=pa.string())
+    not_null = None
+    for reference in references:
+        reference_not_null = pc.invert(pc.or_(pc.is_null(table.column(reference)),
+                                              pc.is_in(table.column(reference), value_set=na_values)))
+        not_null = reference_not_null if not_null is None else pc.and_(not_null, reference_not_null)
+    if not_null is not None:
+        table = table.filter(not_null)
+
+    # remove duplicates
+    return table.group_by(references).aggregate([])
+
+
+def _encode_iri_array(values, safe_percent_encoding=''):
+    # only the values with characters that must be encoded are encoded, in Python
+    needs_encoding = pc.match_substring_regex(values, _get_iri_encoding_pattern(safe_percent_encoding).pattern)
+    if not pc.any(needs_encoding).as_py():
+        return values
+
+    if safe_percent_encoding:
+        encoded_values = [quote(value, safe=safe_percent_encoding) for value in
+                          values.filter(needs_encoding).to_pylist()]
+    else:
+        encoded_values = [encode_value(value) for value in values.filter(needs_encoding).to_pylist()]
+
+    return pc.replace_with_mask(values, needs_encoding, pa.array(encoded_values, type=pa.string()))
+
+
+def _escape_literal_array(values):
+    if not pc.any(pc.match_substring_regex(values, LITERAL_ESCAPE_PATTERN.pattern)).as_py():
+        return values
+
+    for character, escaped_character in LITERAL_ESCAPES:
+        values = pc.replace_substring(values, character, escaped_character)
+
+    return values
+
+
+def _materialize_template_array(table, template, expression_type, config, columns_alias='', termtype='',
+                                datatype=''):
+    template_segments, references = _compile_template(template, expression_type, termtype)
+
+    if not references:
+        return pa.repeat(template_segments[0], table.num_rows)
+
+    template_arrays = []
+    for template_segment, reference in zip(template_segments, references):
+        values = table.column(columns_alias + reference).combine_chunks()
+
+        if termtype.strip() == RML_IRI and expression_type == RML_TEMPLATE:
+            values = _encode_iri_array(values, config.get_safe_percent_encoding())
+        elif termtype.strip() == RML_LITERAL:
+            # Natural Mapping of SQL Values (https://www.w3.org/TR/r2rml/#natural-mapping)
+            if datatype == XSD_BOOLEAN:
+                values = pc.utf8_lower(values)
+            elif datatype == XSD_DATETIME:
+                values = pc.replace_substring(values, ' ', 'T')
+            # Make integers not end with .0
+            elif datatype == XSD_INTEGER:
+                values = pc.cast(pc.cast(pc.cast(values, pa.float64()), pa.int64(), safe=False), pa.string())
+
+            values = _escape_literal_array(values)
+
+        template_arrays.extend([template_segment, values])
+    template_arrays.append(template_segments[-1])
+
+    return pc.binary_join_element_wise(*template_arrays, '')
+
+
+def _materialize_triples_array(table, rml_rule, config, columns_alias=''):
+    """
+    Builds the triples (or quads) of a mapping rule from an Arrow Table with the values of the references.
+    """
+
+    subject = _materialize_template_array(table, rml_rule['subject_map_value'], rml_rule['subject_map_type'], config,
+                                          termtype=rml_rule['subject_termtype'])
+    predicate = _materialize_template_array(table, rml_rule['predicate_map_value'], rml_rule['predicate_map_type'],
+                                            config, termtype=RML_IRI)
+    object = _materialize_template_array(table, rml_rule['object_map_value'], rml_rule['object_map_type'], config,
+                                         columns_alias=columns_alias, termtype=rml_rule['object_termtype'],
+                                         datatype=rml_rule['lang_datatype_map_value'])
+
+    if rml_rule['lang_datatype'] == RML_LANGUAGE_MAP:
+        language = _materialize_template_array(table, rml_rule['lang_datatype_map_value'],
+                                               rml_rule['lang_datatype_map_type'], config)
+        object = pc.binary_join_element_wise(object, language, '@')
+    elif rml_rule['lang_datatype'] == RML_DATATYPE_MAP:
+        datatype = _materialize_template_array(table, rml_rule['lang_datatype_map_value'],
+                                               rml_rule['lang_datatype_map_type'], config, termtype=RML_IRI)
+        object = pc.binary_join_element_wise(object, datatype, '^^')
+
+    triples = pc.binary_join_element_wise(subject, predicate, object, ' ')
+
+    if config.get_output_format() == NQUADS:
+        if rml_rule['graph_map_type'] in [RML_TEMPLATE, RML_CONSTANT, RML_REFERENCE] and rml_rule['graph_map_value'] != RML_DEFAULT_GRAPH:
+            graph = _materialize_template_array(table, rml_rule['graph_map_value'], rml_rule['graph_map_type'], config,
+                                                termtype=RML_IRI)
+        else:
+            graph = ''
+        triples = pc.binary_join_element_wise(triples, graph, ' ')
+
+    return triples
+
+
+def _get_arrow_tables(config, rml_rule, references, source_partition=None):
+    chunk_size = config.get_chunk_size()
+
+    if source_partition is None:
+        yield from get_file_arrow_tables(rml_rule, references, chunk_size)
+    else:
+        partition_chunk_size = chunk_size if chunk_size > 0 else SOURCE_PARTITION_CHUNK_SIZE
+        yield from get_file_arrow_tables(rml_rule, references, partition_chunk_size, source_partition)
+
+
+def _materialize_rml_rule_in_chunks_with_arrow(rml_rule, rml_df, fnml_df, config, source_partition=None):
+    """
+    Materializes a mapping rule with the ARROW execution engine, yielding DataFrames with the generated triples in the
+    `triple` column. The data is read, preprocessed and joined in Arrow Tables and the terms are built with Arrow
+    compute functions, only the triples are converted to Python strings.
+    """
+
+    rml_rule = rml_rule.copy()
+    chunk_size = config.get_chunk_size()
+
+    references = set(_get_references_in_rml_rule(rml_rule, rml_df, fnml_df))
+
+    parent_table = None
+    columns_alias = ''
+    if rml_rule['object_map_type'] == RML_PARENT_TRIPLES_MAP:
+        parent_triples_map_rule = get_rml_rule(rml_df, rml_rule['object_map_value'])
+        parent_references = set(
+            _get_references_in_rml_rule(parent_triples_map_rule, rml_df, fnml_df, only_subject_map=True))
+        references, parent_references = _add_references_in_join_condition(rml_rule, references, parent_references)
+
+        parent_table = pa.concat_tables([_preprocess_table(table, parent_references, config) for table in
+                                         get_file_arrow_tables(parent_triples_map_rule, parent_references, 0)])
+        parent_table = parent_table.rename_columns(['parent_' + column for column in parent_table.column_names])
+
+        _replace_object_map_with_parent_subject_map(rml_rule, parent_triples_map_rule)
+        columns_alias = 'parent_'
+
+    for table in _get_arrow_tables(config, rml_rule, references, source_partition):
+        table = _preprocess_table(table, references, config)
+
+        if parent_table is not None:
+            child_join_references, parent_join_references = get_references_in_join_condition(rml_rule,
+                                                                                             'object_join_conditions')
+            table = table.join(parent_table, keys=child_join_references,
+                               right_keys=['parent_' + reference for reference in parent_join_references],
+                               join_type='inner', coalesce_keys=False)
+
+        # the join can generate more rows than the chunk had
+        chunk_rows = chunk_size if chunk_size > 0 else max(table.num_rows, 1)
+        for offset in range(0, table.num_rows, chunk_rows):
+            triples = _materialize_triples_array(table.slice(offset, chunk_rows), rml_rule, config, columns_alias)
+            yield pd.DataFrame({'triple': triples.to_numpy(zero_copy_only=False)})
@@ -35,9 +35,24 @@ SAFE_PERCENT_ENCODING = 'safe_percent_encoding'
 
 MAPPING_PARTITIONING = 'mapping_partitioning'
 INFER_SQL_DATATYPES = 'infer_sql_datatypes'
+COUNT_SQL_ROWS = 'count_sql_rows'
+SQL_PUSHDOWN = 'sql_pushdown'
+SQL_POOL_SIZE = 'sql_pool_size'
+SQL_SCHEMA_CACHE_TTL = 'sql_schema_cache_ttl'
+SQL_FETCH_SIZE = 'sql_fetch_size'
+SQL_KEY_RANGES = 'sql_key_ranges'
 ENFORCE_SQL_QUERY_FILTER_NULL = 'enforce_sql_filter_null'
 
+EXECUTION_ENGINE = 'execution_engine'
+
 NUMBER_OF_PROCESSES = 'number_of_processes'
+SOURCE_PARTITIONS = 'source_partitions'
+CHUNK_SIZE = 'chunk_size'
+DEDUPLICATION = 'deduplication'
+DEDUPLICATION_MEMORY_LIMIT = 'deduplication_memory_limit'
+TEMPORARY_DIR = 'temporary_dir'
+SOURCE_CACHE_MEMORY_LIMIT = 'source_cache_memory_limit'
+JOIN_MEMORY_LIMIT = 'join_memory_limit'
 
 UDFS = 'udfs'
 
@@ -77,7 +92,21 @@ DEFAULT_SAFE_PERCENT_ENCODING = ''
 DEFAULT_LOGGING_FILE = ''
 DEFAULT_LOGGING_LEVEL = 'INFO'
 DEFAULT_INFER_SQL_DATATYPES = 'no'
+DEFAULT_COUNT_SQL_ROWS = 'no'
+DEFAULT_SQL_PUSHDOWN = 'no'
+DEFAULT_SQL_POOL_SIZE = 5  # maximum number of connections to each relational database in each process
+DEFAULT_SQL_SCHEMA_CACHE_TTL = 0  # in seconds, 0 means that the schema catalogs are not cached in files
+DEFAULT_SQL_FETCH_SIZE = 10000  # rows fetched at once from the server-side cursors of relational databases
+DEFAULT_SQL_KEY_RANGES = 1  # key ranges of the tables extracted in parallel, 1 extracts the tables with a single query
+DEFAULT_EXECUTION_ENGINE = PANDAS_EXECUTION_ENGINE
 DEFAULT_NUMBER_OF_PROCESSES = 2 * mp.cpu_count()
+DEFAULT_SOURCE_PARTITIONS = 1  # 1 disables splitting the logical sources of mapping groups
+DEFAULT_CHUNK_SIZE = 0  # 0 disables chunking, mapping rules are materialized at once
+DEFAULT_DEDUPLICATION = EXACT_DEDUPLICATION
+DEFAULT_DEDUPLICATION_MEMORY_LIMIT = 0  # in MB, 0 means that triples are deduplicated in memory without limit
+DEFAULT_SOURCE_CACHE_MEMORY_LIMIT = 0  # in MB, 0 means that the source cache is disabled
+DEFAULT_JOIN_MEMORY_LIMIT = 0  # in MB, 0 means that the data of parent triples maps is joined in memory without limit
+DEFAULT_TEMPORARY_DIR = ''  # the default temporary directory of the system is used
 DEFAULT_NA_VALUES = ',nan' # ',#N/A,N/A,#N/A N/A,n/a,NA,<NA>,#NA,NULL,null,NaN,nan,None'
 DEFAULT_ONLY_PRINTABLE_CHARS = 'no'
 DEFAULT_UDFS = ''
@@ -111,6 +140,7 @@ CONFIGURATION_OPTIONS_EMPTY_VALID = {
             UDFS: DEFAULT_UDFS,
             OUTPUT_KAFKA_SERVER: DEFAULT_OUTPUT_KAFKA_SERVER,
             OUTPUT_KAFKA_TOPIC: DEFAULT_OUTPUT_KAFKA_TOPIC,
+            TEMPORARY_DIR: DEFAULT_TEMPORARY_DIR,
         }
 
 # input parameters that are to be replaced with the default value if they are empty
@@ -119,8 +149,21 @@ CONFIGURATION_OPTIONS_EMPTY_NON_VALID = {
             OUTPUT_FORMAT: DEFAULT_OUTPUT_FORMAT,
             ONLY_PRINTABLE_CHARS: DEFAULT_ONLY_PRINTABLE_CHARS,
             INFER_SQL_DATATYPES: DEFAULT_INFER_SQL_DATATYPES,
+            COUNT_SQL_ROWS: DEFAULT_COUNT_SQL_ROWS,
+            SQL_PUSHDOWN: DEFAULT_SQL_PUSHDOWN,
+            SQL_POOL_SIZE: DEFAULT_SQL_POOL_SIZE,
+            SQL_SCHEMA_CACHE_TTL: DEFAULT_SQL_SCHEMA_CACHE_TTL,
+            SQL_FETCH_SIZE: DEFAULT_SQL_FETCH_SIZE,
+            SQL_KEY_RANGES: DEFAULT_SQL_KEY_RANGES,
             LOGGING_LEVEL: DEFAULT_LOGGING_LEVEL,
-            NUMBER_OF_PROCESSES: DEFAULT_NUMBER_OF_PROCESSES
+            EXECUTION_ENGINE: DEFAULT_EXECUTION_ENGINE,
+            NUMBER_OF_PROCESSES: DEFAULT_NUMBER_OF_PROCESSES,
+            SOURCE_PARTITIONS: DEFAULT_SOURCE_PARTITIONS,
+            CHUNK_SIZE: DEFAULT_CHUNK_SIZE,
+            DEDUPLICATION: DEFAULT_DEDUPLICATION,
+            DEDUPLICATION_MEMORY_LIMIT: DEFAULT_DEDUPLICATION_MEMORY_LIMIT,
+            SOURCE_CACHE_MEMORY_LIMIT: DEFAULT_SOURCE_CACHE_MEMORY_LIMIT,
+            JOIN_MEMORY_LIMIT: DEFAULT_JOIN_MEMORY_LIMIT
         }
 
 
@@ -194,6 +237,73 @@ class Config(ConfigParser):
                 f'{MAPPING_PARTITIONING} value `{self.get_mapping_partitioning()}` is not valid. '
                 f'It must be in: {[MAXIMAL_PARTITIONING] + [PARTIAL_AGGREGATIONS_PARTITIONING] + NO_PARTITIONING}.')
 
+        # EXECUTION ENGINE
+        execution_engine = str(self.get_execution_engine()).upper()
+        self.set_execution_engine(execution_engine)
+        if execution_engine not in VALID_EXECUTION_ENGINES:
+            raise ValueError(f'{EXECUTION_ENGINE} value `{self.get_execution_engine()}` is not valid. '
+                             f'It must be in: {VALID_EXECUTION_ENGINES}.')
+
+        # SOURCE PARTITIONS
+        if not str(self.get_configuration_option(SOURCE_PARTITIONS)).isdigit() or \
+                int(self.get_configuration_option(SOURCE_PARTITIONS)) < 1:
+            raise ValueError(f'{SOURCE_PARTITIONS} value `{self.get_configuration_option(SOURCE_PARTITIONS)}` is not '
+                             'valid. It must be a positive integer.')
+
+        # CHUNK SIZE
+        if not str(self.get_configuration_option(CHUNK_SIZE)).isdigit():
+            raise ValueError(f'{CHUNK_SIZE} value `{self.get_configuration_option(CHUNK_SIZE)}` is not valid. '
+                             'It must be a non-negative integer.')
+
+        # DEDUPLICATION
+        deduplication = str(self.get_deduplication()).upper()
+        self.set_deduplication(deduplication)
+        if deduplication not in VALID_DEDUPLICATION_MODES:
+            raise ValueError(f'{DEDUPLICATION} value `{self.get_deduplication()}` is not valid. '
+                             f'It must be in: {VALID_DEDUPLICATION_MODES}.')
+
+        # DEDUPLICATION MEMORY LIMIT
+        if not str(self.get_configuration_option(DEDUPLICATION_MEMORY_LIMIT)).isdigit():
+            raise ValueError(f'{DEDUPLICATION_MEMORY_LIMIT} value '
+                             f'`{self.get_configuration_option(DEDUPLICATION_MEMORY_LIMIT)}` is not valid. '
+                             'It must be a non-negative integer.')
+
+        # SQL POOL SIZE
+        if not str(self.get_configuration_option(SQL_POOL_SIZE)).isdigit() or \
+                int(self.get_configuration_option(SQL_POOL_SIZE)) < 1:
+            raise ValueError(f'{SQL_POOL_SIZE} value `{self.get_configuration_option(SQL_POOL_SIZE)}` is not '
+                             'valid. It must be a positive integer.')
+
+        # SQL FETCH SIZE
+        if not str(self.get_configuration_option(SQL_FETCH_SIZE)).isdigit() or \
+                int(self.get_configuration_option(SQL_FETCH_SIZE)) < 1:
+            raise ValueError(f'{SQL_FETCH_SIZE} value `{self.get_configuration_option(SQL_FETCH_SIZE)}` is not '
+                             'valid. It must be a positive integer.')
+
+        # SQL KEY RANGES
+        if not str(self.get_configuration_option(SQL_KEY_RANGES)).isdigit() or \
+                int(self.get_configuration_option(SQL_KEY_RANGES)) < 1:
+            raise ValueError(f'{SQL_KEY_RANGES} value `{self.get_configuration_option(SQL_KEY_RANGES)}` is not '
+                             'valid. It must be a positive integer.')
+
+        # SQL SCHEMA CACHE TTL
+        if not str(self.get_configuration_option(SQL_SCHEMA_CACHE_TTL)).isdigit():
+            raise ValueError(f'{SQL_SCHEMA_CACHE_TTL} value '
+                             f'`{self.get_configuration_option(SQL_SCHEMA_CACHE_TTL)}` is not valid. '
+                             'It must be a non-negative integer.')
+
+        # SOURCE CACHE MEMORY LIMIT
+        if not str(self.get_configuration_option(SOURCE_CACHE_MEMORY_LIMIT)).isdigit():
+            raise ValueError(f'{SOURCE_CACHE_MEMORY_LIMIT} value '
+                             f'`{self.get_configuration_option(SOURCE_CACHE_MEMORY_LIMIT)}` is not valid. '
+                             'It must be a non-negative integer.')
+
+        # JOIN MEMORY LIMIT
+        if not str(self.get_configuration_option(JOIN_MEMORY_LIMIT)).isdigit():
+            raise ValueError(f'{JOIN_MEMORY_LIMIT} value '
+                             f'`{self.get_configuration_option(JOIN_MEMORY_LIMIT)}` is not valid. '
+                             'It must be a non-negative integer.')
+
     def log_config_info(self):
         logging.debug(f'CONFIGURATION: {dict(self.items(self.configuration_section))}')
 
@@ -213,6 +323,9 @@ class Config(ConfigParser):
     def is_multiprocessing_enabled(self):
         return self.getint(self.configuration_section, NUMBER_OF_PROCESSES) > 1
 
+    def is_chunking_enabled(self):
+        return self.get_chunk_size() > 0
+
     def is_read_parsed_mappings_file_provided(self):
         return bool(self.get(self.configuration_section, READ_PARSED_MAPPINGS_PATH))
 
@@ -228,6 +341,12 @@ class Config(ConfigParser):
     def infer_sql_datatypes(self):
         return self.getboolean(self.configuration_section, INFER_SQL_DATATYPES)
 
+    def count_sql_rows(self):
+        return self.getboolean(self.configuration_section, COUNT_SQL_ROWS)
+
+    def push_down_sql(self):
+        return self.getboolean(self.configuration_section, SQL_PUSHDOWN)
+
     def enforce_sql_filter_null(self):
         return self.getboolean(self.configuration_section, ENFORCE_SQL_QUERY_FILTER_NULL)
 
@@ -237,9 +356,45 @@ class Config(ConfigParser):
     def get_configuration_option(self, option):
         return self.get(self.configuration_section, option)
 
+    def get_execution_engine(self):
+        return self.get(self.configuration_section, EXECUTION_ENGINE)
+
     def get_number_of_processes(self):
         return self.getint(self.configuration_section, NUMBER_OF_PROCESSES)
 
+    def get_source_partitions(self):
+        return self.getint(self.configuration_section, SOURCE_PARTITIONS)
+
+    def get_sql_pool_size(self):
+        return self.getint(self.configuration_section, SQL_POOL_SIZE)
+
+    def get_sql_fetch_size(self):
+        return self.getint(self.configuration_section, SQL_FETCH_SIZE)
+
+    def get_sql_key_ranges(self):
+        return self.getint(self.configuration_section, SQL_KEY_RANGES)
+
+    def get_sql_schema_cache_ttl(self):
+        return self.getint(self.configuration_section, SQL_SCHEMA_CACHE_TTL)
+
+    def get_chunk_size(self):
+        return self.getint(self.configuration_section, CHUNK_SIZE)
+
+    def get_deduplication(self):
+        return self.get(self.configuration_section, DEDUPLICATION)
+
+    def get_deduplication_memory_limit(self):
+        return self.getint(self.configuration_section, DEDUPLICATION_MEMORY_LIMIT)
+
+    def get_source_cache_memory_limit(self):
+        return self.getint(self.configuration_section, SOURCE_CACHE_MEMORY_LIMIT)
+
+    def get_join_memory_limit(self):
+        return self.getint(self.configuration_section, JOIN_MEMORY_LIMIT)
+
+    def get_temporary_dir(self):
+        return self.get(self.configuration_section, TEMPORARY_DIR)
+
     def get_logging_level(self):
         return self.get(self.configuration_section, LOGGING_LEVEL)
 
@@ -314,6 +469,12 @@ class Config(ConfigParser):
     def set_number_of_processes(self, number_of_processes):
         self.set(self.configuration_section, NUMBER_OF_PROCESSES, number_of_processes)
 
+    def set_execution_engine(self, execution_engine):
+        self.set(self.configuration_section, EXECUTION_ENGINE, execution_engine)
+
+    def set_deduplication(self, deduplication):
+        self.set(self.configuration_section, DEDUPLICATION, deduplication)
+
     ################################################################################
     #######################   DATA SOURCE SECTIONS METHODS   #######################
     ################################################################################
@@ -15,6 +15,24 @@ MAXIMAL_PARTITIONING = 'MAXIMAL'
 NO_PARTITIONING = ['NO', 'FALSE', 'OFF', '0']
 
 
+##############################################################################
+######################   TRIPLES DEDUPLICATION OPTIONS   #####################
+##############################################################################
+
+EXACT_DEDUPLICATION = 'EXACT'
+HASH_64_DEDUPLICATION = 'HASH-64'
+HASH_128_DEDUPLICATION = 'HASH-128'
+
+
+##############################################################################
+########################   EXECUTION ENGINE OPTIONS   ########################
+##############################################################################
+
+PANDAS_EXECUTION_ENGINE = 'PANDAS'
+ARROW_EXECUTION_ENGINE = 'ARROW'
+DUCKDB_EXECUTION_ENGINE = 'DUCKDB'
+
+
 ##############################################################################
 #########################   DATA SOURCE TYPES   ##############################
 ##############################################################################
@@ -67,6 +85,8 @@ NQUADS = 'N-QUADS'
 
 VALID_OUTPUT_FORMATS = [NTRIPLES, NQUADS]
 VALID_LOGGING_LEVEL = ['NOTSET', 'DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL']
+VALID_DEDUPLICATION_MODES = [EXACT_DEDUPLICATION, HASH_64_DEDUPLICATION, HASH_128_DEDUPLICATION]
+VALID_EXECUTION_ENGINES = [PANDAS_EXECUTION_ENGINE, ARROW_EXECUTION_ENGINE, DUCKDB_EXECUTION_ENGINE]
 
 
 ##############################################################################
@@ -308,4 +328,7 @@ RDF_TYPE = f'{RDF_NAMESPACE}type'
 
 RDFS_NAMESPACE = 'http://www.w3.org/2000/01/rdf-schema#'
 
+SD_NAMESPACE = 'https://w3id.org/okn/o/sd#'
+SD_NAME = f'{SD_NAMESPACE}name'
+
 AUXILIAR_UNIQUE_REPLACING_STRING = 'zzyy_xxww\u200B'
@@ -6,7 +6,10 @@ __maintainer__ = "Julián Arenas-Guerrero"
 __email__ = "arenas.guerrero.julian@outlook.com"
 
 
+import io
+import os
 import json
+import mmap
 import duckdb
 import pandas as pd
 import elementpath
@@ -24,6 +27,18 @@ from ..utils import normalize_hierarchical_data
 from jsonpath_ng.ext import parse as jsonpath_parse
 from itertools import product
 
+
+# size in bytes of the blocks in which CSV files are scanned to split them in partitions
+CSV_SCAN_BLOCK_SIZE = 16 * 1024 * 1024
+# DuckDB fetches results in vectors of 2048 rows
+DUCKDB_VECTOR_SIZE = 2048
+# extensions of the compressed files that pandas decompresses, they cannot be split in ranges of bytes
+COMPRESSED_FILE_EXTENSIONS = ('.gz', '.bz2', '.zip', '.xz', '.zst', '.tar')
+
+# offsets of the partitions of CSV files by file path and number of partitions
+_csv_partition_offsets = {}
+
+
 def get_file_data(rml_rule, references):
     references = list(references)
     file_source_type = rml_rule['source_type']
@@ -56,10 +71,194 @@ def get_file_data(rml_rule, references):
         raise ValueError(f'Found an invalid source type. Found value `{file_source_type}`.')
 
 
+def get_file_data_in_chunks(rml_rule, references, chunk_size):
+    """
+    Yields the data of a file in chunks of at most chunk_size rows. CSV, TSV and local Parquet files and tabular views
+    are read chunk by chunk, other file formats are read at once and yielded in a single DataFrame.
+    """
+
+    references = list(references)
+    file_source_type = rml_rule['source_type']
+
+    if rml_rule['logical_source_type'] == RML_QUERY:
+        yield from _read_tabular_view_in_chunks(rml_rule, chunk_size)
+    elif file_source_type in [CSV, TSV]:
+        yield from _read_csv_in_chunks(rml_rule, references, file_source_type, chunk_size)
+    elif file_source_type == PARQUET and os.path.isfile(rml_rule['logical_source_value']):
+        yield from _read_parquet_in_chunks(rml_rule, references, chunk_size)
+    else:
+        yield get_file_data(rml_rule, references)
+
+
+def get_file_data_partition_in_chunks(rml_rule, references, chunk_size, source_partition):
+    """
+    Yields a partition of the data of a file in chunks of at most chunk_size rows. source_partition is a tuple with the
+    index of the partition and the number of partitions. Local CSV and TSV files are split in ranges of bytes, and
+    remote or compressed ones and tabular views are read by the first partition. Local Parquet files are partitioned by
+    row groups, and other file formats are read at once and partitioned by rows.
+    """
+
+    partition_index, num_partitions = source_partition
+    file_source_type = rml_rule['source_type']
+
+    if rml_rule['logical_source_type'] == RML_QUERY:
+        if partition_index == 0:
+            yield from get_file_data_in_chunks(rml_rule, references, chunk_size)
+    elif file_source_type in [CSV, TSV] and _is_csv_file_splittable(rml_rule['logical_source_value']):
+        header_end, partition_offsets = get_csv_partition_offsets(rml_rule['logical_source_value'], num_partitions)
+        csv_offsets = (header_end, partition_offsets[partition_index], partition_offsets[partition_index + 1])
+        yield from _read_csv_in_chunks(rml_rule, list(references), file_source_type, chunk_size, csv_offsets)
+    elif file_source_type in [CSV, TSV]:
+        if partition_index == 0:
+            yield from get_file_data_in_chunks(rml_rule, references, chunk_size)
+    elif file_source_type == PARQUET and os.path.isfile(rml_rule['logical_source_value']):
+        yield from _read_parquet_in_chunks(rml_rule, list(references), chunk_size, source_partition)
+    else:
+        yield get_file_data(rml_rule, references).iloc[partition_index::num_partitions]
+
+
+def get_file_arrow_tables(rml_rule, references, chunk_size, source_partition=None):
+    """
+    Yields the data of a CSV, TSV, Parquet, Feather or ORC file or a tabular view as pyarrow Tables. If chunk_size is
+    not 0, CSV, TSV and Parquet files and tabular views are read in several Tables of about chunk_size rows. If
+    source_partition is provided, the data is partitioned as in get_file_data_partition_in_chunks, and the sources that
+    are not split are read by the first partition.
+    """
+
+    import pyarrow as pa
+
+    references = list(references)
+    file_source_type = rml_rule['source_type']
+
+    csv_offsets = None
+    if source_partition is not None:
+        partition_index, num_partitions = source_partition
+        if file_source_type in [CSV, TSV] and rml_rule['logical_source_type'] != RML_QUERY and \
+                _is_csv_file_splittable(rml_rule['logical_source_value']):
+            header_end, partition_offsets = get_csv_partition_offsets(rml_rule['logical_source_value'], num_partitions)
+            csv_offsets = (header_end, partition_offsets[partition_index], partition_offsets[partition_index + 1])
+        elif file_source_type != PARQUET or rml_rule['logical_source_type'] == RML_QUERY:
+            if partition_index > 0:
+                return
+            source_partition = None
+
+    if rml_rule['logical_source_type'] == RML_QUERY:
+        record_batch_reader = duckdb.connect().execute(rml_rule['logical_source_value']).fetch_record_batch(
+            chunk_size if chunk_size > 0 else 1000000)
+        if chunk_size > 0:
+            for record_batch in record_batch_reader:
+                yield pa.Table.from_batches([record_batch])
+        else:
+            yield record_batch_reader.read_all()
+    elif file_source_type in [CSV, TSV]:
+        yield from _read_csv_arrow_tables(rml_rule, references, file_source_type, chunk_size, csv_offsets)
+    elif file_source_type == PARQUET:
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(rml_rule['logical_source_value'])
+        row_groups = list(range(parquet_file.num_row_groups))
+        if source_partition is not None:
+            # each partition reads only its row groups
+            row_groups = row_groups[source_partition[0]::source_partition[1]]
+            if not row_groups:
+                return
+
+        if chunk_size > 0:
+            for record_batch in parquet_file.iter_batches(batch_size=chunk_size, row_groups=row_groups,
+                                                          columns=references):
+                yield pa.Table.from_batches([record_batch])
+        elif source_partition is not None:
+            yield parquet_file.read_row_groups(row_groups, columns=references)
+        else:
+            yield pq.read_table(rml_rule['logical_source_value'], columns=references)
+    elif file_source_type in FEATHER:
+        import pyarrow.feather as feather
+
+        yield feather.read_table(rml_rule['logical_source_value'], columns=references)
+    elif file_source_type == ORC:
+        import pyarrow.orc as orc
+
+        yield orc.read_table(rml_rule['logical_source_value'], columns=references)
+    else:
+        raise ValueError(f'Found an invalid source type for Arrow. Found value `{file_source_type}`.')
+
+
+def _read_csv_arrow_tables(rml_rule, references, file_source_type, chunk_size, csv_offsets=None):
+    """
+    Reads a CSV or TSV file as pyarrow Tables. If csv_offsets is provided, only the records in that range of bytes are
+    read (see _read_csv_in_chunks) and chunk_size must not be 0.
+    """
+
+    import pyarrow as pa
+    import pyarrow.csv as csv
+
+    parse_options = csv.ParseOptions(delimiter=',' if file_source_type == 'CSV' else '\t')
+    # all values are read as strings and empty values are not nulls, as with pandas
+    convert_options = csv.ConvertOptions(include_columns=references,
+                                         column_types={reference: pa.string() for reference in references},
+                                         strings_can_be_null=False)
+
+    csv_file = rml_rule['logical_source_value']
+    if csv_offsets is not None:
+        csv_file = io.BufferedReader(_CSVPartitionFile(rml_rule['logical_source_value'], *csv_offsets))
+
+    try:
+        try:
+            if chunk_size > 0:
+                # an invalid delimiter is detected when reading the header
+                csv_reader = csv.open_csv(csv_file, parse_options=parse_options, convert_options=convert_options)
+            else:
+                data = csv.read_csv(csv_file, parse_options=parse_options, convert_options=convert_options)
+        except pa.ArrowException:
+            # if delimiter is other than comma or tab, then infer it with pandas (issue #81)
+            if csv_offsets is None:
+                yield pa.Table.from_pandas(_read_csv(rml_rule, references, file_source_type), preserve_index=False)
+            else:
+                for data in _read_csv_in_chunks(rml_rule, references, file_source_type, chunk_size, csv_offsets):
+                    yield pa.Table.from_pandas(data, preserve_index=False)
+            return
+
+        if chunk_size > 0:
+            for record_batch in csv_reader:
+                yield pa.Table.from_batches([record_batch])
+        else:
+            yield data
+    finally:
+        if csv_offsets is not None:
+            csv_file.close()
+
+
 def _read_tabular_view(rml_rule):
     return duckdb.query(rml_rule['logical_source_value']).df()
 
 
+def get_duckdb_result_in_chunks(query_result, chunk_size):
+    """
+    Yields the result of a DuckDB query in chunks of chunk_size rows (the last one can be smaller). The result is
+    fetched in whole vectors, the rows exceeding chunk_size are kept for the next chunk.
+    """
+
+    vectors_per_chunk = -(-chunk_size // DUCKDB_VECTOR_SIZE)
+
+    remaining_data = pd.DataFrame()
+    data = query_result.fetch_df_chunk(vectors_per_chunk)
+    while not data.empty:
+        if len(remaining_data):
+            data = pd.concat([remaining_data, data], ignore_index=True)
+        num_chunk_rows = len(data) - len(data) % chunk_size
+        for i in range(0, num_chunk_rows, chunk_size):
+            yield data.iloc[i:i + chunk_size]
+        remaining_data = data.iloc[num_chunk_rows:]
+        data = query_result.fetch_df_chunk(vectors_per_chunk)
+    if len(remaining_data):
+        yield remaining_data
+
+
+def _read_tabular_view_in_chunks(rml_rule, chunk_size):
+    query_result = duckdb.connect().execute(rml_rule['logical_source_value'])
+    yield from get_duckdb_result_in_chunks(query_result, chunk_size)
+
+
 def _read_csv(rml_rule, references, file_source_type):
     delimiter = ',' if file_source_type == 'CSV' else '\t'
 
@@ -88,10 +287,223 @@ def _read_csv(rml_rule, references, file_source_type):
                              na_filter=False)
 
 
+def _is_csv_file_splittable(file_path):
+    return os.path.isfile(file_path) and os.path.getsize(file_path) > 0 and \
+        not file_path.lower().endswith(COMPRESSED_FILE_EXTENSIONS)
+
+
+def _get_csv_record_offsets(csv_file, offsets, start=0):
+    """
+    Returns the offsets of the first records of a CSV file (a memory-mapped file) that start at or after each of the
+    offsets (sorted and greater than start). The file is scanned once from start, which is the offset of a record.
+    Line breaks within quoted values do not end records, they are detected by the parity of the number of quotes
+    before them (escaped quotes are doubled and do not change it).
+    """
+
+    record_offsets = []
+    num_quotes = 0
+    position = start
+    for offset in offsets:
+        if record_offsets and record_offsets[-1] >= offset:
+            # the record found for the previous offset also starts after this one
+            record_offsets.append(record_offsets[-1])
+            continue
+
+        # a record starts at offset if the previous byte is a line break that is not within a quoted value
+        for block_start in range(position, offset - 1, CSV_SCAN_BLOCK_SIZE):
+            num_quotes += csv_file[block_start:min(block_start + CSV_SCAN_BLOCK_SIZE, offset - 1)].count(b'"')
+        position = max(position, offset - 1)
+
+        while True:
+            line_break = csv_file.find(b'\n', position)
+            if line_break == -1:
+                position = len(csv_file)
+                break
+
+            num_quotes += csv_file[position:line_break].count(b'"')
+            position = line_break + 1
+            if num_quotes % 2 == 0:
+                break
+        record_offsets.append(position)
+
+    return record_offsets
+
+
+def get_csv_partition_offsets(file_path, num_partitions):
+    """
+    Splits the records of a CSV file in ranges of bytes of about the same size, so that each partition parses only its
+    range. Returns the offset of the end of the header and the offsets of the start of the records of each partition
+    followed by the end of the file. The file is scanned once and the offsets are kept for the other partitions.
+    """
+
+    if (file_path, num_partitions) not in _csv_partition_offsets:
+        with open(file_path, 'rb') as csv_file, \
+                mmap.mmap(csv_file.fileno(), 0, access=mmap.ACCESS_READ) as csv_mmap:
+            header_end = _get_csv_record_offsets(csv_mmap, [1])[0]
+            partition_offsets = _get_csv_record_offsets(
+                csv_mmap, [header_end + (len(csv_mmap) - header_end) * i // num_partitions
+                           for i in range(1, num_partitions)], start=header_end)
+            _csv_partition_offsets[(file_path, num_partitions)] = \
+                (header_end, [header_end] + partition_offsets + [len(csv_mmap)])
+
+    return _csv_partition_offsets[(file_path, num_partitions)]
+
+
+def set_csv_partition_offsets(csv_partition_offsets):
+    # the offsets computed in another process
+    _csv_partition_offsets.update(csv_partition_offsets)
+
+
+def clear_csv_partition_offsets():
+    # the files can change between materializations
+    _csv_partition_offsets.clear()
+
+
+class _CSVPartitionFile(io.RawIOBase):
+    """
+    Binary file with the header of a CSV file followed by the records in a range of bytes of the file.
+    """
+
+    def __init__(self, file_path, header_end, start, end):
+        self.csv_file = open(file_path, 'rb')
+        self.byte_ranges = [(0, header_end), (start, end)]
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self.byte_ranges:
+            start, end = self.byte_ranges[0]
+            self.csv_file.seek(start)
+            data = self.csv_file.read(min(len(buffer), end - start))
+            if not data:
+                self.byte_ranges.pop(0)
+                continue
+
+            buffer[:len(data)] = data
+            self.byte_ranges[0] = (start + len(data), end)
+            return len(data)
+
+        return 0
+
+    def close(self):
+        self.csv_file.close()
+        super().close()
+
+
+def _read_csv_in_chunks(rml_rule, references, file_source_type, chunk_size, csv_offsets=None):
+    """
+    Yields the records of a CSV or TSV file in chunks of at most chunk_size rows. If csv_offsets (the offset of the end
+    of the header and the offsets of the start and the end of a range of records) is provided, only the records in
+    that range of bytes are read.
+    """
+
+    delimiter = ',' if file_source_type == 'CSV' else '\t'
+
+    csv_files = []
+
+    def open_csv_file():
+        if csv_offsets is None:
+            return rml_rule['logical_source_value']
+
+        csv_files.append(io.BufferedReader(_CSVPartitionFile(rml_rule['logical_source_value'], *csv_offsets)))
+        return csv_files[-1]
+
+    try:
+        try:
+            csv_reader = pd.read_table(open_csv_file(),
+                                       sep=delimiter,
+                                       index_col=False,
+                                       encoding='utf-8',
+                                       encoding_errors='strict',
+                                       usecols=references,
+                                       engine='c',
+                                       dtype=str,
+                                       keep_default_na=False,
+                                       na_filter=False,
+                                       chunksize=chunk_size)
+            # an invalid delimiter is detected when reading the header or the first chunk
+            data = csv_reader.get_chunk()
+        except:
+            # if delimiter is other than comma or tab, then infer it (issue #81)
+            csv_reader = pd.read_table(open_csv_file(),
+                                       index_col=False,
+                                       sep=None,
+                                       encoding='utf-8',
+                                       encoding_errors='strict',
+                                       usecols=references,
+                                       engine='python',
+                                       dtype=str,
+                                       keep_default_na=False,
+                                       na_filter=False,
+                                       chunksize=chunk_size)
+            data = csv_reader.get_chunk()
+
+        yield data
+        yield from csv_reader
+    finally:
+        for csv_file in csv_files:
+            csv_file.close()
+
+
 def _read_parquet(rml_rule, references):
     return pd.read_parquet(rml_rule['logical_source_value'], engine='pyarrow', columns=references)
 
 
+def _get_parquet_float_columns(parquet_file, references):
+    """
+    Returns the integer columns of a Parquet file with nulls, which pandas converts to floats when the file is read at
+    once. The nulls are counted with the statistics of the row groups, the columns without statistics are read.
+    """
+
+    import pyarrow as pa
+
+    float_columns = []
+    for column_index, field in enumerate(parquet_file.schema_arrow):
+        if field.name not in references or not pa.types.is_integer(field.type):
+            continue
+
+        metadata = parquet_file.metadata
+        column_statistics = [metadata.row_group(i).column(column_index).statistics
+                             for i in range(metadata.num_row_groups)]
+        if all(statistics is not None and statistics.has_null_count for statistics in column_statistics):
+            null_count = sum(statistics.null_count for statistics in column_statistics)
+        else:
+            null_count = parquet_file.read(columns=[field.name]).column(0).null_count
+        if null_count > 0:
+            float_columns.append(field.name)
+
+    return float_columns
+
+
+def _read_parquet_in_chunks(rml_rule, references, chunk_size, source_partition=None):
+    """
+    Yields the rows of a Parquet file in chunks of at most chunk_size rows. The integer columns with nulls are
+    converted to floats in all the chunks, as when the file is read at once.
+    """
+
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(rml_rule['logical_source_value'])
+    if source_partition is None:
+        record_batches = parquet_file.iter_batches(batch_size=chunk_size, columns=references)
+    else:
+        # each partition reads only its row groups, there are no row groups left for some partitions if the file has
+        # fewer row groups than partitions
+        row_groups = list(range(source_partition[0], parquet_file.num_row_groups, source_partition[1]))
+        if not row_groups:
+            return
+        record_batches = parquet_file.iter_batches(batch_size=chunk_size, row_groups=row_groups, columns=references)
+
+    float_columns = _get_parquet_float_columns(parquet_file, references)
+    for record_batch in record_batches:
+        data = record_batch.to_pandas()
+        # the nullable integer dtypes of pandas metadata are kept, they are the same when the file is read at once
+        yield data.astype({column: 'float64' for column in float_columns if
+                           pd.api.types.is_integer_dtype(data[column]) and
+                           not pd.api.types.is_extension_array_dtype(data[column])})
+
+
 def _read_feather(rml_rule, references):
     return pd.read_feather(rml_rule['logical_source_value'], use_threads=False, columns=references)
 
@@ -6,10 +6,18 @@ __maintainer__ = "Julián Arenas-Guerrero"
 __email__ = "arenas.guerrero.julian@outlook.com"
 
 
+import os
+import time
+import pickle
+import hashlib
 import logging
+import tempfile
 import pandas as pd
 
+from concurrent.futures import ThreadPoolExecutor
+
 from ..constants import *
+from ..utils import get_references_in_join_condition
 
 
 # PostgresSQL data types: https://www.postgresql.org/docs/14/datatype.html
@@ -56,6 +64,15 @@ SQL_RDF_DATATYPE = {
     'TIMESTAMP': XSD_DATETIME
 }
 
+# engines of the relational databases in the current process, they are reused by all the mapping rules
+_db_engines = {}
+# process in which the engines were created, the engines are not used in processes forked from it
+_db_engines_pid = os.getpid()
+# datatypes of the columns of the relational databases in the current process by db_url and table names
+_schema_catalogs = {}
+# key range conditions of the tables in the current process by engine, table name and number of ranges
+_key_range_conditions = {}
+
 
 def _replace_query_enclosing_characters(sql_query, db_dialect):
     dialect_sql_query = ''
@@ -82,38 +99,164 @@ def _replace_query_enclosing_characters(sql_query, db_dialect):
     return dialect_sql_query
 
 
-def _relational_db_connection(config, source_name):
-    from sqlalchemy import create_engine
-    from sqlalchemy.pool import NullPool
+def _get_db_engine(config, source_name):
+    """
+    Retrieves the engine of the relational database of a data source, which is created once per process with a pool
+    of at most sql_pool_size connections. The engines inherited from the parent process after a fork are discarded
+    without closing their connections, which are still used by the parent process.
+    """
+
+    global _db_engines_pid
+
+    if _db_engines_pid != os.getpid():
+        for db_engine in _db_engines.values():
+            db_engine.dispose(close=False)
+        _db_engines.clear()
+        _db_engines_pid = os.getpid()
+
+    connect_args = config.get_connect_args(source_name) if config.has_connect_args(source_name) else ''
+    db_engine_key = (source_name, config.get_db_url(source_name), connect_args)
+    if db_engine_key not in _db_engines:
+        from sqlalchemy import create_engine
+        from .sql_pool import MonitoredQueuePool
+
+        _db_engines[db_engine_key] = create_engine(config.get_db_url(source_name),
+                                                   connect_args=eval(connect_args) if connect_args else {},
+                                                   poolclass=MonitoredQueuePool,
+                                                   pool_size=config.get_sql_pool_size(), max_overflow=0)
+
+    return _db_engines[db_engine_key]
 
-    connect_args = eval(config.get_connect_args(source_name)) if config.has_connect_args(source_name) else {}
 
-    db_connection = create_engine(config.get_db_url(source_name), connect_args=connect_args, poolclass=NullPool)
+def log_db_engines_statistics():
+    if _db_engines_pid != os.getpid():
+        # the engines were inherited from the parent process
+        return
+
+    for (source_name, db_url, connect_args), db_engine in _db_engines.items():
+        logging.debug(f'Connection pool of data source `{source_name}`: {db_engine.pool.num_connections} connections '
+                      f'opened, {db_engine.pool.num_checkouts} checkouts, {db_engine.pool.wait_time:.3f} seconds '
+                      f'checking out connections.')
+
+
+def dispose_db_engines():
+    """
+    Closes the connections of the engines of the relational databases in the current process. The schema catalogs
+    are also discarded, so that they are queried again in the next materialization.
+    """
+
+    for db_engine in _db_engines.values():
+        # the connections of the engines inherited from the parent process are not closed
+        db_engine.dispose(close=_db_engines_pid == os.getpid())
+    _db_engines.clear()
+    _schema_catalogs.clear()
+    _key_range_conditions.clear()
+
+
+def _relational_db_connection(config, source_name):
+    db_connection = _get_db_engine(config, source_name)
     db_dialect = db_connection.dialect.name.upper()
 
     return db_connection, db_dialect
 
 
-def _get_column_table_datatype(config, source_name, table_name, column_name):
+def _query_schema_catalog(config, source_name, table_names):
+    """
+    Retrieves the datatypes of the columns of the tables with the given names (optionally qualified with their schemas)
+    in the relational database of a data source with a single query. The catalog is a dictionary whose keys are the
+    table names (also qualified with their schemas) and the column names. The datatype of a column of tables with the
+    same name in several schemas is ambiguous and it is None.
+    """
+
     db_connection, db_dialect = _relational_db_connection(config, source_name)
 
+    if db_dialect == SQLITE or not table_names:
+        # the values of SQLite columns are dynamically typed, no datatypes are inferred
+        return {}
+
+    # the columns of the tables with the same name in other schemas are also retrieved, so that ambiguous columns are
+    # detected
+    unqualified_table_names = sorted(set(table_name.rpartition('.')[2] for table_name in table_names))
+    table_names_list = ', '.join("'" + table_name.replace("'", "''") + "'" for table_name in unqualified_table_names)
     if db_dialect == ORACLE:
-        sql_query = f"SELECT t.data_type FROM all_tab_columns t " \
-                    f"WHERE t.TABLE_NAME = '{table_name}' AND t.COLUMN_NAME='{column_name}'"
-    elif db_dialect == SQLITE:
-        sql_query = f"SELECT typeof('{column_name}') as data_type FROM '{table_name}' LIMIT 1"
+        sql_query = 'SELECT t.owner AS table_schema, t.table_name, t.column_name, t.data_type ' \
+                    f'FROM all_tab_columns t WHERE t.table_name IN ({table_names_list})'
     else:
-        sql_query = f"SELECT `data_type` FROM `information_schema`.`columns` " \
-                    f"WHERE `table_name`='{table_name}' AND `column_name`='{column_name}'"
+        sql_query = 'SELECT `table_schema`, `table_name`, `column_name`, `data_type` ' \
+                    f'FROM `information_schema`.`columns` WHERE `table_name` IN ({table_names_list})'
         sql_query = _replace_query_enclosing_characters(sql_query, db_dialect)
 
     query_results_df = pd.read_sql_query(sql_query, con=db_connection)
+    # the case of the column names depends on the database
+    query_results_df.columns = [column.lower() for column in query_results_df.columns]
+
+    schema_catalog = {}
+    for table_schema, table_name, column_name, data_type in query_results_df[
+            ['table_schema', 'table_name', 'column_name', 'data_type']].itertuples(index=False):
+        # only the unqualified table name is ambiguous, the schema-qualified one keeps the datatype of the column
+        unqualified_data_type = data_type
+        if schema_catalog.get((table_name, column_name), data_type) != data_type:
+            unqualified_data_type = None
+        schema_catalog[(table_name, column_name)] = unqualified_data_type
+        if table_schema:
+            schema_catalog[(f'{table_schema}.{table_name}', column_name)] = data_type
+
+    logging.debug(f'Schema catalog of data source `{source_name}` with {len(query_results_df)} columns of '
+                  f'{len(unqualified_table_names)} tables retrieved.')
+
+    return schema_catalog
+
+
+def _read_schema_catalog(schema_catalog_path, schema_cache_ttl):
+    if not os.path.isfile(schema_catalog_path) or \
+            time.time() - os.path.getmtime(schema_catalog_path) > schema_cache_ttl:
+        return None
+
+    with open(schema_catalog_path, 'rb') as schema_catalog_file:
+        return pickle.load(schema_catalog_file)
 
-    if 'data_type' in query_results_df.columns and len(query_results_df) == 1:
-        data_type = query_results_df['data_type'][0]
-    elif 'DATA_TYPE' in query_results_df.columns and len(query_results_df) == 1:
-        data_type = query_results_df['DATA_TYPE'][0]
+
+def _write_schema_catalog(schema_catalog_path, schema_catalog):
+    # the file is replaced at once, so that other processes do not read it partially written
+    with open(f'{schema_catalog_path}.tmp', 'wb') as schema_catalog_file:
+        pickle.dump(schema_catalog, schema_catalog_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f'{schema_catalog_path}.tmp', schema_catalog_path)
+
+
+def get_schema_catalog(config, source_name, table_names):
+    """
+    Retrieves the schema catalog of the tables with the given names in the relational database of a data source, which
+    is queried once per process. If sql_schema_cache_ttl is provided, the catalog is cached in a file in temporary_dir
+    named after the hash of db_url and the table names, and the file is used until it is older than
+    sql_schema_cache_ttl seconds.
+    """
+
+    db_url = config.get_db_url(source_name)
+    table_names = tuple(sorted(set(table_names)))
+    if (db_url, table_names) in _schema_catalogs:
+        return _schema_catalogs[(db_url, table_names)]
+
+    schema_cache_ttl = config.get_sql_schema_cache_ttl()
+    schema_catalog_hash = hashlib.sha256('\n'.join((db_url,) + table_names).encode('utf-8')).hexdigest()
+    schema_catalog_path = os.path.join(config.get_temporary_dir() or tempfile.gettempdir(),
+                                       f'morph_kgc_schema_{schema_catalog_hash}.pkl')
+
+    schema_catalog = _read_schema_catalog(schema_catalog_path, schema_cache_ttl) if schema_cache_ttl else None
+    if schema_catalog is None:
+        schema_catalog = _query_schema_catalog(config, source_name, table_names)
+        if schema_cache_ttl:
+            _write_schema_catalog(schema_catalog_path, schema_catalog)
     else:
+        logging.debug(f'Schema catalog of data source `{source_name}` loaded from `{schema_catalog_path}`.')
+
+    _schema_catalogs[(db_url, table_names)] = schema_catalog
+
+    return schema_catalog
+
+
+def _get_column_table_datatype(config, source_name, source_table_names, table_name, column_name):
+    data_type = get_schema_catalog(config, source_name, source_table_names).get((table_name, column_name))
+    if not data_type:
         return None
 
     data_type = data_type.upper()
@@ -123,22 +266,40 @@ def _get_column_table_datatype(config, source_name, table_name, column_name):
     return None
 
 
-def get_rdb_reference_datatype(config, rml_rule, reference):
-    inferred_data_type = ''
+def get_rdb_table_names(rml_rule):
+    """
+    Retrieves the names of the tables read by the logical source of a mapping rule, i.e. the table or the tables in the
+    query.
+    """
 
     if rml_rule['logical_source_type'] == RML_TABLE_NAME:
-        inferred_data_type = _get_column_table_datatype(config, rml_rule['source_name'],
-                                                        rml_rule['logical_source_value'], reference)
+        return [rml_rule['logical_source_value']]
     elif rml_rule['logical_source_type'] == RML_QUERY:
         import sql_metadata
 
+        return sql_metadata.Parser(rml_rule['logical_source_value']).tables
+
+    return []
+
+
+def get_rdb_reference_datatype(config, rml_rule, reference, source_table_names):
+    """
+    Infers the datatype of a reference of a mapping rule from the schema catalog of source_table_names, the tables read
+    by the mapping rules of its data source.
+    """
+
+    inferred_data_type = ''
+
+    if rml_rule['logical_source_type'] == RML_TABLE_NAME:
+        inferred_data_type = _get_column_table_datatype(config, rml_rule['source_name'], source_table_names,
+                                                        rml_rule['logical_source_value'], reference)
+    elif rml_rule['logical_source_type'] == RML_QUERY:
         # if mapping rule has a query, get the table names in the query
-        table_names = sql_metadata.Parser(rml_rule['logical_source_value']).tables
-        for table_name in table_names:
+        for table_name in get_rdb_table_names(rml_rule):
             # for each table in the query get the datatype of the object reference in that table if an
             # exception is thrown, then the reference is not a column in that table, and nothing is done
             try:
-                inferred_data_type = _get_column_table_datatype(config, rml_rule['source_name'],
+                inferred_data_type = _get_column_table_datatype(config, rml_rule['source_name'], source_table_names,
                                                                 table_name, reference)
                 if inferred_data_type:
                     # already found it, end looping
@@ -149,10 +310,49 @@ def get_rdb_reference_datatype(config, rml_rule, reference):
     return inferred_data_type
 
 
-def _build_sql_query(rml_rule, references):
+def _fetch_sql_query_rows(db_connection, sql_query, fetch_size):
+    """
+    Fetches the rows of a SQL query streaming them with a server-side cursor (e.g., named cursors in psycopg and
+    SSCursor in PyMySQL) that fetches fetch_size rows at a time, so that the driver does not buffer all the results in
+    memory before they are copied. Drivers without server-side cursors buffer the results as before. The query is
+    executed without parameters, so that the drivers with format and pyformat paramstyles (e.g., psycopg2 and PyMySQL)
+    do not parse its percent characters as placeholders. Returns the columns and the rows of the results.
+    """
+
+    with db_connection.connect() as connection:
+        connection = connection.execution_options(stream_results=True, max_row_buffer=fetch_size, no_parameters=True)
+        results = connection.exec_driver_sql(sql_query)
+        return list(results.keys()), [row for rows_batch in results.partitions(fetch_size) for row in rows_batch]
+
+
+def _read_sql_query(db_connection, sql_query, fetch_size):
+    columns, rows = _fetch_sql_query_rows(db_connection, sql_query, fetch_size)
+
+    # the DataFrame is built with all the rows as pandas does, so that the dtypes of the columns do not depend on the
+    # batches in which the rows were fetched
+    return pd.DataFrame.from_records(rows, columns=columns, coerce_float=False)
+
+
+def _read_sql_query_in_chunks(db_connection, sql_query, chunk_size, fetch_size):
+    """
+    Yields the results of a SQL query in chunks of at most chunk_size rows (0 yields them at once), streaming them with
+    a server-side cursor that fetches fetch_size rows at a time. The query is executed without parameters.
+    """
+
+    if chunk_size == 0:
+        yield _read_sql_query(db_connection, sql_query, fetch_size)
+        return
+
+    with db_connection.connect() as connection:
+        connection = connection.execution_options(stream_results=True, max_row_buffer=fetch_size, no_parameters=True)
+        yield from pd.read_sql_query(sql_query, con=connection, coerce_float=False, chunksize=chunk_size)
+
+
+def _build_sql_query(rml_rule, references, partition_condition=None):
     """
     Build a query for MYSQL using backticks '`' as enclosing character. This character will later be replaced with the
-    one corresponding one to the dialect that applies. It also takes care of schema-qualified names.
+    one corresponding one to the dialect that applies. It also takes care of schema-qualified names. The
+    partition_condition selects the rows of a partition of a table (see _get_sql_partition_conditions).
     """
 
     if rml_rule['logical_source_type'] == RML_QUERY:
@@ -166,12 +366,136 @@ def _build_sql_query(rml_rule, references):
         for reference in references:
             query = f"{query}`{reference.replace('.', '`.`')}` IS NOT NULL AND "
         query = query[:-5]
+        if partition_condition:
+            query = f'{query} AND {partition_condition}'
     else:
         query = None
 
     return query
 
 
+def _build_sql_join_query(rml_rule, parent_triples_map_rule, references, parent_references,
+                          partition_condition=None):
+    """
+    Build a query joining the logical sources of a mapping rule and of the parent triples map of its referencing object
+    map, which are in the same database. The query selects the distinct values of the references of the mapping rule
+    and of the references of the parent triples map, whose columns are prefixed with `parent_`. The query uses
+    backticks as enclosing character. The partition_condition selects a partition of the logical source of the
+    mapping rule.
+    """
+
+    # the queries are nested, remove the final semicolons
+    child_query = _build_sql_query(rml_rule, references, partition_condition).strip().rstrip(';')
+    parent_query = _build_sql_query(parent_triples_map_rule, parent_references).strip().rstrip(';')
+
+    select_columns = [f'`child_source`.`{reference}` AS `{reference}`' for reference in references] + \
+                     [f'`parent_source`.`{reference}` AS `parent_{reference}`' for reference in parent_references]
+
+    child_join_references, parent_join_references = get_references_in_join_condition(rml_rule,
+                                                                                     'object_join_conditions')
+    join_condition = ' AND '.join(f'`child_source`.`{child_reference}` = `parent_source`.`{parent_reference}`'
+                                  for child_reference, parent_reference in
+                                  zip(child_join_references, parent_join_references))
+
+    return f"SELECT DISTINCT {', '.join(select_columns)} FROM ({child_query}) `child_source` " \
+           f"JOIN ({parent_query}) `parent_source` ON {join_condition}"
+
+
+def _get_sql_key_range_conditions(db_connection, db_dialect, table_name, num_ranges):
+    """
+    Splits a table in at most num_ranges ranges of its primary key if it is a single integer column or, otherwise, of
+    the pages in which its rows are stored in PostgreSQL (`ctid`). Returns the SQL conditions selecting the rows of
+    each range with backticks as enclosing character, or None if the table cannot be split. The conditions are
+    computed once per process for each table.
+    """
+
+    key_range_conditions_key = (db_connection, table_name, num_ranges)
+    if key_range_conditions_key not in _key_range_conditions:
+        _key_range_conditions[key_range_conditions_key] = _query_sql_key_range_conditions(db_connection, db_dialect,
+                                                                                          table_name, num_ranges)
+
+    return _key_range_conditions[key_range_conditions_key]
+
+
+def _query_sql_key_range_conditions(db_connection, db_dialect, table_name, num_ranges):
+    from sqlalchemy import inspect
+
+    schema_name, _, unqualified_table_name = table_name.rpartition('.')
+    primary_key_columns = inspect(db_connection).get_pk_constraint(
+        unqualified_table_name, schema=schema_name if schema_name else None)['constrained_columns']
+    quoted_table_name = f"`{table_name.replace('.', '`.`')}`"
+
+    min_key = max_key = None
+    if len(primary_key_columns) == 1:
+        key_column = f'`{primary_key_columns[0]}`'
+        min_max_query = f'SELECT MIN({key_column}), MAX({key_column}) FROM {quoted_table_name}'
+        min_max_query = _replace_query_enclosing_characters(min_max_query, db_dialect)
+        min_key, max_key = _fetch_sql_query_rows(db_connection, min_max_query, 1)[1][0]
+
+    if type(min_key) is int and type(max_key) is int:
+        key_bounds = [min_key + (max_key - min_key + 1) * i // num_ranges for i in range(1, num_ranges)]
+        key_bound_format = '{}'
+    elif db_dialect == POSTGRESQL:
+        # there is no single integer primary key (it is missing, composite or not an integer)
+        key_column = 'ctid'
+        # the backticks in the name of the relation are replaced with double quotes
+        num_pages_query = f"SELECT pg_relation_size('{quoted_table_name}') / current_setting('block_size')::int"
+        num_pages_query = _replace_query_enclosing_characters(num_pages_query, db_dialect)
+        num_pages = int(_fetch_sql_query_rows(db_connection, num_pages_query, 1)[1][0][0])
+        min_key = 0  # first page of the table
+        key_bounds = [num_pages * i // num_ranges for i in range(1, num_ranges)]
+        key_bound_format = "'({},0)'::tid"
+    else:
+        # the primary key is missing, composite or not an integer, or the table is empty
+        return None
+
+    # remove empty ranges when there are fewer keys or pages than ranges (views do not have pages), the first and last
+    # ranges are not bounded
+    key_bounds = [key_bound_format.format(key_bound) for key_bound in sorted(set(key_bounds)) if key_bound > min_key]
+    if not key_bounds:
+        return None
+
+    key_range_conditions = [f'{key_column} < {key_bounds[0]}']
+    for lower_key_bound, upper_key_bound in zip(key_bounds, key_bounds[1:]):
+        key_range_conditions.append(f'{key_column} >= {lower_key_bound} AND {key_column} < {upper_key_bound}')
+    key_range_conditions.append(f'{key_column} >= {key_bounds[-1]}')
+
+    return key_range_conditions
+
+
+def _read_sql_query_by_key_ranges(db_connection, sql_query, key_range_conditions, fetch_size, num_workers):
+    """
+    Reads the results of a SQL query over a table extracting the key ranges of the table in parallel with num_workers
+    threads, each range is fetched with its own connection of the pool of the database.
+    """
+
+    range_queries = [f'{sql_query} AND {key_range_condition}' for key_range_condition in key_range_conditions]
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        ranges_results = list(executor.map(
+            lambda range_query: _fetch_sql_query_rows(db_connection, range_query, fetch_size), range_queries))
+
+    rows = [row for range_columns, range_rows in ranges_results for row in range_rows]
+    return pd.DataFrame.from_records(rows, columns=ranges_results[0][0], coerce_float=False)
+
+
+def _get_sql_partition_conditions(config, rml_rule, num_partitions):
+    """
+    Splits the logical source of a mapping rule in at most num_partitions disjoint partitions, returning the SQL
+    conditions selecting the rows of each partition with backticks as enclosing character. Tables are split in ranges
+    of their keys (see _get_sql_key_range_conditions). Queries and the tables that cannot be split are read by the first
+    partition, whose condition is None.
+    """
+
+    if rml_rule['logical_source_type'] == RML_TABLE_NAME:
+        db_connection, db_dialect = _relational_db_connection(config, rml_rule['source_name'])
+        key_range_conditions = _get_sql_key_range_conditions(db_connection, db_dialect,
+                                                             rml_rule['logical_source_value'], num_partitions)
+        if key_range_conditions:
+            return key_range_conditions
+
+    return [None]
+
+
 def get_sql_data(config, rml_rule, references):
     sql_query = _build_sql_query(rml_rule, references)
     if sql_query is None:
@@ -183,7 +507,127 @@ def get_sql_data(config, rml_rule, references):
 
     logging.debug(f"SQL query for mapping rule `{rml_rule['triples_map_id']}`: [{sql_query}]")
 
-    return pd.read_sql_query(sql_query, con=db_connection, coerce_float=False)
+    if rml_rule['logical_source_type'] == RML_TABLE_NAME and config.get_sql_key_ranges() > 1:
+        key_range_conditions = _get_sql_key_range_conditions(db_connection, db_dialect,
+                                                             rml_rule['logical_source_value'],
+                                                             config.get_sql_key_ranges())
+        if key_range_conditions:
+            logging.debug(f"Table `{rml_rule['logical_source_value']}` extracted in {len(key_range_conditions)} key "
+                          f"ranges: {key_range_conditions}.")
+            # the query of a table always has a WHERE clause filtering NULL values, the conditions are appended to it
+            key_range_conditions = [_replace_query_enclosing_characters(key_range_condition, db_dialect)
+                                    for key_range_condition in key_range_conditions]
+            # there are no more workers than connections in the pool, otherwise they would wait for the connections
+            return _read_sql_query_by_key_ranges(db_connection, sql_query, key_range_conditions,
+                                                 config.get_sql_fetch_size(),
+                                                 min(len(key_range_conditions), config.get_sql_pool_size()))
+
+    return _read_sql_query(db_connection, sql_query, config.get_sql_fetch_size())
+
+
+def get_sql_data_in_chunks(config, rml_rule, references, chunk_size):
+    """
+    Yields the results of the SQL query of a mapping rule in chunks of at most chunk_size rows.
+    """
+
+    sql_query = _build_sql_query(rml_rule, references)
+    if sql_query is None:
+        # in case all term maps are constants e.g. R2RML test case R2RMLTC0006a
+        yield pd.DataFrame(columns=list(references))
+        return
+
+    db_connection, db_dialect = _relational_db_connection(config, rml_rule['source_name'])
+    sql_query = _replace_query_enclosing_characters(sql_query, db_dialect)
+
+    logging.debug(f"SQL query for mapping rule `{rml_rule['triples_map_id']}`: [{sql_query}]")
+
+    yield from _read_sql_query_in_chunks(db_connection, sql_query, chunk_size, config.get_sql_fetch_size())
+
+
+def get_sql_data_partition_in_chunks(config, rml_rule, references, chunk_size, source_partition):
+    """
+    Yields a partition of the results of the SQL query of a mapping rule in chunks of at most chunk_size rows.
+    source_partition is a tuple with the index of the partition and the number of partitions. Each partition reads
+    a disjoint range of the rows of the logical source (see _get_sql_partition_conditions), the partitions beyond the
+    number of ranges are empty.
+    """
+
+    partition_index, num_partitions = source_partition
+    partition_conditions = _get_sql_partition_conditions(config, rml_rule, num_partitions)
+    if partition_index >= len(partition_conditions):
+        yield pd.DataFrame(columns=list(references))
+        return
+
+    sql_query = _build_sql_query(rml_rule, references, partition_conditions[partition_index])
+    if sql_query is None:
+        # in case all term maps are constants e.g. R2RML test case R2RMLTC0006a
+        yield pd.DataFrame(columns=list(references))
+        return
+
+    db_connection, db_dialect = _relational_db_connection(config, rml_rule['source_name'])
+    sql_query = _replace_query_enclosing_characters(sql_query, db_dialect)
+
+    logging.debug(f"SQL query for partition {partition_index} of mapping rule `{rml_rule['triples_map_id']}`: "
+                  f"[{sql_query}]")
+
+    yield from _read_sql_query_in_chunks(db_connection, sql_query, chunk_size, config.get_sql_fetch_size())
+
+
+def get_sql_join_data_in_chunks(config, rml_rule, parent_triples_map_rule, references, parent_references,
+                                chunk_size, source_partition=None):
+    """
+    Yields the results of the SQL query joining the logical sources of a mapping rule and of its parent triples map in
+    chunks of at most chunk_size rows (0 yields them at once). The columns of the parent triples map are prefixed with
+    `parent_`. If source_partition is provided, only that partition of the results is yielded.
+    """
+
+    references = sorted(references)
+    parent_references = sorted(parent_references)
+
+    partition_condition = None
+    if source_partition is not None:
+        # the logical source of the mapping rule is partitioned, the parent triples map is joined in all partitions
+        partition_index, num_partitions = source_partition
+        partition_conditions = _get_sql_partition_conditions(config, rml_rule, num_partitions)
+        if partition_index >= len(partition_conditions):
+            yield pd.DataFrame(columns=references + [f'parent_{reference}' for reference in parent_references])
+            return
+        partition_condition = partition_conditions[partition_index]
+
+    db_connection, db_dialect = _relational_db_connection(config, rml_rule['source_name'])
+    sql_query = _build_sql_join_query(rml_rule, parent_triples_map_rule, references, parent_references,
+                                      partition_condition)
+    sql_query = _replace_query_enclosing_characters(sql_query, db_dialect)
+
+    logging.debug(f"SQL join query for mapping rule `{rml_rule['triples_map_id']}`: [{sql_query}]")
+
+    yield from _read_sql_query_in_chunks(db_connection, sql_query, chunk_size, config.get_sql_fetch_size())
+
+
+def get_sql_query_results_in_chunks(config, source_name, sql_query, chunk_size):
+    """
+    Yields the results of a SQL query, written in the dialect of the database, in chunks of at most chunk_size rows.
+    """
+
+    db_connection, db_dialect = _relational_db_connection(config, source_name)
+
+    yield from _read_sql_query_in_chunks(db_connection, sql_query, chunk_size, config.get_sql_fetch_size())
+
+
+def get_sql_row_count(config, rml_rule):
+    """
+    Counts the number of rows of the table or query of a mapping rule.
+    """
+
+    if rml_rule['logical_source_type'] == RML_QUERY:
+        sql_query = f"SELECT COUNT(*) FROM ({rml_rule['logical_source_value']}) count_query"
+    else:
+        sql_query = f"SELECT COUNT(*) FROM `{rml_rule['logical_source_value'].replace('.', '`.`')}`"
+
+    db_connection, db_dialect = _relational_db_connection(config, rml_rule['source_name'])
+    sql_query = _replace_query_enclosing_characters(sql_query, db_dialect)
+
+    return int(pd.read_sql_query(sql_query, con=db_connection).iloc[0, 0])
 
 
 def setup_oracle(config):
@@ -0,0 +1,110 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import logging
+
+from collections import OrderedDict
+
+
+class SourceCache:
+    """
+    Keeps the data read from logical sources in a process, so that a logical source used by several mapping rules is
+    read once. Before materializing a bundle of mapping groups, the uses of each source and the references read in
+    them are declared. The source is then read with all its declared references, the data of each use is selected
+    from it, and the data is released after its last declared use. If a memory limit (in bytes) is provided, the
+    least recently used data is evicted to keep the cache within the limit.
+    """
+
+    def __init__(self, memory_limit=0):
+        self.memory_limit = memory_limit
+        self.memory_usage = 0
+        self.source_data = OrderedDict()
+        self.source_data_memory = {}
+        self.source_references = {}
+        self.source_uses = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def declare_use(self, source_key, references):
+        self.source_references.setdefault(source_key, set()).update(references)
+        self.source_uses[source_key] = self.source_uses.get(source_key, 0) + 1
+
+    def get_references(self, source_key, references):
+        references = set(references).union(self.source_references.get(source_key, set()))
+        if source_key in self.source_data:
+            # the data will replace the cached data, keep its references
+            references.update(self.source_data[source_key].columns)
+
+        return references
+
+    def get(self, source_key, references):
+        data = self.source_data.get(source_key)
+        if data is None or not set(references).issubset(data.columns):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.source_data.move_to_end(source_key)
+        self.release(source_key)
+
+        return data[list(references)]
+
+    def is_shared(self, source_key):
+        # the data is cached or there are other uses of the source
+        return source_key in self.source_data or self.source_uses.get(source_key, 0) > 1
+
+    def put(self, source_key, data):
+        self._remove(source_key)
+
+        # data is kept only if there are other uses of the source
+        if self.source_uses.get(source_key, 0) > 1:
+            data_memory = int(data.memory_usage(index=True, deep=True).sum())
+            if not self.memory_limit or data_memory <= self.memory_limit:
+                self.source_data[source_key] = data
+                self.source_data_memory[source_key] = data_memory
+                self.memory_usage += data_memory
+                self._evict()
+
+        self.release(source_key)
+
+    def log_statistics(self):
+        logging.debug(f'Source cache: {self.hits} hits, {self.misses} misses, {self.evictions} evictions, '
+                      f'{len(self.source_data)} logical sources using {self.memory_usage} bytes.')
+
+    def release(self, source_key):
+        if source_key in self.source_uses:
+            self.source_uses[source_key] -= 1
+            if self.source_uses[source_key] <= 0:
+                del self.source_uses[source_key]
+                self._remove(source_key)
+
+    def _remove(self, source_key):
+        if source_key in self.source_data:
+            del self.source_data[source_key]
+            self.memory_usage -= self.source_data_memory.pop(source_key)
+
+    def _evict(self):
+        # evict the least recently used data
+        while self.memory_limit and self.memory_usage > self.memory_limit:
+            self._remove(next(iter(self.source_data)))
+            self.evictions += 1
+
+
+# cache of the current process, it is only enabled while the scheduler materializes mapping groups
+_source_cache = None
+
+
+def get_source_cache():
+    return _source_cache
+
+
+def set_source_cache(source_cache):
+    global _source_cache
+    _source_cache = source_cache
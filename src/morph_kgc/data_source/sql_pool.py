@@ -0,0 +1,38 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import time
+
+from sqlalchemy.pool import QueuePool
+
+
+class MonitoredQueuePool(QueuePool):
+    """
+    Bounded pool of connections to a relational database that keeps the number of connections opened, the number of
+    checkouts and the time spent checking out connections (waiting for a connection to be returned to the pool or
+    opening a new one).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.num_connections = 0
+        self.num_checkouts = 0
+        self.wait_time = 0
+
+    def _create_connection(self):
+        self.num_connections += 1
+        return super()._create_connection()
+
+    def _do_get(self):
+        start_time = time.time()
+        try:
+            return super()._do_get()
+        finally:
+            self.num_checkouts += 1
+            self.wait_time += time.time() - start_time
@@ -0,0 +1,229 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import os
+import sys
+import heapq
+import shutil
+import logging
+import tempfile
+import numpy as np
+import pandas as pd
+
+from itertools import groupby
+from operator import itemgetter
+
+from .constants import HASH_64_DEDUPLICATION, HASH_128_DEDUPLICATION
+
+
+# approximate memory taken by an entry in a set, besides the memory of the triple string
+SET_ENTRY_MEMORY = 32
+# maximum number of sorted runs that are merged at once, more runs are merged in several passes
+MAX_MERGED_RUNS = 128
+# maximum number of triples in each of the sets returned when merging the spilled triples
+MERGE_BATCH_SIZE = 100000
+# keys of the two independent 64-bit hash functions used to hash triples, each key must have 16 characters
+HASH_KEYS = ['morph-kgc-hash-1', 'morph-kgc-hash-2']
+HASH_128_DTYPE = np.dtype([('high', np.uint64), ('low', np.uint64)])
+
+
+class TriplesDeduplicator:
+    """
+    Removes duplicated triples within a mapping group. Mapping partitions guarantee that different mapping groups
+    generate disjoint sets of triples, hence a deduplicator only needs to keep track of the triples of one group.
+    Triples are processed in chunks with add(), which returns the triples of the chunk that had not been seen before
+    and can be written to the output straight away. finish() returns the sets of triples whose output was postponed.
+    """
+
+    def __init__(self):
+        self.triples = set()
+
+    def __len__(self):
+        return len(self.triples)
+
+    def add(self, triples):
+        new_triples = set(triples).difference(self.triples)
+        self.triples.update(new_triples)
+
+        return new_triples
+
+    def finish(self):
+        return []
+
+
+class SpillingTriplesDeduplicator(TriplesDeduplicator):
+    """
+    Deduplicator that spills triples to a temporary directory when its memory limit (in bytes) is exceeded. The triples
+    in memory are written to disk as a sorted run and removed from memory. After the first spill, add() cannot tell
+    whether a triple was already returned, so new triples are postponed and spilled in later runs. finish() merges the
+    runs and returns the postponed triples that are not in a run of returned triples, in sets of bounded size.
+    """
+
+    def __init__(self, memory_limit, temporary_dir=''):
+        super().__init__()
+
+        self.memory_limit = memory_limit
+        self.memory_usage = 0
+        self.temporary_dir = temporary_dir if temporary_dir else None
+        self.spill_dir = None
+        self.run_paths = []
+        self.num_runs = 0
+        self.num_triples = 0
+
+    def __len__(self):
+        return self.num_triples
+
+    def add(self, triples):
+        new_triples = set(triples).difference(self.triples)
+        self.triples.update(new_triples)
+        self.memory_usage += sum(sys.getsizeof(triple) + SET_ENTRY_MEMORY for triple in new_triples)
+
+        if self.spill_dir is None:
+            # nothing was spilled, hence the new triples were not returned before
+            self.num_triples += len(new_triples)
+            if self.memory_usage > self.memory_limit:
+                self._spill(returned=True)
+            return new_triples
+        else:
+            if self.memory_usage > self.memory_limit:
+                self._spill(returned=False)
+            return set()
+
+    def finish(self):
+        if self.spill_dir is None:
+            return []
+
+        if self.triples:
+            self._spill(returned=False)
+
+        return self._merge_runs()
+
+    def _spill(self, returned):
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix='morph_kgc_', dir=self.temporary_dir)
+
+        self._write_run(((triple, returned) for triple in sorted(self.triples)))
+        logging.debug(f'{len(self.triples)} triples spilled to `{self.spill_dir}`.')
+
+        self.triples = set()
+        self.memory_usage = 0
+
+    def _write_run(self, run_triples):
+        run_path = os.path.join(self.spill_dir, f'{self.num_runs}.run')
+        self.num_runs += 1
+        with open(run_path, 'w', encoding='utf-8') as run_file:
+            for triple, returned in run_triples:
+                run_file.write(f'{triple}\t{int(returned)}\n')
+        self.run_paths.append(run_path)
+
+    def _merge_runs(self):
+        try:
+            # merge runs in several passes to limit the number of open files
+            while len(self.run_paths) > MAX_MERGED_RUNS:
+                run_paths = self.run_paths[:MAX_MERGED_RUNS]
+                self.run_paths = self.run_paths[MAX_MERGED_RUNS:]
+                self._write_run(_merge_sorted_runs(run_paths))
+                for run_path in run_paths:
+                    os.remove(run_path)
+
+            triples = set()
+            for triple, returned in _merge_sorted_runs(self.run_paths):
+                if not returned:
+                    triples.add(triple)
+                    if len(triples) == MERGE_BATCH_SIZE:
+                        self.num_triples += len(triples)
+                        yield triples
+                        triples = set()
+            self.num_triples += len(triples)
+            if triples:
+                yield triples
+        finally:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+class HashTriplesDeduplicator(TriplesDeduplicator):
+    """
+    Deduplicator that keeps 64-bit or 128-bit hashes of the triples instead of the triples, i.e. 8 or 16 bytes per
+    triple. The hashes are kept in sorted arrays, which are merged as they grow so that there are O(log n) of them.
+    Different triples with the same hash are considered duplicates, and only the first of them is returned. For n
+    triples and b-bit hashes the probability of a collision is about n^2 / 2^(b+1), e.g. 3e-4 for 10^8 triples with
+    64-bit hashes and 1.5e-15 for 10^12 triples with 128-bit hashes.
+    """
+
+    def __init__(self, hash_bits=64):
+        self.hash_bits = hash_bits
+        self.hash_runs = []
+
+    def __len__(self):
+        return sum(len(hash_run) for hash_run in self.hash_runs)
+
+    def add(self, triples):
+        triples = np.asarray(triples, dtype=object)
+
+        # sorted unique hashes of the chunk, with the position of a triple for each of them
+        triple_hashes, triple_positions = np.unique(self._hash_triples(triples), return_index=True)
+
+        is_new = np.ones(len(triple_hashes), dtype=bool)
+        for hash_run in self.hash_runs:
+            hash_positions = np.minimum(np.searchsorted(hash_run, triple_hashes), len(hash_run) - 1)
+            is_new &= hash_run[hash_positions] != triple_hashes
+
+        self._add_hash_run(triple_hashes[is_new])
+
+        return set(triples[triple_positions[is_new]])
+
+    def _hash_triples(self, triples):
+        high_hashes = pd.util.hash_array(triples, hash_key=HASH_KEYS[0])
+        if self.hash_bits == 64:
+            return high_hashes
+
+        triple_hashes = np.empty(len(triples), dtype=HASH_128_DTYPE)
+        triple_hashes['high'] = high_hashes
+        triple_hashes['low'] = pd.util.hash_array(triples, hash_key=HASH_KEYS[1])
+
+        return triple_hashes
+
+    def _add_hash_run(self, hash_run):
+        if len(hash_run) == 0:
+            return
+
+        self.hash_runs.append(hash_run)
+        # merge the last runs while the last one is not much smaller than the previous one
+        while len(self.hash_runs) > 1 and len(self.hash_runs[-2]) <= 2 * len(self.hash_runs[-1]):
+            hash_run = self.hash_runs.pop()
+            self.hash_runs[-1] = np.sort(np.concatenate([self.hash_runs[-1], hash_run]))
+
+
+def _read_run(run_path):
+    with open(run_path, encoding='utf-8') as run_file:
+        for line in run_file:
+            triple, returned = line[:-1].rsplit('\t', 1)
+            yield triple, returned == '1'
+
+
+def _merge_sorted_runs(run_paths):
+    """
+    Merges sorted runs yielding each triple once, together with whether it was returned in any of the runs.
+    """
+
+    merged_runs = heapq.merge(*[_read_run(run_path) for run_path in run_paths])
+    for triple, run_triples in groupby(merged_runs, key=itemgetter(0)):
+        yield triple, any(returned for _, returned in run_triples)
+
+
+def get_triples_deduplicator(config):
+    if config.get_deduplication() == HASH_64_DEDUPLICATION:
+        return HashTriplesDeduplicator(hash_bits=64)
+    elif config.get_deduplication() == HASH_128_DEDUPLICATION:
+        return HashTriplesDeduplicator(hash_bits=128)
+    elif config.get_deduplication_memory_limit() > 0:
+        # the memory limit is provided in MB
+        return SpillingTriplesDeduplicator(config.get_deduplication_memory_limit() * 1024 * 1024,
+                                           config.get_temporary_dir())
+    else:
+        return TriplesDeduplicator()
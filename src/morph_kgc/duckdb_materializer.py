@@ -0,0 +1,249 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import os
+import duckdb
+
+from falcon.uri import encode_value
+from urllib.parse import quote
+
+from .constants import *
+from .utils import get_rml_rule, get_references_in_join_condition
+from .materializer import _add_references_in_join_condition, _compile_template, _get_iri_encoding_pattern, \
+    _get_references_in_rml_rule, _replace_object_map_with_parent_subject_map, LITERAL_ESCAPES
+from .data_source.data_file import get_duckdb_result_in_chunks
+
+
+def _sql_identifier(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _sql_string(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _connect(config):
+    connection = duckdb.connect()
+
+    # the processes share the CPUs
+    number_of_processes = config.get_number_of_processes()
+    if number_of_processes > 1:
+        connection.execute(f'SET threads TO {max(1, (os.cpu_count() or 1) // number_of_processes)}')
+    if config.get_temporary_dir():
+        connection.execute(f'SET temp_directory TO {_sql_string(config.get_temporary_dir())}')
+
+    # only the values with characters that must be percent-encoded are passed to Python
+    safe_percent_encoding = config.get_safe_percent_encoding()
+    if safe_percent_encoding:
+        encode_iri = lambda value: quote(value, safe=safe_percent_encoding)
+    else:
+        encode_iri = encode_value
+    connection.create_function('morph_kgc_encode_iri', encode_iri, ['VARCHAR'], 'VARCHAR')
+
+    return connection
+
+
+def _get_source_relation(connection, rml_rule, references):
+    """
+    Returns the SQL expression to read the logical source of a mapping rule in the FROM clause.
+    """
+
+    if rml_rule['logical_source_type'] == RML_QUERY:
+        # tabular views
+        return f"({rml_rule['logical_source_value']})"
+
+    file_path = _sql_string(rml_rule['logical_source_value'])
+    if rml_rule['source_type'] == PARQUET:
+        return f'read_parquet({file_path})'
+
+    # all values are read as strings and empty values are not nulls, as with pandas
+    csv_options = f"header=true, all_varchar=true, nullstr={_sql_string(AUXILIAR_UNIQUE_REPLACING_STRING)}"
+    delimiter = ',' if rml_rule['source_type'] == CSV else '\t'
+    relation = f"read_csv({file_path}, delim={_sql_string(delimiter)}, quote='\"', escape='\"', {csv_options})"
+
+    columns = [column[0] for column in connection.execute(f'DESCRIBE SELECT * FROM {relation}').fetchall()]
+    if not set(references).issubset(columns):
+        # if delimiter is other than comma or tab, then infer it (issue #81)
+        relation = f'read_csv({file_path}, {csv_options})'
+
+    return relation
+
+
+def _get_source_query(connection, rml_rule, references, config, columns_prefix=''):
+    """
+    Builds the query that selects the references of a mapping rule from its logical source as strings, removing the
+    rows with NULL values in any reference and the duplicated rows.
+    """
+
+    references = sorted(references)
+    relation = _get_source_relation(connection, rml_rule, references)
+    column_types = dict(
+        (column[0], column[1]) for column in connection.execute(f'DESCRIBE SELECT * FROM {relation}').fetchall())
+
+    columns = []
+    for reference in references:
+        column = _sql_identifier(reference)
+        if column_types.get(reference) == 'BOOLEAN':
+            # booleans are written as with Python str(), as with the PANDAS execution engine
+            column = f"CASE {column} WHEN true THEN 'True' WHEN false THEN 'False' END"
+        elif column_types.get(reference) != 'VARCHAR':
+            column = f'CAST({column} AS VARCHAR)'
+        columns.append(column)
+
+    select_clause = ', '.join(f'{column} AS {_sql_identifier(columns_prefix + reference)}'
+                              for column, reference in zip(columns, references))
+    na_values = ', '.join(_sql_string(na_value) for na_value in config.get_na_values())
+    where_clause = ' AND '.join(f'{column} IS NOT NULL AND {column} NOT IN ({na_values})' if na_values else
+                                f'{column} IS NOT NULL' for column in columns)
+
+    source_query = f'SELECT DISTINCT {select_clause} FROM {relation} AS source'
+    if where_clause:
+        source_query += f' WHERE {where_clause}'
+
+    return source_query
+
+
+def _materialize_template_sql(template, expression_type, config, columns_alias='', termtype='', datatype=''):
+    """
+    Compiles a term map to a SQL expression concatenating the segments of the template with the values of the
+    references.
+    """
+
+    template_segments, references = _compile_template(template, expression_type, termtype)
+
+    if not references:
+        return _sql_string(template_segments[0])
+
+    iri_encoding_pattern = _sql_string(_get_iri_encoding_pattern(config.get_safe_percent_encoding()).pattern)
+
+    template_expressions = []
+    for template_segment, reference in zip(template_segments, references):
+        # the columns of the parent triples map are prefixed, so the columns are not qualified
+        value = _sql_identifier(columns_alias + reference)
+
+        if termtype.strip() == RML_IRI and expression_type == RML_TEMPLATE:
+            value = f'CASE WHEN regexp_matches({value}, {iri_encoding_pattern}) ' \
+                    f'THEN morph_kgc_encode_iri({value}) ELSE {value} END'
+        elif termtype.strip() == RML_LITERAL:
+            # Natural Mapping of SQL Values (https://www.w3.org/TR/r2rml/#natural-mapping)
+            if datatype == XSD_BOOLEAN:
+                value = f'lower({value})'
+            elif datatype == XSD_DATETIME:
+                value = f"replace({value}, ' ', 'T')"
+            # Make integers not end with .0
+            elif datatype == XSD_INTEGER:
+                value = f'CAST(CAST(trunc(CAST({value} AS DOUBLE)) AS BIGINT) AS VARCHAR)'
+
+            for character, escaped_character in LITERAL_ESCAPES:
+                value = f'replace({value}, {_sql_string(character)}, {_sql_string(escaped_character)})'
+
+        if template_segment:
+            template_expressions.append(_sql_string(template_segment))
+        template_expressions.append(value)
+    if template_segments[-1]:
+        template_expressions.append(_sql_string(template_segments[-1]))
+
+    return ' || '.join(template_expressions)
+
+
+def _materialize_triples_sql(rml_rule, config, columns_alias=''):
+    """
+    Compiles the triples (or quads) of a mapping rule to a SQL expression.
+    """
+
+    subject = _materialize_template_sql(rml_rule['subject_map_value'], rml_rule['subject_map_type'], config,
+                                        termtype=rml_rule['subject_termtype'])
+    predicate = _materialize_template_sql(rml_rule['predicate_map_value'], rml_rule['predicate_map_type'], config,
+                                          termtype=RML_IRI)
+    object = _materialize_template_sql(rml_rule['object_map_value'], rml_rule['object_map_type'], config,
+                                       columns_alias=columns_alias, termtype=rml_rule['object_termtype'],
+                                       datatype=rml_rule['lang_datatype_map_value'])
+
+    if rml_rule['lang_datatype'] == RML_LANGUAGE_MAP:
+        language = _materialize_template_sql(rml_rule['lang_datatype_map_value'], rml_rule['lang_datatype_map_type'],
+                                             config)
+        object = f"{object} || '@' || {language}"
+    elif rml_rule['lang_datatype'] == RML_DATATYPE_MAP:
+        datatype = _materialize_template_sql(rml_rule['lang_datatype_map_value'], rml_rule['lang_datatype_map_type'],
+                                             config, termtype=RML_IRI)
+        object = f"{object} || '^^' || {datatype}"
+
+    triples = f"{subject} || ' ' || {predicate} || ' ' || {object}"
+
+    if config.get_output_format() == NQUADS:
+        if rml_rule['graph_map_type'] in [RML_TEMPLATE, RML_CONSTANT, RML_REFERENCE] and rml_rule['graph_map_value'] != RML_DEFAULT_GRAPH:
+            graph = _materialize_template_sql(rml_rule['graph_map_value'], rml_rule['graph_map_type'], config,
+                                              termtype=RML_IRI)
+        else:
+            graph = "''"
+        triples = f"{triples} || ' ' || {graph}"
+
+    return triples
+
+
+def _compile_rml_rule(connection, rml_rule, rml_df, fnml_df, config, source_partition=None):
+    """
+    Compiles a mapping rule to a single SQL query returning its distinct triples in the `triple` column. The logical
+    source of the parent triples map of a referencing object map is joined in the query.
+    """
+
+    rml_rule = rml_rule.copy()
+
+    references = set(_get_references_in_rml_rule(rml_rule, rml_df, fnml_df))
+
+    join_clause = ''
+    columns_alias = ''
+    if rml_rule['object_map_type'] == RML_PARENT_TRIPLES_MAP:
+        parent_triples_map_rule = get_rml_rule(rml_df, rml_rule['object_map_value'])
+        parent_references = set(
+            _get_references_in_rml_rule(parent_triples_map_rule, rml_df, fnml_df, only_subject_map=True))
+        references, parent_references = _add_references_in_join_condition(rml_rule, references, parent_references)
+
+        child_join_references, parent_join_references = get_references_in_join_condition(rml_rule,
+                                                                                         'object_join_conditions')
+        join_condition = ' AND '.join(
+            f'source.{_sql_identifier(child_reference)} = parent.{_sql_identifier("parent_" + parent_reference)}'
+            for child_reference, parent_reference in zip(child_join_references, parent_join_references))
+        parent_query = _get_source_query(connection, parent_triples_map_rule, parent_references, config,
+                                         columns_prefix='parent_')
+        join_clause = f' JOIN ({parent_query}) AS parent ON {join_condition}'
+
+        _replace_object_map_with_parent_subject_map(rml_rule, parent_triples_map_rule)
+        columns_alias = 'parent_'
+
+    triples = _materialize_triples_sql(rml_rule, config, columns_alias)
+
+    source_query = _get_source_query(connection, rml_rule, references, config)
+    if source_partition is not None:
+        # the rows of the logical source are assigned to the partitions by their hash
+        partition_hash = f"hash({', '.join(_sql_identifier(reference) for reference in sorted(references))})"
+        source_query = f'SELECT * FROM ({source_query}) WHERE {partition_hash} % {source_partition[1]} = ' \
+                       f'{source_partition[0]}'
+
+    return f'SELECT DISTINCT {triples} AS triple FROM ({source_query}) AS source{join_clause}'
+
+
+def _materialize_rml_rule_in_chunks_with_duckdb(rml_rule, rml_df, fnml_df, config, source_partition=None):
+    """
+    Materializes a mapping rule with the DUCKDB execution engine, yielding DataFrames with the generated triples in the
+    `triple` column. The mapping rule is compiled to a single SQL query over its logical source that is executed by
+    DuckDB, which reads, filters, joins and removes duplicates out of core.
+    """
+
+    chunk_size = config.get_chunk_size()
+
+    connection = _connect(config)
+    query_result = connection.execute(_compile_rml_rule(connection, rml_rule, rml_df, fnml_df, config,
+                                                        source_partition))
+
+    if chunk_size > 0:
+        yield from get_duckdb_result_in_chunks(query_result, chunk_size)
+    else:
+        yield query_result.df()
+
+    connection.close()
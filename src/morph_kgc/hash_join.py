@@ -0,0 +1,153 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import os
+import math
+import pickle
+import shutil
+import logging
+import tempfile
+import pandas as pd
+
+
+# number of partitions in which the data of both sides of a join is split if there is no memory limit, a partition of
+# the parent data is loaded in memory at once
+HASH_JOIN_PARTITIONS = 64
+# maximum number of partitions in which the data of both sides of a join is split at once, the partitions of the parent
+# data exceeding the memory limit are partitioned again
+MAX_HASH_JOIN_PARTITIONS = 1024
+
+
+def get_num_hash_join_partitions(estimated_size, memory_limit):
+    """
+    Computes the number of partitions in which the parent data of a join of estimated_size bytes is split, so that the
+    partitions fill half of memory_limit (in bytes, 0 means no limit) on average and uneven partitions fit in memory.
+    """
+
+    if memory_limit <= 0:
+        return HASH_JOIN_PARTITIONS
+
+    return min(MAX_HASH_JOIN_PARTITIONS, max(2, math.ceil(2 * estimated_size / memory_limit)))
+
+
+def _read_partition_file(partition_path):
+    if not os.path.exists(partition_path):
+        return
+
+    with open(partition_path, 'rb') as partition_file:
+        while True:
+            try:
+                yield pickle.load(partition_file)
+            except EOFError:
+                break
+
+
+class GraceHashJoin:
+    """
+    Partitions the data of both sides of a join whose parent data does not fit in memory. The rows of the parent and
+    child data are written to partition files in a temporary directory by the hash of their join values, hence rows
+    that join are written to partitions with the same index. The partitions can then be joined one by one, loading in
+    memory a partition of the parent data and reading the child data of the partition chunk by chunk. If memory_limit
+    (in bytes, 0 means no limit) is provided, the partitions whose parent data exceeds it are partitioned again with a
+    different hash (level is the number of times the data was partitioned before).
+    """
+
+    def __init__(self, child_join_references, parent_join_references, num_partitions=HASH_JOIN_PARTITIONS,
+                 temporary_dir='', memory_limit=0, level=0):
+        self.child_join_references = child_join_references
+        self.parent_join_references = parent_join_references
+        self.num_partitions = num_partitions
+        self.memory_limit = memory_limit
+        self.level = level
+        self.spill_dir = tempfile.mkdtemp(prefix='morph_kgc_', dir=temporary_dir if temporary_dir else None)
+
+        self.num_parent_rows = 0
+        self.num_child_rows = 0
+        # memory usage (in bytes) of the parent data of each partition
+        self.parent_partition_sizes = {}
+
+    def add_parent_data(self, parent_data):
+        self.num_parent_rows += len(parent_data)
+        self._write_partitions(parent_data, self.parent_join_references, 'parent')
+
+    def add_child_data(self, data):
+        self.num_child_rows += len(data)
+        self._write_partitions(data, self.child_join_references, 'child')
+
+    def get_partitions(self):
+        """
+        Yields, for each partition, the parent data of the partition and a generator of the chunks of child data of
+        the partition. The partitions whose parent data exceeds the memory limit are partitioned again, unless all the
+        parent data was written to a single partition (i.e., the hash does not split it). The temporary directory is
+        removed after the last partition.
+        """
+
+        logging.debug(f'Joining {self.num_child_rows} child rows and {self.num_parent_rows} parent rows in '
+                      f'{self.num_partitions} partitions in `{self.spill_dir}`.')
+
+        try:
+            for partition_index in range(self.num_partitions):
+                if partition_index not in self.parent_partition_sizes:
+                    # no child row of the partition joins
+                    continue
+
+                partition_size = self.parent_partition_sizes[partition_index]
+                if 0 < self.memory_limit < partition_size and len(self.parent_partition_sizes) > 1:
+                    yield from self._repartition(partition_index, partition_size)
+                    continue
+
+                parent_data = list(_read_partition_file(self._get_partition_path('parent', partition_index)))
+                # duplicates are removed in each chunk
+                parent_data = pd.concat(parent_data, ignore_index=True).drop_duplicates()
+                yield parent_data, _read_partition_file(self._get_partition_path('child', partition_index))
+        finally:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def _repartition(self, partition_index, partition_size):
+        """
+        Partitions again the data of a partition whose parent data exceeds the memory limit and yields its partitions.
+        """
+
+        logging.debug(f'The parent data of partition {partition_index} in `{self.spill_dir}` ({partition_size} bytes) '
+                      'exceeds the memory limit, it is partitioned again.')
+
+        hash_join = GraceHashJoin(self.child_join_references, self.parent_join_references,
+                                  num_partitions=get_num_hash_join_partitions(partition_size, self.memory_limit),
+                                  temporary_dir=self.spill_dir, memory_limit=self.memory_limit, level=self.level + 1)
+        for side in ['parent', 'child']:
+            partition_path = self._get_partition_path(side, partition_index)
+            for data in _read_partition_file(partition_path):
+                if side == 'parent':
+                    hash_join.add_parent_data(data)
+                else:
+                    hash_join.add_child_data(data)
+            if os.path.exists(partition_path):
+                os.remove(partition_path)
+
+        yield from hash_join.get_partitions()
+
+    def _get_partition_path(self, side, partition_index):
+        return os.path.join(self.spill_dir, f'{side}_{partition_index}.pkl')
+
+    def _write_partitions(self, data, join_references, side):
+        if data.empty:
+            return
+
+        # the values of the join references are strings in both sides, so equal values have the same hash, the hash key
+        # (16 characters) depends on the level so that the data of a partition is split when it is partitioned again
+        hash_key = f'morph_kgc_{self.level:06d}'
+        partition_indexes = pd.util.hash_pandas_object(data[join_references], index=False, hash_key=hash_key).values \
+            % self.num_partitions
+        for partition_index in pd.unique(partition_indexes):
+            partition_data = data[partition_indexes == partition_index]
+            if side == 'parent':
+                self.parent_partition_sizes[int(partition_index)] = \
+                    self.parent_partition_sizes.get(int(partition_index), 0) + \
+                    partition_data.memory_usage(index=True, deep=True).sum()
+            with open(self._get_partition_path(side, partition_index), 'ab') as partition_file:
+                pickle.dump(partition_data, partition_file, protocol=pickle.HIGHEST_PROTOCOL)
@@ -6,6 +6,9 @@ __maintainer__ = "Julián Arenas-Guerrero"
 __email__ = "arenas.guerrero.julian@outlook.com"
 
 
+from ..constants import *
+
+
 ##############################################################################
 #######################   RML DATAFRAME COLUMNS   ############################
 ##############################################################################
@@ -31,6 +34,19 @@ FNML_DATAFRAME_COLUMNS = [
 ]
 
 
+##############################################################################
+########################   RML PARSING PROPERTIES   ##########################
+##############################################################################
+
+# properties with the values of the term maps (referencing object maps are identified by rml:parentTriplesMap)
+TERM_MAP_VALUE_PROPERTIES = [RML_CONSTANT, RML_TEMPLATE, RML_REFERENCE, RML_EXECUTION]
+SUBJECT_MAP_VALUE_PROPERTIES = [RML_CONSTANT, RML_TEMPLATE, RML_REFERENCE, RML_QUOTED_TRIPLES_MAP, RML_EXECUTION,
+                                RML_GATHER, RML_GATHER_AS, f'{RML_NAMESPACE}strategy',
+                                f'{RML_NAMESPACE}allowEmptyListAndContainer']
+OBJECT_MAP_VALUE_PROPERTIES = [RML_CONSTANT, RML_TEMPLATE, RML_REFERENCE, RML_QUOTED_TRIPLES_MAP, RML_EXECUTION]
+LOGICAL_SOURCE_PROPERTIES = [RML_SOURCE, RML_TABLE_NAME, RML_QUERY]
+
+
 ##############################################################################
 ########################   RML PARSING QUERIES   #############################
 ##############################################################################
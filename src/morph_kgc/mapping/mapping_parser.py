@@ -6,21 +6,101 @@ __maintainer__ = "Julián Arenas-Guerrero"
 __email__ = "arenas.guerrero.julian@outlook.com"
 
 
+import pickle
+import hashlib
+
+from itertools import product
+
 from .yarrrml import load_yarrrml
 from ..constants import *
+from ..config import READ_PARSED_MAPPINGS_PATH, WRITE_PARSED_MAPPINGS_PATH
 from ..utils import *
 from ..mapping.mapping_constants import *
 from ..mapping.mapping_partitioner import MappingPartitioner
-from ..data_source.relational_db import get_rdb_reference_datatype
+from ..data_source.relational_db import get_rdb_reference_datatype, get_rdb_table_names
+
+
+def _get_mappings_hash(config):
+    """
+    Computes a hash of the contents of the mapping files and the configuration, which identifies the parsed mappings.
+    The paths to read and write the parsed mappings are not considered. Remote mapping files are identified by their
+    URL.
+    """
+
+    mappings_hash = hashlib.sha256()
+
+    for section_name in config.sections():
+        mappings_hash.update(f'[{section_name}]'.encode())
+        for option, value in sorted(config.items(section_name)):
+            if option not in [READ_PARSED_MAPPINGS_PATH, WRITE_PARSED_MAPPINGS_PATH]:
+                mappings_hash.update(f'{option}={value}'.encode())
+
+    for section_name in config.get_data_sources_sections():
+        for mapping_file_path in config.get_mappings_files(section_name):
+            mappings_hash.update(mapping_file_path.encode())
+            if os.path.isfile(mapping_file_path):
+                with open(mapping_file_path, 'rb') as mapping_file:
+                    mappings_hash.update(mapping_file.read())
+
+    return mappings_hash.hexdigest()
+
+
+def _read_parsed_mappings(parsed_mappings_path, mappings_hash):
+    """
+    Reads the parsed mappings from a file written by _write_parsed_mappings. Returns None if the file does not exist or
+    if the mapping files or the configuration changed since it was written.
+    """
+
+    if not os.path.isfile(parsed_mappings_path):
+        return None
+
+    with open(parsed_mappings_path, 'rb') as parsed_mappings_file:
+        parsed_mappings = pickle.load(parsed_mappings_file)
+
+    if parsed_mappings.get('mappings_hash') != mappings_hash:
+        logging.info(f'Parsed mappings in `{parsed_mappings_path}` are outdated, mappings will be processed.')
+        return None
+
+    return parsed_mappings['rml_df'], parsed_mappings['fnml_df']
+
+
+def _write_parsed_mappings(parsed_mappings_path, mappings_hash, rml_df, fnml_df):
+    parsed_mappings = {'mappings_hash': mappings_hash, 'rml_df': rml_df, 'fnml_df': fnml_df}
+
+    # write to a temporary file first so that a failed write does not leave an invalid file
+    with open(f'{parsed_mappings_path}.tmp', 'wb') as parsed_mappings_file:
+        pickle.dump(parsed_mappings, parsed_mappings_file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(f'{parsed_mappings_path}.tmp', parsed_mappings_path)
 
 
 def retrieve_mappings(config):
-    mappings_parser = MappingParser(config)
+    """
+    Retrieves the normalized and partitioned mapping rules. If read_parsed_mappings_path is provided and the parsed
+    mappings in it were obtained from the same mapping files and configuration, they are loaded instead of processing
+    the mappings. If write_parsed_mappings_path is provided, the processed mappings are written to it.
+    """
 
     start_time = time.time()
+
+    if config.is_read_parsed_mappings_file_provided() or config.is_write_parsed_mappings_file_provided():
+        mappings_hash = _get_mappings_hash(config)
+
+    if config.is_read_parsed_mappings_file_provided():
+        parsed_mappings = _read_parsed_mappings(config.get_parsed_mappings_read_path(), mappings_hash)
+        if parsed_mappings is not None:
+            rml_df, fnml_df = parsed_mappings
+            logging.info(f'{len(rml_df)} mapping rules loaded from `{config.get_parsed_mappings_read_path()}` in '
+                         f'{get_delta_time(start_time)} seconds.')
+            return rml_df, fnml_df
+
+    mappings_parser = MappingParser(config)
     rml_df, fnml_df = mappings_parser.parse_mappings()
     logging.info(f'Mappings processed in {get_delta_time(start_time)} seconds.')
 
+    if config.is_write_parsed_mappings_file_provided():
+        _write_parsed_mappings(config.get_parsed_mappings_write_path(), mappings_hash, rml_df, fnml_df)
+        logging.debug(f'Parsed mappings written to `{config.get_parsed_mappings_write_path()}`.')
+
     return rml_df, fnml_df
 
 
@@ -34,11 +114,9 @@ def _r2rml_to_rml(mapping_graph):
     mapping_graph.bind('rml', rdflib.term.URIRef(RML_NAMESPACE))
 
     # add reference formulation and sql version for RDB sources
-    query = f'SELECT ?logical_source ?x WHERE {{ ?logical_source <{R2RML_TABLE_NAME}> ?x . }} '
-    for logical_source, _ in mapping_graph.query(query):
+    for logical_source in set(mapping_graph.subjects(rdflib.term.URIRef(R2RML_TABLE_NAME))):
         mapping_graph.add((logical_source, rdflib.term.URIRef(RML_SQL_VERSION), rdflib.term.URIRef(RML_SQL2008)))
-    query = f'SELECT ?logical_source ?x WHERE {{ ?logical_source <{R2RML_SQL_QUERY}> ?x . }} '
-    for logical_source, _ in mapping_graph.query(query):
+    for logical_source in set(mapping_graph.subjects(rdflib.term.URIRef(R2RML_SQL_QUERY))):
         mapping_graph.add((logical_source, rdflib.term.URIRef(RML_SQL_VERSION), rdflib.term.URIRef(RML_SQL2008)))
         mapping_graph.add((logical_source, rdflib.term.URIRef(RML_REFERENCE_FORMULATION), rdflib.term.URIRef(RML_SQL2008)))
 
@@ -147,7 +225,7 @@ def _expand_constant_shortcut_properties(mapping_graph):
     }
 
     for constant_shortcut, constant_property in constant_shortcuts_dict.items():
-        for s, o in mapping_graph.query(f'SELECT ?s ?o WHERE {{?s <{constant_shortcut}> ?o .}}'):
+        for s, o in list(mapping_graph.subject_objects(rdflib.term.URIRef(constant_shortcut))):
             blanknode = rdflib.BNode()
             mapping_graph.add((s, rdflib.term.URIRef(constant_property), blanknode))
             mapping_graph.add((blanknode, rdflib.term.URIRef(RML_CONSTANT), o))
@@ -162,10 +240,9 @@ def _rdf_class_to_pom(mapping_graph):
     Replace rr:class definitions by predicate object maps.
     """
 
-    query = 'SELECT ?tm ?c WHERE { ' \
-            f'?tm <{RML_SUBJECT_MAP}> ?sm . ' \
-            f'?sm <{RML_CLASS}> ?c . }}'
-    for tm, c in mapping_graph.query(query):
+    tms_classes = [(tm, c) for tm, sm in mapping_graph.subject_objects(rdflib.term.URIRef(RML_SUBJECT_MAP))
+                   for c in mapping_graph.objects(sm, rdflib.term.URIRef(RML_CLASS))]
+    for tm, c in tms_classes:
         blanknode = rdflib.BNode()
         mapping_graph.add((tm, rdflib.term.URIRef(RML_PREDICATE_OBJECT_MAP), blanknode))
         mapping_graph.add((blanknode, rdflib.term.URIRef(RML_PREDICATE_SHORTCUT), rdflib.RDF.type))
@@ -182,18 +259,14 @@ def _subject_graph_maps_to_pom(mapping_graph):
     """
 
     # add the graph maps in the subject maps to every predicate object map of the subject maps
-    query = 'SELECT ?sm ?gm ?pom WHERE { ' \
-            f'?tm <{RML_SUBJECT_MAP}> ?sm . ' \
-            f'?sm <{RML_GRAPH_MAP}> ?gm . ' \
-            f'?tm <{RML_PREDICATE_OBJECT_MAP}> ?pom . }}'
-    for sm, gm, pom in mapping_graph.query(query):
-        mapping_graph.add((pom, rdflib.term.URIRef(RML_GRAPH_MAP), gm))
+    subject_graph_maps = [(tm, sm, gm) for tm, sm in mapping_graph.subject_objects(rdflib.term.URIRef(RML_SUBJECT_MAP))
+                          for gm in mapping_graph.objects(sm, rdflib.term.URIRef(RML_GRAPH_MAP))]
+    for tm, sm, gm in subject_graph_maps:
+        for pom in mapping_graph.objects(tm, rdflib.term.URIRef(RML_PREDICATE_OBJECT_MAP)):
+            mapping_graph.add((pom, rdflib.term.URIRef(RML_GRAPH_MAP), gm))
 
     # remove the graph maps from the subject maps
-    query = 'SELECT ?sm ?gm WHERE { ' \
-            f'?tm <{RML_SUBJECT_MAP}> ?sm . ' \
-            f'?sm <{RML_GRAPH_MAP}> ?gm . }}'
-    for sm, gm in mapping_graph.query(query):
+    for tm, sm, gm in subject_graph_maps:
         mapping_graph.remove((sm, rdflib.term.URIRef(RML_GRAPH_MAP), gm))
 
     return mapping_graph
@@ -204,11 +277,9 @@ def _complete_pom_with_default_graph(mapping_graph):
     Complete predicate object maps without graph maps with rr:defaultGraph.
     """
 
-    query = 'SELECT DISTINCT ?tm ?pom WHERE { ' \
-            f'?tm <{RML_PREDICATE_OBJECT_MAP}> ?pom . ' \
-            f'OPTIONAL {{ ?pom <{RML_GRAPH_MAP}> ?gm . }} . ' \
-            'FILTER ( !bound(?gm) ) }'
-    for tm, pom in mapping_graph.query(query):
+    tms_poms = [(tm, pom) for tm, pom in set(mapping_graph.subject_objects(rdflib.term.URIRef(RML_PREDICATE_OBJECT_MAP)))
+                if (pom, rdflib.term.URIRef(RML_GRAPH_MAP), None) not in mapping_graph]
+    for tm, pom in tms_poms:
         blanknode = rdflib.BNode()
         mapping_graph.add((pom, rdflib.term.URIRef(RML_GRAPH_MAP), blanknode))
         mapping_graph.add((blanknode, rdflib.term.URIRef(RML_CONSTANT), rdflib.term.URIRef(RML_DEFAULT_GRAPH)))
@@ -222,59 +293,51 @@ def _complete_termtypes(mapping_graph):
     (https://www.w3.org/2001/sw/rdb2rdf/r2rml/#termtype).
     """
 
+    termtype = rdflib.term.URIRef(RML_TERM_TYPE)
+
+    def has_termtype(term_map):
+        return (term_map, termtype, None) in mapping_graph
+
     # add missing RDF-star triples termtypes (in the subject and object maps)
-    query = 'SELECT DISTINCT ?term_map ?quoted_triples_map WHERE { ' \
-            f'?term_map <{RML_QUOTED_TRIPLES_MAP}> ?quoted_triples_map . ' \
-            f'OPTIONAL {{ ?term_map <{RML_TERM_TYPE}> ?termtype . }} . ' \
-            'FILTER ( !bound(?termtype) ) }'
-    for term_map, _ in mapping_graph.query(query):
-        mapping_graph.add((term_map, rdflib.term.URIRef(RML_TERM_TYPE), rdflib.term.URIRef(RML_RDF_STAR_TRIPLE)))
+    term_maps = {term_map for term_map in mapping_graph.subjects(rdflib.term.URIRef(RML_QUOTED_TRIPLES_MAP))
+                 if not has_termtype(term_map)}
+    for term_map in term_maps:
+        mapping_graph.add((term_map, termtype, rdflib.term.URIRef(RML_RDF_STAR_TRIPLE)))
 
     # add missing blanknode termtypes in the constant-valued object maps
-    query = 'SELECT DISTINCT ?term_map ?constant WHERE { ' \
-            f'?term_map <{RML_CONSTANT}> ?constant . ' \
-            f'OPTIONAL {{ ?term_map <{RML_TERM_TYPE}> ?termtype . }} . ' \
-            'FILTER ( !bound(?termtype) && isBlank(?constant) ) }'
-    for term_map, _ in mapping_graph.query(query):
-        mapping_graph.add((term_map, rdflib.term.URIRef(RML_TERM_TYPE), rdflib.term.URIRef(RML_BLANK_NODE)))
+    term_maps = {term_map for term_map, constant in mapping_graph.subject_objects(rdflib.term.URIRef(RML_CONSTANT))
+                 if not has_termtype(term_map) and isinstance(constant, rdflib.term.BNode)}
+    for term_map in term_maps:
+        mapping_graph.add((term_map, termtype, rdflib.term.URIRef(RML_BLANK_NODE)))
 
     # add missing literal termtypes in the constant-valued object maps
-    query = 'SELECT DISTINCT ?term_map ?constant WHERE { ' \
-            f'?term_map <{RML_CONSTANT}> ?constant . ' \
-            f'OPTIONAL {{ ?term_map <{RML_TERM_TYPE}> ?termtype . }} . ' \
-            'FILTER ( !bound(?termtype) && isLiteral(?constant) ) }'
-    for term_map, _ in mapping_graph.query(query):
-        mapping_graph.add((term_map, rdflib.term.URIRef(RML_TERM_TYPE), rdflib.term.URIRef(RML_LITERAL)))
+    term_maps = {term_map for term_map, constant in mapping_graph.subject_objects(rdflib.term.URIRef(RML_CONSTANT))
+                 if not has_termtype(term_map) and isinstance(constant, rdflib.term.Literal)}
+    for term_map in term_maps:
+        mapping_graph.add((term_map, termtype, rdflib.term.URIRef(RML_LITERAL)))
 
     # add missing literal termtypes in the object maps
-    query = 'SELECT DISTINCT ?om ?pom WHERE { ' \
-            f'?pom <{RML_OBJECT_MAP}> ?om . ' \
-            f'OPTIONAL {{ ?om <{RML_TERM_TYPE}> ?termtype . }} . ' \
-            f'OPTIONAL {{ ?om <{RML_REFERENCE}> ?reference . }} . ' \
-            f'OPTIONAL {{ ?om <{RML_EXECUTION}> ?execution . }} . ' \
-            f'OPTIONAL {{ ?om <{RML_LANGUAGE_MAP}> ?language . }} . ' \
-            f'OPTIONAL {{ ?om <{RML_DATATYPE_MAP}> ?datatype . }} . ' \
-            'FILTER ( !bound(?termtype) && (' \
-            'bound(?reference) || bound(?execution) || bound(?language) || bound(?datatype) ) ) }'
-    for om, _ in mapping_graph.query(query):
-        mapping_graph.add((om, rdflib.term.URIRef(RML_TERM_TYPE), rdflib.term.URIRef(RML_LITERAL)))
+    term_maps = {om for om in mapping_graph.objects(None, rdflib.term.URIRef(RML_OBJECT_MAP)) if
+                 not has_termtype(om) and any((om, rdflib.term.URIRef(term_map_property), None) in mapping_graph for
+                                              term_map_property in [RML_REFERENCE, RML_EXECUTION, RML_LANGUAGE_MAP,
+                                                                    RML_DATATYPE_MAP])}
+    for om in term_maps:
+        mapping_graph.add((om, termtype, rdflib.term.URIRef(RML_LITERAL)))
 
     # complete referencing object maps with the termtype coming from the subject of the parent
-    query = 'SELECT DISTINCT ?term_map ?termtype WHERE { ' \
-            f'?term_map <{RML_PARENT_TRIPLES_MAP}> ?parent_tm . ' \
-            f'?parent_tm <{RML_SUBJECT_MAP}> ?parent_subject_map . ' \
-            f'?parent_subject_map <{RML_TERM_TYPE}> ?termtype . }}'
-    for term_map, termtype in mapping_graph.query(query):
-        mapping_graph.add((term_map, rdflib.term.URIRef(RML_TERM_TYPE), rdflib.term.URIRef(termtype)))
+    term_maps_termtypes = {(term_map, parent_termtype) for term_map, parent_tm in
+                           mapping_graph.subject_objects(rdflib.term.URIRef(RML_PARENT_TRIPLES_MAP)) for
+                           parent_subject_map in mapping_graph.objects(parent_tm, rdflib.term.URIRef(RML_SUBJECT_MAP))
+                           for parent_termtype in mapping_graph.objects(parent_subject_map, termtype)}
+    for term_map, parent_termtype in term_maps_termtypes:
+        mapping_graph.add((term_map, termtype, parent_termtype))
 
     # now all missing termtypes are IRIs
     for term_map_property in [RML_SUBJECT_MAP, RML_PREDICATE_MAP, RML_OBJECT_MAP, RML_GRAPH_MAP]:
-        query = 'SELECT DISTINCT ?term_map ?x WHERE { ' \
-                f'?x <{term_map_property}> ?term_map . ' \
-                f'OPTIONAL {{ ?term_map <{RML_TERM_TYPE}> ?termtype . }} . ' \
-                'FILTER ( !bound(?termtype) ) }'
-        for term_map, _ in mapping_graph.query(query):
-            mapping_graph.add((term_map, rdflib.term.URIRef(RML_TERM_TYPE), rdflib.term.URIRef(RML_IRI)))
+        term_maps = {term_map for term_map in mapping_graph.objects(None, rdflib.term.URIRef(term_map_property))
+                     if not has_termtype(term_map)}
+        for term_map in term_maps:
+            mapping_graph.add((term_map, termtype, rdflib.term.URIRef(RML_IRI)))
 
     return mapping_graph
 
@@ -286,29 +349,22 @@ def _complete_triples_map_class(mapping_graph):
     triples (but can be used in join conditions in other triples maps).
     """
 
-    query = 'SELECT DISTINCT ?triples_map ?logical_source WHERE { ' \
-            f'?triples_map <{RML_LOGICAL_SOURCE}> ?logical_source . ' \
-            f'OPTIONAL {{ ?triples_map a ?triples_map_class . }} . ' \
-            'FILTER ( !bound(?triples_map_class) ) }'
-    for triples_map, _ in mapping_graph.query(query):
-        mapping_graph.add((triples_map, rdflib.term.URIRef(RDF_TYPE), rdflib.term.URIRef(RML_TRIPLES_MAP_CLASS)))
+    rdf_type = rdflib.term.URIRef(RDF_TYPE)
+    triples_maps = set(mapping_graph.subjects(rdflib.term.URIRef(RML_LOGICAL_SOURCE)))
+
+    for triples_map in triples_maps:
+        if (triples_map, rdf_type, None) not in mapping_graph:
+            mapping_graph.add((triples_map, rdf_type, rdflib.term.URIRef(RML_TRIPLES_MAP_CLASS)))
 
     # rr:TriplesMap without predicate object maps to rml:NonAssertedTriplesMaps
-    query = 'SELECT DISTINCT ?triples_map ?logical_source WHERE { ' \
-            f'?triples_map <{RML_LOGICAL_SOURCE}> ?logical_source . ' \
-            f'OPTIONAL {{ ?triples_map <{RML_PREDICATE_OBJECT_MAP}> ?pom . }} . ' \
-            'FILTER ( !bound(?pom) ) }'
-    for triples_map, _ in mapping_graph.query(query):
-        mapping_graph.add(
-            (triples_map, rdflib.term.URIRef(RDF_TYPE), rdflib.term.URIRef(RML_NON_ASSERTED_TRIPLES_MAP_CLASS)))
+    for triples_map in triples_maps:
+        if (triples_map, rdflib.term.URIRef(RML_PREDICATE_OBJECT_MAP), None) not in mapping_graph:
+            mapping_graph.add((triples_map, rdf_type, rdflib.term.URIRef(RML_NON_ASSERTED_TRIPLES_MAP_CLASS)))
 
     # for rml:NonAssertedTriplesMap remove triples typing them as rr:TriplesMap
-    query = 'SELECT DISTINCT ?triples_map ?logical_source WHERE { ' \
-            f'?triples_map <{RML_LOGICAL_SOURCE}> ?logical_source . ' \
-            f'?triples_map a <{RML_TRIPLES_MAP_CLASS}> . ' \
-            f'?triples_map a <{RML_NON_ASSERTED_TRIPLES_MAP_CLASS}> . }}'
-    for triples_map, _ in mapping_graph.query(query):
-        mapping_graph.remove((triples_map, rdflib.term.URIRef(RDF_TYPE), rdflib.term.URIRef(RML_TRIPLES_MAP_CLASS)))
+    for triples_map in triples_maps:
+        if (triples_map, rdf_type, rdflib.term.URIRef(RML_NON_ASSERTED_TRIPLES_MAP_CLASS)) in mapping_graph:
+            mapping_graph.remove((triples_map, rdf_type, rdflib.term.URIRef(RML_TRIPLES_MAP_CLASS)))
 
     return mapping_graph
 
@@ -323,45 +379,224 @@ def _remove_string_datatypes(mapping_graph):
     return mapping_graph
 
 
-def _get_join_conditions_dict(join_query_results):
+def _get_term_map_values(mapping_graph, term_map, value_properties):
+    """
+    Retrieves the pairs (property, value) of a term map for the properties in value_properties, e.g. (rml:template,
+    "http://example.com/{ID}").
+    """
+
+    return [(term_map_property, value) for term_map_property, value in mapping_graph.predicate_objects(term_map)
+            if str(term_map_property) in value_properties]
+
+
+def _get_objects(mapping_graph, node, node_property):
+    # None if the property is not present (as an unbound variable in an OPTIONAL graph pattern)
+    return list(mapping_graph.objects(node, rdflib.term.URIRef(node_property))) or [None]
+
+
+def _get_object_map_rules(mapping_graph, predicate_object_map):
+    """
+    Walks the object maps of a predicate object map, building the object map columns of its mapping rules.
+    """
+
+    object_map_rules = []
+
+    for object_map in mapping_graph.objects(predicate_object_map, rdflib.term.URIRef(RML_OBJECT_MAP)):
+        object_map_values = _get_term_map_values(mapping_graph, object_map, OBJECT_MAP_VALUE_PROPERTIES)
+        # language and datatype maps, xsd:string is equivalent to not specifying any data type
+        lang_datatype_map_values = [
+            (lang_datatype, lang_datatype_map_type, lang_datatype_map_value) for lang_datatype, lang_datatype_map in
+            mapping_graph.predicate_objects(object_map) for lang_datatype_map_type, lang_datatype_map_value in
+            _get_term_map_values(mapping_graph, lang_datatype_map, TERM_MAP_VALUE_PROPERTIES)
+            if str(lang_datatype_map_value) != XSD_STRING]
+
+        for (object_map_type, object_map_value), object_termtype, (lang_datatype, lang_datatype_map_type,
+                                                                   lang_datatype_map_value) in product(
+                object_map_values or [(None, None)], _get_objects(mapping_graph, object_map, RML_TERM_TYPE),
+                lang_datatype_map_values or [(None, None, None)]):
+            object_map_rule = {'object_map_type': object_map_type, 'object_map_value': object_map_value,
+                               'object_map': object_map, 'object_termtype': object_termtype,
+                               'lang_datatype': lang_datatype, 'lang_datatype_map_type': lang_datatype_map_type,
+                               'lang_datatype_map_value': lang_datatype_map_value}
+
+            parent_triples_maps = list(
+                mapping_graph.objects(object_map, rdflib.term.URIRef(RML_PARENT_TRIPLES_MAP))) \
+                if object_map_value is None else []
+            for parent_triples_map in parent_triples_maps:
+                # referencing object map
+                object_map_rules.append(
+                    object_map_rule | {'object_map_type': rdflib.term.URIRef(RML_PARENT_TRIPLES_MAP),
+                                       'object_map_value': parent_triples_map})
+            if not parent_triples_maps:
+                object_map_rules.append(object_map_rule)
+
+    return object_map_rules or [{}]
+
+
+def _get_predicate_object_map_rules(mapping_graph, triples_map):
+    """
+    Walks the predicate object maps of a triples map, building the predicate, object and graph map columns of its
+    mapping rules.
+    """
+
+    predicate_object_map_rules = []
+
+    for predicate_object_map in mapping_graph.objects(triples_map, rdflib.term.URIRef(RML_PREDICATE_OBJECT_MAP)):
+        predicate_map_values = [
+            predicate_map_value for predicate_map in
+            mapping_graph.objects(predicate_object_map, rdflib.term.URIRef(RML_PREDICATE_MAP)) for
+            predicate_map_value in _get_term_map_values(mapping_graph, predicate_map, TERM_MAP_VALUE_PROPERTIES)]
+        graph_map_values = [
+            graph_map_value for graph_map in
+            mapping_graph.objects(predicate_object_map, rdflib.term.URIRef(RML_GRAPH_MAP)) for
+            graph_map_value in _get_term_map_values(mapping_graph, graph_map, TERM_MAP_VALUE_PROPERTIES)]
+
+        for (predicate_map_type, predicate_map_value), object_map_rule, (graph_map_type, graph_map_value) in product(
+                predicate_map_values, _get_object_map_rules(mapping_graph, predicate_object_map),
+                graph_map_values or [(None, None)]):
+            predicate_object_map_rules.append(
+                {'predicate_map_type': predicate_map_type, 'predicate_map_value': predicate_map_value} |
+                object_map_rule | {'graph_map_type': graph_map_type, 'graph_map_value': graph_map_value})
+
+    return predicate_object_map_rules or [{}]
+
+
+def _get_logical_source_values(mapping_graph, logical_source):
+    logical_source_values = []
+
+    for logical_source_type, logical_source_value in _get_term_map_values(mapping_graph, logical_source,
+                                                                          LOGICAL_SOURCE_PROPERTIES):
+        in_memory_names = list(mapping_graph.objects(logical_source_value, rdflib.term.URIRef(SD_NAME)))
+        if in_memory_names:
+            # in-memory data structures are identified by their name between braces
+            logical_source_values.extend((logical_source_type, rdflib.term.Literal(f'{{{in_memory_name}}}'))
+                                         for in_memory_name in in_memory_names)
+        else:
+            logical_source_values.append((logical_source_type, logical_source_value))
+
+    return logical_source_values or [(None, None)]
+
+
+def _get_rml_rules(mapping_graph):
+    """
+    Builds the mapping rules walking the triples maps in the normalized mapping graph with subject and predicate
+    lookups. It produces the same mapping rules as RML_PARSING_QUERY (one per combination of the values of the term
+    maps), for mappings without gather maps.
+    """
+
+    rml_rules = {}
+
+    for triples_map, logical_source in mapping_graph.subject_objects(rdflib.term.URIRef(RML_LOGICAL_SOURCE)):
+        triples_map_types = list(mapping_graph.objects(triples_map, rdflib.term.URIRef(RDF_TYPE)))
+        subject_map_values = [
+            (subject_map, subject_map_type, subject_map_value) for subject_map in
+            mapping_graph.objects(triples_map, rdflib.term.URIRef(RML_SUBJECT_MAP)) for
+            subject_map_type, subject_map_value in
+            _get_term_map_values(mapping_graph, subject_map, SUBJECT_MAP_VALUE_PROPERTIES)]
+        if not triples_map_types or not subject_map_values:
+            continue
+
+        predicate_object_map_rules = _get_predicate_object_map_rules(mapping_graph, triples_map)
+
+        for triples_map_type, (logical_source_type, logical_source_value), iterator, reference_formulation, \
+                (subject_map, subject_map_type, subject_map_value), predicate_object_map_rule in product(
+                    triples_map_types, _get_logical_source_values(mapping_graph, logical_source),
+                    _get_objects(mapping_graph, logical_source, RML_ITERATOR),
+                    _get_objects(mapping_graph, logical_source, RML_REFERENCE_FORMULATION),
+                    subject_map_values, predicate_object_map_rules):
+            for subject_termtype in _get_objects(mapping_graph, subject_map, RML_TERM_TYPE):
+                rml_rule = {'triples_map_id': triples_map, 'triples_map_type': triples_map_type,
+                            'logical_source_type': logical_source_type, 'logical_source_value': logical_source_value,
+                            'iterator': iterator, 'reference_formulation': reference_formulation,
+                            'subject_map_type': subject_map_type, 'subject_map_value': subject_map_value,
+                            'subject_map': subject_map, 'subject_termtype': subject_termtype} | \
+                           predicate_object_map_rule | {'gather_references': rdflib.term.Literal('')}
+                # unbound values are not included, as in the bindings of the query results
+                rml_rule = {column: value for column, value in rml_rule.items() if value is not None}
+                # remove duplicated mapping rules (SELECT DISTINCT)
+                rml_rules[tuple(rml_rule.items())] = rml_rule
+
+    return list(rml_rules.values())
+
+
+def _get_join_conditions(mapping_graph):
+    """
+    Retrieves the join conditions in the mapping graph as tuples (term map, join condition, child value, parent
+    value).
     """
-    Creates a dictionary with the results of the JOIN_CONDITION_PARSING_QUERY. The keys are the identifiers of the
+
+    return {(term_map, join_condition, child_value, parent_value) for term_map, join_condition in
+            mapping_graph.subject_objects(rdflib.term.URIRef(RML_JOIN_CONDITION)) for child_value in
+            mapping_graph.objects(join_condition, rdflib.term.URIRef(RML_CHILD)) for parent_value in
+            mapping_graph.objects(join_condition, rdflib.term.URIRef(RML_PARENT))}
+
+
+def _get_join_conditions_dict(join_conditions):
+    """
+    Creates a dictionary with the join conditions in the mapping graph. The keys are the identifiers of the
     child triples maps of the join condition. The values of the dictionary are in turn other dictionaries with two
     items, child_value and parent_value, representing a join condition.
     """
 
     join_conditions_dict = {}
 
-    for join_condition in join_query_results:
+    for term_map, join_condition, child_value, parent_value in join_conditions:
         # add the child triples map identifier if it is not in the dictionary
-        if join_condition.term_map not in join_conditions_dict:
-            join_conditions_dict[join_condition.term_map] = {}
+        if term_map not in join_conditions_dict:
+            join_conditions_dict[term_map] = {}
 
         # add the new join condition (note that several join conditions can apply in a join)
-        join_conditions_dict[join_condition.term_map][str(join_condition.join_condition)] = \
-            {'child_value': str(join_condition.child_value), 'parent_value': str(join_condition.parent_value)}
+        join_conditions_dict[term_map][str(join_condition)] = \
+            {'child_value': str(child_value), 'parent_value': str(parent_value)}
 
     return join_conditions_dict
 
 
-def _transform_mappings_into_dataframe(mapping_graph, section_name):
+def _get_fnml_rules(mapping_graph):
     """
-    Builds a Pandas DataFrame from the results obtained from MAPPING_PARSING_QUERY and
-    JOIN_CONDITION_PARSING_QUERY for one source.
+    Builds the function executions walking the mapping graph, as FNML_PARSING_QUERY.
     """
 
-    # parse the mappings with the parsing queries
-    rml_query_results = mapping_graph.query(RML_PARSING_QUERY)
-    join_query_results = mapping_graph.query(RML_JOIN_CONDITION_PARSING_QUERY)
-    fnml_query_results = mapping_graph.query(FNML_PARSING_QUERY)
+    fnml_rules = {}
+
+    for function_execution, function_map in mapping_graph.subject_objects(rdflib.term.URIRef(RML_FUNCTION_MAP)):
+        for function_map_value in mapping_graph.objects(function_map, rdflib.term.URIRef(RML_CONSTANT)):
+            # a function can have 0 arguments (e.g., uuid())
+            input_values = [
+                (parameter_map_value, value_map_type, value_map_value) for function_input in
+                mapping_graph.objects(function_execution, rdflib.term.URIRef(RML_INPUT)) for parameter_map in
+                mapping_graph.objects(function_input, rdflib.term.URIRef(RML_PARAMETER_MAP)) for parameter_map_value
+                in mapping_graph.objects(parameter_map, rdflib.term.URIRef(RML_CONSTANT)) for value_map in
+                mapping_graph.objects(function_input, rdflib.term.URIRef(RML_VALUE_MAP)) for
+                value_map_type, value_map_value in
+                _get_term_map_values(mapping_graph, value_map, TERM_MAP_VALUE_PROPERTIES)]
+
+            for parameter_map_value, value_map_type, value_map_value in input_values or [(None, None, None)]:
+                fnml_rule = {'function_execution': function_execution, 'function_map_value': function_map_value,
+                             'parameter_map_value': parameter_map_value, 'value_map_type': value_map_type,
+                             'value_map_value': value_map_value}
+                fnml_rule = {column: value for column, value in fnml_rule.items() if value is not None}
+                fnml_rules[tuple(fnml_rule.items())] = fnml_rule
+
+    return list(fnml_rules.values())
+
+
+def _transform_mappings_into_dataframe(mapping_graph, section_name):
+    """
+    Builds a Pandas DataFrame with the mapping rules and the function executions walking the mapping graph for one
+    source. Mappings with gather maps are parsed with RML_PARSING_QUERY.
+    """
 
     # RML in graph to DataFrame
-    rml_df = pd.DataFrame(rml_query_results.bindings)
-    rml_df.columns = rml_df.columns.map(str)
+    if (None, rdflib.term.URIRef(RML_GATHER), None) in mapping_graph:
+        rml_df = pd.DataFrame(mapping_graph.query(RML_PARSING_QUERY).bindings)
+        rml_df.columns = rml_df.columns.map(str)
+    else:
+        rml_df = pd.DataFrame(_get_rml_rules(mapping_graph))
 
     # process mapping rules with joins
     # create a dict with child triples maps in the keys and its join conditions in the values
-    join_conditions_dict = _get_join_conditions_dict(join_query_results)
+    join_conditions_dict = _get_join_conditions_dict(_get_join_conditions(mapping_graph))
     # map the dict with the join conditions to the mapping rules in the DataFrame
     rml_df['object_join_conditions'] = rml_df['object_map'].map(join_conditions_dict)
     rml_df['subject_join_conditions'] = rml_df['subject_map'].map(join_conditions_dict)
@@ -376,10 +611,7 @@ def _transform_mappings_into_dataframe(mapping_graph, section_name):
 
 
     # convert all values to string
-    for i, row in rml_df.iterrows():
-        for col in rml_df.columns:
-            if pd.notna(row[col]):
-                rml_df.at[i, col] = str(row[col])
+    rml_df = rml_df.map(lambda value: str(value) if pd.notna(value) else value)
 
     # link the mapping rules to their data source name
     rml_df['source_name'] = section_name
@@ -388,8 +620,7 @@ def _transform_mappings_into_dataframe(mapping_graph, section_name):
     rml_df = rml_df.drop(columns=['subject_map', 'object_map'])
 
     # FNML in graph to DataFrame
-    fnml_df = pd.DataFrame(fnml_query_results.bindings)
-    fnml_df.columns = fnml_df.columns.map(str)
+    fnml_df = pd.DataFrame(_get_fnml_rules(mapping_graph))
     fnml_df = fnml_df.map(str)
     return rml_df, fnml_df
 
@@ -416,6 +647,22 @@ def _get_undelimited_identifier(identifier):
     return identifier
 
 
+def _get_undelimited_join_conditions(join_conditions):
+    """
+    Removes delimiters from the references in the join conditions (as a string) of a mapping rule.
+    """
+
+    join_conditions = eval(join_conditions)
+    if not join_conditions:
+        return str(join_conditions)
+
+    for key, value in join_conditions.items():
+        join_conditions[key]['child_value'] = _get_undelimited_identifier(join_conditions[key]['child_value'])
+        join_conditions[key]['parent_value'] = _get_undelimited_identifier(join_conditions[key]['parent_value'])
+
+    return str(join_conditions)
+
+
 def _get_valid_template_identifiers(template):
     """
     Removes delimiters from delimited identifiers in a template.
@@ -424,35 +671,28 @@ def _get_valid_template_identifiers(template):
     return template.replace('{"', '{').replace('"}', '}')
 
 
+def _get_termtypes(mapping_graph, term_map_property):
+    return {str(termtype) for term_map in mapping_graph.objects(None, rdflib.term.URIRef(term_map_property)) for
+            termtype in mapping_graph.objects(term_map, rdflib.term.URIRef(RML_TERM_TYPE))}
+
+
 def _validate_termtypes(mapping_graph):
-    query = 'SELECT DISTINCT ?termtype ?pm WHERE { ' \
-            f'?pom <{RML_PREDICATE_MAP}> ?pm . ' \
-            f'?pm <{RML_TERM_TYPE}> ?termtype . }}'
-    predicate_termtypes = set([str(termtype) for termtype, _ in mapping_graph.query(query)])
+    predicate_termtypes = _get_termtypes(mapping_graph, RML_PREDICATE_MAP)
     if not (predicate_termtypes <= {RML_IRI}):
         raise ValueError(f'Found an invalid predicate termtype. Found values {predicate_termtypes}. '
                          f'Predicate maps must be {RML_IRI}.')
 
-    query = 'SELECT DISTINCT ?termtype ?gm WHERE { ' \
-            f'?pom <{RML_GRAPH_MAP}> ?gm . ' \
-            f'?gm <{RML_TERM_TYPE}> ?termtype . }}'
-    graph_termtypes = set([str(termtype) for termtype, _ in mapping_graph.query(query)])
+    graph_termtypes = _get_termtypes(mapping_graph, RML_GRAPH_MAP)
     if not (graph_termtypes <= {RML_IRI}):
         raise ValueError(f'Found an invalid graph termtype. Found values {graph_termtypes}. '
                          f'Graph maps must be {RML_IRI}.')
 
-    query = 'SELECT DISTINCT ?termtype ?sm WHERE { ' \
-            f'?tm <{RML_SUBJECT_MAP}> ?sm . ' \
-            f'?sm <{RML_TERM_TYPE}> ?termtype . }}'
-    subject_termtypes = set([str(termtype) for termtype, _ in mapping_graph.query(query)])
+    subject_termtypes = _get_termtypes(mapping_graph, RML_SUBJECT_MAP)
     if not (subject_termtypes <= {RML_IRI, RML_BLANK_NODE, RML_RDF_STAR_TRIPLE, RML_GATHER_MAP_CLASS}):
         raise ValueError(f'Found an invalid subject termtype. Found values {subject_termtypes}. '
                          f'Subject maps must be {RML_IRI}, {RML_BLANK_NODE}, {RML_GATHER_MAP_CLASS} or {RML_RDF_STAR_TRIPLE}.')
 
-    query = 'SELECT DISTINCT ?termtype ?om WHERE { ' \
-            f'?pom <{RML_OBJECT_MAP}> ?om . ' \
-            f'?om <{RML_TERM_TYPE}> ?termtype . }}'
-    object_termtypes = set([str(termtype) for termtype, _ in mapping_graph.query(query)])
+    object_termtypes = _get_termtypes(mapping_graph, RML_OBJECT_MAP)
     if not (object_termtypes <= {RML_IRI, RML_BLANK_NODE, RML_LITERAL, RML_RDF_STAR_TRIPLE, RML_GATHER_MAP_CLASS}):
         raise ValueError(f'Found an invalid object termtype. Found values {object_termtypes}. Object maps must be '
                          f'{RML_IRI}, {RML_BLANK_NODE}, {RML_LITERAL}, {RML_GATHER_MAP_CLASS} or {RML_RDF_STAR_TRIPLE}.')
@@ -585,38 +825,41 @@ class MappingParser:
         For data files the source type is inferred from the file extension.
         """
 
-        for i, rml_rule in self.rml_df.iterrows():
-            if pd.notna(rml_rule['reference_formulation']) and 'SQL' in rml_rule['reference_formulation'].upper():
-                self.rml_df.at[i, 'source_type'] = RDB
-            elif pd.notna(rml_rule['reference_formulation']) and 'CYPHER' in rml_rule['reference_formulation'].upper():
-                self.rml_df.at[i, 'source_type'] = PGDB
-            elif self.config.has_db_url(rml_rule['source_name']):
-                # if db_url but no reference formulation, assume it is a relational database
-                self.rml_df.at[i, 'source_type'] = RDB
-            elif rml_rule['logical_source_type'] == RML_QUERY:
-                # it is a query, but it is not a DB (because no db_url), hence it is a tabular view
-                # assign CSV (it can also be Apache Parquet but format is automatically inferred)
-                self.rml_df.at[i, 'source_type'] = CSV
-            elif rml_rule['logical_source_type'] == RML_SOURCE \
-                    and self.rml_df.at[i, 'logical_source_value'].startswith('{') \
-                    and self.rml_df.at[i, 'logical_source_value'].endswith('}'):
-                # it is an in-memory data structure
-                self.rml_df.at[i, 'source_type'] = PYTHON_SOURCE
-            elif rml_rule['logical_source_type'] == RML_SOURCE:
-                # it is a file, infer source type from file extension
-                file_extension = os.path.splitext(str(rml_rule['logical_source_value']))[1][1:].strip()
-                if file_extension.upper() in FILE_SOURCE_TYPES:
-                    self.rml_df.at[i, 'source_type'] = file_extension.upper()
-                elif pd.notna(rml_rule['reference_formulation']):
-                    # if file extension is not recognized, use reference formulation
-                    self.rml_df.at[i, 'source_type'] = rml_rule['reference_formulation'].replace(RML_NAMESPACE, '').upper()
-                else:
-                    raise Exception('No source type could be retrieved for some mapping rules.')
-            else:
-                raise Exception('No source type could be retrieved for some mapping rules.')
+        self.rml_df['source_type'] = [
+            self._get_source_type(rml_rule) for rml_rule in
+            self.rml_df[['source_name', 'reference_formulation', 'logical_source_type',
+                         'logical_source_value']].to_dict('records')]
 
         self.rml_df.drop(columns='reference_formulation', inplace=True)
 
+    def _get_source_type(self, rml_rule):
+        if pd.notna(rml_rule['reference_formulation']) and 'SQL' in rml_rule['reference_formulation'].upper():
+            return RDB
+        elif pd.notna(rml_rule['reference_formulation']) and 'CYPHER' in rml_rule['reference_formulation'].upper():
+            return PGDB
+        elif self.config.has_db_url(rml_rule['source_name']):
+            # if db_url but no reference formulation, assume it is a relational database
+            return RDB
+        elif rml_rule['logical_source_type'] == RML_QUERY:
+            # it is a query, but it is not a DB (because no db_url), hence it is a tabular view
+            # assign CSV (it can also be Apache Parquet but format is automatically inferred)
+            return CSV
+        elif rml_rule['logical_source_type'] == RML_SOURCE \
+                and rml_rule['logical_source_value'].startswith('{') \
+                and rml_rule['logical_source_value'].endswith('}'):
+            # it is an in-memory data structure
+            return PYTHON_SOURCE
+        elif rml_rule['logical_source_type'] == RML_SOURCE:
+            # it is a file, infer source type from file extension
+            file_extension = os.path.splitext(str(rml_rule['logical_source_value']))[1][1:].strip()
+            if file_extension.upper() in FILE_SOURCE_TYPES:
+                return file_extension.upper()
+            elif pd.notna(rml_rule['reference_formulation']):
+                # if file extension is not recognized, use reference formulation
+                return rml_rule['reference_formulation'].replace(RML_NAMESPACE, '').upper()
+
+        raise Exception('No source type could be retrieved for some mapping rules.')
+
     def _complete_rml_source_with_config_file_paths(self):
         """
         Overrides rml:source in the mappings with the file_path parameter in the config file for each data source
@@ -635,49 +878,24 @@ class MappingParser:
         Removes delimiters from all identifiers in the mapping rules in the input DataFrame.
         """
 
-        for i, rml_rule in self.rml_df.iterrows():
-            if self.rml_df.at[i, 'logical_source_type'] == RML_TABLE_NAME:
-                self.rml_df.at[i, 'logical_source_value'] = _get_undelimited_identifier(
-                    rml_rule['logical_source_value'])
-
-            if self.rml_df.at[i, 'subject_map_type'] == RML_TEMPLATE:
-                self.rml_df.at[i, 'subject_map_value'] = _get_valid_template_identifiers(
-                    rml_rule['subject_map_value'])
-            elif self.rml_df.at[i, 'subject_map_type'] == RML_REFERENCE:
-                self.rml_df.at[i, 'subject_map_value'] = _get_undelimited_identifier(
-                    rml_rule['subject_map_value'])
-
-            if self.rml_df.at[i, 'predicate_map_type'] == RML_TEMPLATE:
-                self.rml_df.at[i, 'predicate_map_value'] = _get_valid_template_identifiers(
-                    rml_rule['predicate_map_value'])
-            elif self.rml_df.at[i, 'predicate_map_type'] == RML_REFERENCE:
-                self.rml_df.at[i, 'predicate_map_value'] = _get_undelimited_identifier(
-                    rml_rule['predicate_map_value'])
-
-            if self.rml_df.at[i, 'object_map_type'] == RML_TEMPLATE:
-                self.rml_df.at[i, 'object_map_value'] = _get_valid_template_identifiers(
-                    rml_rule['object_map_value'])
-            elif self.rml_df.at[i, 'object_map_type'] == RML_REFERENCE:
-                self.rml_df.at[i, 'object_map_value'] = _get_undelimited_identifier(
-                    rml_rule['object_map_value'])
-
-            if self.rml_df.at[i, 'graph_map_type'] == RML_TEMPLATE:
-                self.rml_df.at[i, 'graph_map_value'] = _get_valid_template_identifiers(
-                    rml_rule['graph_map_value'])
-            elif self.rml_df.at[i, 'graph_map_type'] == RML_REFERENCE:
-                self.rml_df.at[i, 'graph_map_value'] = _get_undelimited_identifier(
-                    rml_rule['graph_map_value'])
-
-            # if join_condition is not null and it is not empty
-            for join_conditions_pos in ['subject_join_conditions', 'object_join_conditions']:
-                if pd.notna(rml_rule[join_conditions_pos]) and rml_rule[join_conditions_pos]:
-                    join_conditions = eval(rml_rule[join_conditions_pos])
-                    for key, value in join_conditions.items():
-                        join_conditions[key]['child_value'] = _get_undelimited_identifier(
-                            join_conditions[key]['child_value'])
-                        join_conditions[key]['parent_value'] = _get_undelimited_identifier(
-                            join_conditions[key]['parent_value'])
-                        self.rml_df.at[i, join_conditions_pos] = str(join_conditions)
+        table_names = self.rml_df['logical_source_type'] == RML_TABLE_NAME
+        self.rml_df.loc[table_names, 'logical_source_value'] = \
+            self.rml_df.loc[table_names, 'logical_source_value'].map(_get_undelimited_identifier)
+
+        for position in ['subject', 'predicate', 'object', 'graph']:
+            templates = self.rml_df[f'{position}_map_type'] == RML_TEMPLATE
+            self.rml_df.loc[templates, f'{position}_map_value'] = \
+                self.rml_df.loc[templates, f'{position}_map_value'].map(_get_valid_template_identifiers)
+            references = self.rml_df[f'{position}_map_type'] == RML_REFERENCE
+            self.rml_df.loc[references, f'{position}_map_value'] = \
+                self.rml_df.loc[references, f'{position}_map_value'].map(_get_undelimited_identifier)
+
+        # if join_condition is not null and it is not empty
+        for join_conditions_pos in ['subject_join_conditions', 'object_join_conditions']:
+            join_conditions = pd.notna(self.rml_df[join_conditions_pos]) & \
+                              (self.rml_df[join_conditions_pos].astype(str) != '')
+            self.rml_df.loc[join_conditions, join_conditions_pos] = \
+                self.rml_df.loc[join_conditions, join_conditions_pos].map(_get_undelimited_join_conditions)
 
     def _infer_datatypes(self):
         """
@@ -690,35 +908,39 @@ class MappingParser:
         if not self.config.infer_sql_datatypes():
             return
 
-        for i, rml_rule in self.rml_df.iterrows():
-            # datatype inference only applies to relational data sources
-            if (rml_rule['source_type'] == RDB) and (
-                    # datatype inference only applies to literals
-                    str(rml_rule['object_termtype']) == RML_LITERAL) and (
-                    # if the literal has a language tag or an overridden datatype, datatype inference does not apply
-                    pd.isna(rml_rule['lang_datatype'])):
-
-                if rml_rule['object_map_type'] == RML_REFERENCE:
-                    inferred_data_type = get_rdb_reference_datatype(self.config, rml_rule,
-                                                                    rml_rule['object_map_value'])
-
-                    if not inferred_data_type:
-                        # no data type was inferred
-                        continue
-
-                    self.rml_df.at[i, 'lang_datatype'] = RML_DATATYPE_MAP
-                    self.rml_df.at[i, 'lang_datatype_map_type'] = RML_CONSTANT
-                    self.rml_df.at[i, 'lang_datatype_map_value'] = inferred_data_type
-                    if self.rml_df.at[i, 'logical_source_type'] == RML_TABLE_NAME:
-                        logging.debug(f"`{inferred_data_type}` datatype inferred for column "
-                                      f"`{rml_rule['object_map_value']}` of table "
-                                      f"`{rml_rule['logical_source_value']}` "
-                                      f"in data source `{rml_rule['source_name']}`.")
-                    elif self.rml_df.at[i, 'logical_source_type'] == RML_QUERY:
-                        logging.debug(f"`{inferred_data_type}` datatype inferred for reference "
-                                      f"`{rml_rule['object_map_value']}` in query "
-                                      f"[{rml_rule['logical_source_value']}] "
-                                      f"in data source `{rml_rule['source_name']}`.")
+        # datatype inference only applies to relational data sources
+        inferable_rules = (self.rml_df['source_type'] == RDB) & (
+                # datatype inference only applies to literals
+                self.rml_df['object_termtype'].astype(str) == RML_LITERAL) & (
+                # if the literal has a language tag or an overridden datatype, datatype inference does not apply
+                pd.isna(self.rml_df['lang_datatype'])) & (self.rml_df['object_map_type'] == RML_REFERENCE)
+
+        # the schema catalog of each data source is retrieved for the tables read by its inferable rules
+        source_table_names = {}
+        for i, rml_rule in self.rml_df[inferable_rules].iterrows():
+            source_table_names.setdefault(rml_rule['source_name'], set()).update(get_rdb_table_names(rml_rule))
+
+        for i, rml_rule in self.rml_df[inferable_rules].iterrows():
+            inferred_data_type = get_rdb_reference_datatype(self.config, rml_rule, rml_rule['object_map_value'],
+                                                            source_table_names[rml_rule['source_name']])
+
+            if not inferred_data_type:
+                # no data type was inferred
+                continue
+
+            self.rml_df.at[i, 'lang_datatype'] = RML_DATATYPE_MAP
+            self.rml_df.at[i, 'lang_datatype_map_type'] = RML_CONSTANT
+            self.rml_df.at[i, 'lang_datatype_map_value'] = inferred_data_type
+            if rml_rule['logical_source_type'] == RML_TABLE_NAME:
+                logging.debug(f"`{inferred_data_type}` datatype inferred for column "
+                              f"`{rml_rule['object_map_value']}` of table "
+                              f"`{rml_rule['logical_source_value']}` "
+                              f"in data source `{rml_rule['source_name']}`.")
+            elif rml_rule['logical_source_type'] == RML_QUERY:
+                logging.debug(f"`{inferred_data_type}` datatype inferred for reference "
+                              f"`{rml_rule['object_map_value']}` in query "
+                              f"[{rml_rule['logical_source_value']}] "
+                              f"in data source `{rml_rule['source_name']}`.")
 
     def validate_mappings(self):
         """
@@ -786,10 +1008,11 @@ class MappingParser:
         # for quoted maps and ref object maps, add a new rule for each normalized rule they are referencing
         for position in ['subject', 'object']:
             quoted_tm_df = self.rml_df.loc[self.rml_df[f'{position}_map_type'] == RML_QUOTED_TRIPLES_MAP]
-            for i, rml_rule in quoted_tm_df.iterrows():
-                for tm_id in tm_to_id_list_dict[rml_rule[f'{position}_map_value']]:
-                    rml_rule[f'{position}_map_value'] = tm_id
-                    self.rml_df = pd.concat([self.rml_df, rml_rule.to_frame().T], ignore_index=True)
+            quoted_rules = [rml_rule | {f'{position}_map_value': tm_id} for rml_rule in quoted_tm_df.to_dict('records')
+                            for tm_id in tm_to_id_list_dict[rml_rule[f'{position}_map_value']]]
+            if quoted_rules:
+                self.rml_df = pd.concat([self.rml_df, pd.DataFrame(quoted_rules, columns=self.rml_df.columns)],
+                                        ignore_index=True)
 
         # replace the old references with to triples maps with the new ids of the tiples maps
         # this generates duplicates with the newly added rules, remove the duplicates
@@ -805,27 +1028,30 @@ class MappingParser:
 
     # TODO: deprecate
     def _remove_self_joins_no_condition(self):
-        for i, rml_rule in self.rml_df.iterrows():
-            if rml_rule['object_map_type'] == RML_PARENT_TRIPLES_MAP:
-                parent_triples_map_rule = get_rml_rule(self.rml_df, rml_rule['object_map_value'])
-                if rml_rule['logical_source_value'] == parent_triples_map_rule['logical_source_value'] and str(
-                        # str() is to be able to compare None
-                        rml_rule['iterator']) == str(parent_triples_map_rule['iterator']):
-
+        # the first mapping rule of each triples map, as in get_rml_rule
+        triples_map_rules = self.rml_df.drop_duplicates(subset='triples_map_id').set_index('triples_map_id', drop=False)
+
+        referencing_rules = self.rml_df[self.rml_df['object_map_type'] == RML_PARENT_TRIPLES_MAP]
+        for i, rml_rule in referencing_rules.iterrows():
+            parent_triples_map_rule = triples_map_rules.loc[rml_rule['object_map_value']]
+            if rml_rule['logical_source_value'] == parent_triples_map_rule['logical_source_value'] and str(
+                    # str() is to be able to compare None
+                    rml_rule['iterator']) == str(parent_triples_map_rule['iterator']):
+
+                remove_join = True
+                # check that all conditions in the join condition have the same references
+                try:
+                    join_conditions = eval(rml_rule['object_join_conditions'])
+                    for key, join_condition in join_conditions.items():
+                        if join_condition['child_value'] != join_condition['parent_value']:
+                            remove_join = False
+                except:
+                    # eval() has failed because there are no join conditions, the join can be removed
                     remove_join = True
-                    # check that all conditions in the join condition have the same references
-                    try:
-                        join_conditions = eval(rml_rule['object_join_conditions'])
-                        for key, join_condition in join_conditions.items():
-                            if join_condition['child_value'] != join_condition['parent_value']:
-                                remove_join = False
-                    except:
-                        # eval() has failed because there are no join conditions, the join can be removed
-                        remove_join = True
-
-                    if remove_join and pd.notna(rml_rule['object_join_conditions']):
-                        self.rml_df.at[i, 'object_map_type'] = parent_triples_map_rule.at['subject_map_type']
-                        self.rml_df.at[i, 'object_map_value'] = parent_triples_map_rule.at['subject_map_value']
-                        self.rml_df.at[i, 'object_termtype'] = parent_triples_map_rule.at['subject_termtype']
-                        self.rml_df.at[i, 'object_join_conditions'] = None
-                        logging.debug(f"Removed self-join from mapping rule `{rml_rule['triples_map_id']}`.")
+
+                if remove_join and pd.notna(rml_rule['object_join_conditions']):
+                    self.rml_df.at[i, 'object_map_type'] = parent_triples_map_rule.at['subject_map_type']
+                    self.rml_df.at[i, 'object_map_value'] = parent_triples_map_rule.at['subject_map_value']
+                    self.rml_df.at[i, 'object_termtype'] = parent_triples_map_rule.at['subject_termtype']
+                    self.rml_df.at[i, 'object_join_conditions'] = None
+                    logging.debug(f"Removed self-join from mapping rule `{rml_rule['triples_map_id']}`.")
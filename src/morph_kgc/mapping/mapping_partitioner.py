@@ -7,12 +7,12 @@ __email__ = "arenas.guerrero.julian@outlook.com"
 
 
 import logging
-import multiprocessing as mp
-
-from itertools import permutations
 
 from ..constants import *
-from ..utils import get_rml_rule
+
+
+# key of the trie nodes that store the group of an invariant, characters of the invariants are never empty
+TRIE_GROUP_KEY = ''
 
 
 def get_invariant_of_template(template):
@@ -33,112 +33,111 @@ def get_invariant_of_template(template):
     return invariant_of_template
 
 
-def _generate_maximal_partition_for_a_position_ordering(rml_df, position_ordering):
+def _get_invariant_groups(partitions, invariants, exact_match=False):
     """
-    Generates a maximal mapping partition for a position ordering.
+    Assigns a group to each invariant within its partition (the empty string if there are no partitions). The group of
+    an invariant is given by the shortest invariant of the partition that is a prefix of it. Invariants are inserted in
+    order in a trie per partition, so the prefixes of an invariant are in the trie before it and a single pass is
+    needed. If `exact_match` is True, invariants are only grouped if they are equal. Groups are numbered from 1 within
+    each partition. Returns the groups of the invariants and the number of groups of each partition.
+    """
+
+    invariant_groups = {}
+    partition_tries = {}
+    num_partition_groups = {}
+    for partition, invariant in sorted(set(zip(partitions, invariants))):
+        trie = partition_tries.setdefault(partition, {})
+
+        node = trie
+        if not exact_match:
+            # walk the trie until the end of the invariant or the first invariant that is a prefix of it
+            for char in invariant:
+                if TRIE_GROUP_KEY in node:
+                    break
+                node = node.setdefault(char, {})
+
+        if TRIE_GROUP_KEY not in node or exact_match:
+            num_partition_groups[partition] = num_partition_groups.get(partition, 0) + 1
+            node[TRIE_GROUP_KEY] = num_partition_groups[partition]
+        invariant_groups[(partition, invariant)] = node[TRIE_GROUP_KEY]
+
+    return [invariant_groups[key] for key in zip(partitions, invariants)], num_partition_groups
+
+
+def _exclude_partitions(partitions, termtypes, excluded_termtypes):
+    # the mapping rules of the excluded termtypes are moved to an auxiliary partition
+    return [AUXILIAR_UNIQUE_REPLACING_STRING if termtype in excluded_termtypes else partition for partition, termtype in
+            zip(partitions, termtypes)]
+
+
+def _get_position_groups(rml_df, position, partitions):
     """
+    Generates the groups of the mapping rules for a position (S, P, O or G) within the given partitions. Blank nodes
+    are in group 0 and literals are grouped by their language or datatype.
+    """
+
+    if position == 'S':
+        subject_termtypes = list(rml_df['subject_termtype'])
+        # blank nodes are excluded from the tries
+        position_groups, _ = _get_invariant_groups(
+            _exclude_partitions(partitions, subject_termtypes, [RML_BLANK_NODE]), list(rml_df['subject_invariant']))
+        return [0 if termtype == RML_BLANK_NODE else group for group, termtype in
+                zip(position_groups, subject_termtypes)]
+    elif position == 'O':
+        object_termtypes = list(rml_df['object_termtype'])
+        # str() is necessary for NULL literal types
+        literal_types = [str(literal_type) for literal_type in rml_df['literal_type']]
+
+        # the invariants are prefixed with the termtypes, so that objects with different termtypes are not grouped
+        # (str() is necessary for NULL termtypes), literals are grouped by their literal types instead
+        invariants = [f'{termtype}{AUXILIAR_UNIQUE_REPLACING_STRING}{invariant}' for termtype, invariant in
+                      zip(rml_df['object_termtype'].astype(str), rml_df['object_invariant'])]
+        invariant_groups, num_partition_groups = _get_invariant_groups(
+            _exclude_partitions(partitions, object_termtypes, [RML_BLANK_NODE, RML_LITERAL]), invariants)
+        literal_partitions = [partition if termtype == RML_LITERAL else AUXILIAR_UNIQUE_REPLACING_STRING for
+                              partition, termtype in zip(partitions, object_termtypes)]
+        literal_groups, _ = _get_invariant_groups(literal_partitions, literal_types, exact_match=True)
+
+        position_groups = []
+        for partition, termtype, invariant_group, literal_group in zip(partitions, object_termtypes,
+                                                                       invariant_groups, literal_groups):
+            if termtype == RML_BLANK_NODE:
+                position_groups.append(0)
+            elif termtype == RML_LITERAL:
+                # the groups of literals are numbered after the groups of the invariants in the partition
+                position_groups.append(num_partition_groups.get(partition, 0) + literal_group)
+            else:
+                position_groups.append(invariant_group)
+        return position_groups
+    else:
+        term = 'predicate' if position == 'P' else 'graph'
+        # if all terms are constant we can use full string comparison instead of prefixes
+        exact_match = set(rml_df[f'{term}_map_type']) == {RML_CONSTANT}
+        position_groups, _ = _get_invariant_groups(partitions, list(rml_df[f'{term}_invariant']), exact_match)
+        return position_groups
+
+
+def _get_finest_position_keys(rml_df, position):
+    """
+    Retrieves the keys that identify the finest groups of a position, i.e., the groups if every distinct invariant was
+    in a different group. The number of groups for a position is bounded by the number of distinct keys.
+    """
+
+    if position == 'S':
+        return [None if termtype == RML_BLANK_NODE else invariant for invariant, termtype in
+                zip(rml_df['subject_invariant'], rml_df['subject_termtype'])]
+    elif position == 'O':
+        # objects with different termtypes are not grouped (str() is necessary for NULL termtypes)
+        return [None if termtype == RML_BLANK_NODE else (termtype, str(literal_type)) if termtype == RML_LITERAL
+                else (str(termtype), invariant) for invariant, termtype, literal_type in
+                zip(rml_df['object_invariant'], rml_df['object_termtype'], rml_df['literal_type'])]
+    else:
+        term = 'predicate' if position == 'P' else 'graph'
+        return list(rml_df[f'{term}_invariant'])
+
 
-    for position in position_ordering:
-        current_global_group = rml_df.at[0, 'mapping_partition']  # to simulate a groupby
-        current_group = 0
-        current_invariant = AUXILIAR_UNIQUE_REPLACING_STRING
-        current_literal_type = AUXILIAR_UNIQUE_REPLACING_STRING
-
-        # ---------------------------- SUBJECT ----------------------------
-
-        if position == 'S':
-            rml_df.sort_values(by=['mapping_partition', 'subject_invariant'], inplace=True, ascending=True)
-
-            for i, rml_rule in rml_df.iterrows():
-                if current_global_group != rml_rule['mapping_partition']:
-                    current_group = 0
-                    current_invariant = AUXILIAR_UNIQUE_REPLACING_STRING
-                    current_global_group = rml_rule['mapping_partition']
-
-                if rml_rule['subject_termtype'] == RML_BLANK_NODE:
-                    rml_df.at[i, 'mapping_partition'] = f"{rml_df.at[i, 'mapping_partition']}-0"
-                elif rml_rule['subject_invariant'].startswith(current_invariant):
-                    rml_df.at[i, 'mapping_partition'] = f"{rml_df.at[i, 'mapping_partition']}-{current_group}"
-                else:
-                    current_group += 1
-                    current_invariant = rml_rule['subject_invariant']
-                    rml_df.at[i, 'mapping_partition'] = f"{rml_df.at[i, 'mapping_partition']}-{current_group}"
-
-        # ---------------------------- PREDICATE ----------------------------
-
-        if position == 'P':
-            rml_df.sort_values(by=['mapping_partition', 'predicate_invariant'], inplace=True, ascending=True)
-
-            # if all predicates are constant terms we can use full string comparison instead of startswith
-            enforce_invariant_non_subset = set(rml_df['predicate_map_type']) == {RML_CONSTANT}
-
-            for i, rml_rule in rml_df.iterrows():
-                if current_global_group != rml_rule['mapping_partition']:
-                    current_group = 0
-                    current_invariant = AUXILIAR_UNIQUE_REPLACING_STRING
-                    current_global_group = rml_rule['mapping_partition']
-
-                if enforce_invariant_non_subset and rml_rule['predicate_invariant'] == current_invariant:
-                    rml_df.at[i, 'mapping_partition'] = f"{rml_df.at[i, 'mapping_partition']}-{current_group}"
-                elif not enforce_invariant_non_subset and rml_rule['predicate_invariant'].startswith(
-                        current_invariant):
-                    rml_df.at[i, 'mapping_partition'] = f"{rml_df.at[i, 'mapping_partition']}-{current_group}"
-                else:
-                    current_group += 1
-                    current_invariant = rml_rule['predicate_invariant']
-                    rml_df.at[i, 'mapping_partition'] = f"{rml_df.at[i, 'mapping_partition']}-{current_group}"
-
-        # ---------------------------- OBJECT ----------------------------
-
-        if position == 'O':
-            rml_df.sort_values(by=['mapping_partition', 'object_termtype', 'literal_type', 'object_invariant'],
-                                    inplace=True, ascending=True)
-
-            for i, rml_rule in rml_df.iterrows():
-                if current_global_group != rml_rule['mapping_partition']:
-                    current_group = 0
-                    current_invariant = AUXILIAR_UNIQUE_REPLACING_STRING
-                    current_global_group = rml_rule['mapping_partition']
-
-                if rml_rule['object_termtype'] == RML_BLANK_NODE:
-                    rml_df.at[i, 'mapping_partition'] = f"{rml_df.at[i, 'mapping_partition']}-0"
-                elif rml_rule['object_termtype'] == RML_LITERAL:
-                    # str() is necessary for NULL literal types
-                    if str(rml_rule['literal_type']) != current_literal_type:
-                        current_group += 1
-                        current_literal_type = str(rml_rule['literal_type'])
-                    rml_df.at[i, 'mapping_partition'] = f"{rml_df.at[i, 'mapping_partition']}-{current_group}"
-                elif rml_rule['object_invariant'].startswith(current_invariant):
-                    rml_df.at[i, 'mapping_partition'] = f"{rml_df.at[i, 'mapping_partition']}-{current_group}"
-                else:
-                    current_group += 1
-                    current_invariant = rml_rule['object_invariant']
-                    rml_df.at[i, 'mapping_partition'] = f"{rml_df.at[i, 'mapping_partition']}-{current_group}"
-
-        # ---------------------------- GRAPH ----------------------------
-
-        if position == 'G':
-            rml_df.sort_values(by=['mapping_partition', 'graph_invariant'], inplace=True, ascending=True)
-
-            # if all graph are constant terms we can use full string comparison instead of startswith
-            enforce_invariant_non_subset = set(rml_df['graph_map_type']) == {RML_CONSTANT}
-
-            for i, rml_rule in rml_df.iterrows():
-                if current_global_group != rml_rule['mapping_partition']:
-                    current_group = 0
-                    current_invariant = AUXILIAR_UNIQUE_REPLACING_STRING
-                    current_global_group = rml_rule['mapping_partition']
-
-                if enforce_invariant_non_subset and rml_rule['graph_invariant'] == current_invariant:
-                    rml_df.at[i, 'mapping_partition'] = f"{rml_df.at[i, 'mapping_partition']}-{current_group}"
-                elif not enforce_invariant_non_subset and rml_rule['graph_invariant'].startswith(current_invariant):
-                    rml_df.at[i, 'mapping_partition'] = f"{rml_df.at[i, 'mapping_partition']}-{current_group}"
-                else:
-                    current_group += 1
-                    current_invariant = rml_rule['graph_invariant']
-                    rml_df.at[i, 'mapping_partition'] = f"{rml_df.at[i, 'mapping_partition']}-{current_group}"
-
-    return rml_df
+def _refine_partitions(partitions, position_groups):
+    return [f'{partition}-{group}' for partition, group in zip(partitions, position_groups)]
 
 
 class MappingPartitioner:
@@ -185,7 +184,11 @@ class MappingPartitioner:
 
     def _generate_maximal_partition(self):
         """
-        Generates a mapping partition with the maximum number of mapping groups.
+        Generates a mapping partition with the maximum number of mapping groups. Mapping rules are partitioned
+        position by position (S, P, O and G) within the groups of the previous positions, and the ordering of the
+        positions generating more groups is selected. The orderings are searched depth-first, so the partitions of
+        common prefixes are generated once, and orderings that cannot generate more groups than the best partition
+        found are pruned.
         """
 
         if {RML_REFERENCE, RML_TEMPLATE}.intersection(set(self.rml_df['lang_datatype_map_type'])):
@@ -193,31 +196,39 @@ class MappingPartitioner:
         else:
             self.rml_df['literal_type'] = self.rml_df['lang_datatype_map_value']
 
-        self.rml_df['mapping_partition'] = ''
-
-        position_orderings = list(permutations(['S', 'P', 'O', 'G']))
-
-        if self.config.is_multiprocessing_enabled():
-            pool = mp.Pool(self.config.get_number_of_processes())
-            mapping_partitions_dfs = pool.starmap(_generate_maximal_partition_for_a_position_ordering,
-                                                  zip([self.rml_df.copy()] * len(position_orderings),
-                                                      position_orderings))
-        else:
-            mapping_partitions_dfs = []
-            for position_ordering in position_orderings:
-                mapping_partitions_dfs.append(
-                    _generate_maximal_partition_for_a_position_ordering(self.rml_df.copy(), position_ordering))
+        finest_position_keys = {position: _get_finest_position_keys(self.rml_df, position) for position in 'SPOG'}
 
         max_num_groups = -1
         maximal_partition = None
-        for mapping_partitions_df in mapping_partitions_dfs:
-            if len(set(mapping_partitions_df['mapping_partition'])) > max_num_groups:
-                max_num_groups = len(set(mapping_partitions_df['mapping_partition']))
-                maximal_partition = mapping_partitions_df
+        position_orderings = [([''] * len(self.rml_df), 'SPOG')]
+        while position_orderings:
+            partitions, remaining_positions = position_orderings.pop()
+
+            if not remaining_positions:
+                if len(set(partitions)) > max_num_groups:
+                    max_num_groups = len(set(partitions))
+                    maximal_partition = partitions
+                continue
+
+            # the groups of a position are at most its distinct invariants
+            upper_bound = len(set(zip(partitions, *[finest_position_keys[position] for position in
+                                                    remaining_positions])))
+            if upper_bound <= max_num_groups:
+                continue
+
+            next_position_orderings = []
+            for position in remaining_positions:
+                next_partitions = _refine_partitions(partitions,
+                                                     _get_position_groups(self.rml_df, position, partitions))
+                next_position_orderings.append((next_partitions, remaining_positions.replace(position, '')))
+            # the orderings with more groups are explored first to prune more orderings
+            next_position_orderings.sort(key=lambda position_ordering: len(set(position_ordering[0])))
+            position_orderings.extend(next_position_orderings)
+
+        self.rml_df['mapping_partition'] = [partition[1:] for partition in maximal_partition]
 
-        maximal_partition['mapping_partition'] = maximal_partition['mapping_partition'].str[1:]
         # drop the auxiliary columns that were created just to generate the mapping partition
-        maximal_partition.drop([
+        self.rml_df.drop([
             'subject_invariant',
             'predicate_invariant',
             'object_invariant',
@@ -225,134 +236,39 @@ class MappingPartitioner:
             'literal_type'],
             axis=1, inplace=True)
 
-        self.rml_df = maximal_partition
-
     def _generate_partial_aggregations_partition(self):
         """
         Generates a mapping partition by independently partitioning by Subject, Predicate, Object and Graph, and
         aggregating this independent partitions.
         """
 
-        # initialize empty mapping partition
-        self.rml_df['subject_partition'] = ''
-        self.rml_df['predicate_partition'] = ''
-        self.rml_df['object_partition'] = ''
-        self.rml_df['graph_partition'] = ''
-
         if {RML_REFERENCE, RML_TEMPLATE}.intersection(set(self.rml_df['lang_datatype_map_type'])):
             self.rml_df['literal_type'] = self.rml_df['lang_datatype']
         else:
             self.rml_df['literal_type'] = self.rml_df['lang_datatype_map_value']
 
-        # generate partial mapping partition for subjects, predicates, objects and graphs
-
-        # ---------------------------- SUBJECT ----------------------------
-
-        # sort the mapping rules based on the subject invariants. An invariant that starts with another
-        # invariant is placed behind in the ordering e.g. http://example.org/term/something and
-        # http://example.org/term: http://example.org/term is placed first
-        self.rml_df.sort_values(by=['subject_invariant'], inplace=True, ascending=True)
-
-        current_group = 0
-        current_invariant = AUXILIAR_UNIQUE_REPLACING_STRING
-
-        # iterate over the mapping rules and check if the invariant starts with the invariant of the previous rule
-        # if it does, then it is in the same mapping partition than the previous mapping rule
-        # if it does not, then the mapping rule is in a new mapping partition
-        for i, rml_rule in self.rml_df.iterrows():
-            if rml_rule['subject_termtype'] == RML_BLANK_NODE:
-                self.rml_df.at[i, 'subject_partition'] = '0'
-            elif rml_rule['subject_invariant'].startswith(current_invariant):
-                self.rml_df.at[i, 'subject_partition'] = str(current_group)
-            else:
-                current_group += 1
-                current_invariant = rml_rule['subject_invariant']
-                self.rml_df.at[i, 'subject_partition'] = str(current_group)
-
-        # ---------------------------- PREDICATE ----------------------------
-
-        self.rml_df.sort_values(by='predicate_invariant', inplace=True, ascending=True)
-
-        current_group = 0
-        current_invariant = AUXILIAR_UNIQUE_REPLACING_STRING
-
-        # if all predicates are constant terms we can use full string comparison instead of startswith
-        enforce_invariant_non_subset = set(self.rml_df['predicate_map_type']) == {RML_CONSTANT}
-        if enforce_invariant_non_subset:
+        if set(self.rml_df['predicate_map_type']) == {RML_CONSTANT}:
             logging.debug('All predicate maps are constant-valued, invariant subset is not enforced.')
-
-        for i, rml_rule in self.rml_df.iterrows():
-            if enforce_invariant_non_subset and rml_rule['predicate_invariant'] == current_invariant:
-                self.rml_df.at[i, 'predicate_partition'] = str(current_group)
-            elif not enforce_invariant_non_subset and rml_rule['predicate_invariant'].startswith(current_invariant):
-                self.rml_df.at[i, 'predicate_partition'] = str(current_group)
-            else:
-                current_group += 1
-                current_invariant = rml_rule['predicate_invariant']
-                self.rml_df.at[i, 'predicate_partition'] = str(current_group)
-
-        # ---------------------------- OBJECT ----------------------------
-
-        self.rml_df.sort_values(by=['object_termtype', 'literal_type', 'object_invariant'],
-                                     inplace=True, ascending=True)
-
-        current_group = 0
-        current_literal_type = AUXILIAR_UNIQUE_REPLACING_STRING
-        current_invariant = AUXILIAR_UNIQUE_REPLACING_STRING
-
-        for i, rml_rule in self.rml_df.iterrows():
-            if rml_rule['object_termtype'] == RML_BLANK_NODE:
-                self.rml_df.at[i, 'object_partition'] = '0'
-            elif rml_rule['object_termtype'] == RML_LITERAL:
-                # str() is necessary for NULL literal types
-                if str(rml_rule['literal_type']) != current_literal_type:
-                    current_group += 1
-                    current_literal_type = str(rml_rule['literal_type'])
-                self.rml_df.at[i, 'object_partition'] = str(current_group)
-            elif rml_rule['object_invariant'].startswith(current_invariant):
-                self.rml_df.at[i, 'object_partition'] = str(current_group)
-            else:
-                current_group += 1
-                current_invariant = rml_rule['object_invariant']
-                self.rml_df.at[i, 'object_partition'] = str(current_group)
-
-        # ---------------------------- GRAPH ----------------------------
-
-        self.rml_df.sort_values(by=['graph_invariant'], inplace=True, ascending=True)
-
-        current_group = 0
-        current_invariant = AUXILIAR_UNIQUE_REPLACING_STRING
-
-        # if all graph are constant terms we can use full string comparison instead of startswith
-        enforce_invariant_non_subset = set(self.rml_df['graph_map_type']) == {RML_CONSTANT}
-        if enforce_invariant_non_subset:
+        if set(self.rml_df['graph_map_type']) == {RML_CONSTANT}:
             logging.debug('All graph maps are constant-valued, invariant subset is not enforced.')
 
-        for i, rml_rule in self.rml_df.iterrows():
-            if enforce_invariant_non_subset and rml_rule['graph_invariant'] == current_invariant:
-                self.rml_df.at[i, 'graph_partition'] = str(current_group)
-            elif not enforce_invariant_non_subset and rml_rule['graph_invariant'].startswith(current_invariant):
-                self.rml_df.at[i, 'graph_partition'] = str(current_group)
-            else:
-                current_group += 1
-                current_invariant = rml_rule['graph_invariant']
-                self.rml_df.at[i, 'graph_partition'] = str(current_group)
+        # generate partial mapping partition for subjects, predicates, objects and graphs, an invariant is in the
+        # same group as the shortest invariant that is a prefix of it, e.g. http://example.org/term/something is in
+        # the group of http://example.org/term
+        partitions = [''] * len(self.rml_df)
+        position_groups = [_get_position_groups(self.rml_df, position, partitions) for position in 'SPOG']
 
         # aggregate the independent mapping partition generated for subjects, predicates and graphs to generate the
         # final mapping partition
-        self.rml_df['mapping_partition'] = self.rml_df['subject_partition'].astype(str) + '-' + \
-            self.rml_df['predicate_partition'].astype(str) + '-' + \
-            self.rml_df['object_partition'].astype(str) + '-' + self.rml_df['graph_partition'].astype(str)
+        self.rml_df['mapping_partition'] = [f'{subject_group}-{predicate_group}-{object_group}-{graph_group}' for
+                                            subject_group, predicate_group, object_group, graph_group in
+                                            zip(*position_groups)]
 
         # drop the auxiliary columns that were created just to generate the mapping partition
         self.rml_df.drop([
-            'subject_partition',
             'subject_invariant',
-            'predicate_partition',
             'predicate_invariant',
-            'object_partition',
             'object_invariant',
-            'graph_partition',
             'graph_invariant',
             'literal_type'],
             axis=1, inplace=True)
@@ -360,47 +276,25 @@ class MappingPartitioner:
     def _get_term_invariants(self):
         """
         Adds in the input DataFrame new columns for the invariants of mapping rules. Columns for the invariants of
-        subjects, predicates and graphs are added, and they are completed based on the provided mapping
+        subjects, predicates, objects and graphs are added, and they are completed based on the provided mapping
         partitioning criteria.
         """
 
-        # initialize empty invariants for all terms
-        self.rml_df['subject_invariant'] = ''
-        self.rml_df['predicate_invariant'] = ''
-        self.rml_df['object_invariant'] = ''
-        self.rml_df['graph_invariant'] = ''
-
-        for i, rml_rule in self.rml_df.iterrows():
-            # SUBJECT
-            if rml_rule['subject_map_type'] == RML_TEMPLATE:
-                self.rml_df.at[i, 'subject_invariant'] = get_invariant_of_template(str(rml_rule['subject_map_value']))
-            elif rml_rule['subject_map_type'] == RML_CONSTANT:
-                self.rml_df.at[i, 'subject_invariant'] = str(rml_rule['subject_map_value'])
-            # PREDICATE
-            if rml_rule['predicate_map_type'] == RML_CONSTANT:
-                self.rml_df.at[i, 'predicate_invariant'] = str(rml_rule['predicate_map_value'])
-            elif rml_rule['predicate_map_type'] == RML_TEMPLATE:
-                self.rml_df.at[i, 'predicate_invariant'] = \
-                    get_invariant_of_template(str(rml_rule['predicate_map_value']))
-
-            # OBJECT
-            if rml_rule['object_map_type'] == RML_CONSTANT:
-                self.rml_df.at[i, 'object_invariant'] = str(rml_rule['object_map_value'])
-            elif rml_rule['object_map_type'] == RML_TEMPLATE:
-                self.rml_df.at[i, 'object_invariant'] = get_invariant_of_template(str(rml_rule['object_map_value']))
-            # elif pd.notna(rml_rule['object_parent_triples_map']) and rml_rule['object_parent_triples_map']!="":
-            elif rml_rule['object_map_type'] == RML_PARENT_TRIPLES_MAP:
-                # get the invariant for referencing object maps
-                parent_rml_rule = get_rml_rule(self.rml_df, rml_rule['object_map_value'])
-
-                if parent_rml_rule['subject_map_type'] == RML_CONSTANT:
-                    self.rml_df.at[i, 'object_invariant'] = str(parent_rml_rule['subject_map_value'])
-                elif parent_rml_rule['subject_map_type'] == RML_TEMPLATE:
-                    self.rml_df.at[i, 'object_invariant'] = \
-                        get_invariant_of_template(str(parent_rml_rule['subject_map_value']))
-
-            # GRAPH
-            if rml_rule['graph_map_type'] == RML_CONSTANT:
-                self.rml_df.at[i, 'graph_invariant'] = str(rml_rule['graph_map_value'])
-            elif rml_rule['graph_map_type'] == RML_TEMPLATE:
-                self.rml_df.at[i, 'graph_invariant'] = get_invariant_of_template(str(rml_rule['graph_map_value']))
+        for term in ['subject', 'predicate', 'object', 'graph']:
+            # initialize empty invariants, the invariants of reference-valued terms are empty
+            self.rml_df[f'{term}_invariant'] = ''
+
+            term_map_values = self.rml_df[f'{term}_map_value'].astype(str)
+            constant_rules = self.rml_df[f'{term}_map_type'] == RML_CONSTANT
+            template_rules = self.rml_df[f'{term}_map_type'] == RML_TEMPLATE
+            self.rml_df.loc[constant_rules, f'{term}_invariant'] = term_map_values[constant_rules]
+            self.rml_df.loc[template_rules, f'{term}_invariant'] = \
+                term_map_values[template_rules].map(get_invariant_of_template)
+
+        # the invariant of a referencing object map is the invariant of the subject of the parent triples map, which
+        # is the same for all the mapping rules of the triples map
+        subject_invariants = self.rml_df.drop_duplicates(subset='triples_map_id').set_index('triples_map_id')[
+            'subject_invariant']
+        referencing_rules = self.rml_df['object_map_type'] == RML_PARENT_TRIPLES_MAP
+        self.rml_df.loc[referencing_rules, 'object_invariant'] = \
+            self.rml_df.loc[referencing_rules, 'object_map_value'].map(subject_invariants)
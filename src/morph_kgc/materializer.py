@@ -11,18 +11,38 @@ __email__ = "arenas.guerrero.julian@outlook.com"
 
 from falcon.uri import encode_value
 from urllib.parse import quote
+from itertools import chain, islice
+from functools import lru_cache
 
 from .utils import *
 from .constants import *
-from .data_source.relational_db import get_sql_data
+from .data_source.relational_db import get_sql_data, get_sql_data_in_chunks, get_sql_data_partition_in_chunks, \
+    get_sql_join_data_in_chunks, get_rdb_reference_datatype, get_rdb_table_names
 from .data_source.property_graph_db import get_pg_data
-from .data_source.data_file import get_file_data
+from .data_source.data_file import get_file_data, get_file_data_in_chunks, get_file_data_partition_in_chunks
 
 from .data_source.data_file import load_json
 from .data_source.data_file import check_for_empty_lists
 
 from .data_source.python_data import get_ram_data
+from .data_source.source_cache import get_source_cache
 from .fnml.fnml_executer import execute_fnml
+from .deduplicator import get_triples_deduplicator
+from .hash_join import GraceHashJoin, get_num_hash_join_partitions
+
+
+# number of rows read at once from partitioned logical sources when chunking is disabled
+SOURCE_PARTITION_CHUNK_SIZE = 100000
+# maximum number of triples read at once from a shard file
+SHARD_BATCH_SIZE = 100000
+# number of rows read at once from the logical source of a parent triples map
+PARENT_CHUNK_SIZE = 100000
+# escaping of literals, the backslash must be replaced first if the characters are replaced one by one
+LITERAL_ESCAPES = [('\\', '\\\\'), ('\n', '\\n'), ('\t', '\\t'), ('\b', '\\b'), ('\f', '\\f'), ('\r', '\\r'),
+                   ('"', '\\"'), ("'", "\\'")]
+# all characters are replaced at once
+LITERAL_ESCAPE_TABLE = str.maketrans(dict(LITERAL_ESCAPES))
+LITERAL_ESCAPE_PATTERN = re.compile('[\\\\\n\t\b\f\r"\']')
 
 
 def _add_references_in_join_condition(rml_rule, references, parent_references):
@@ -35,6 +55,13 @@ def _add_references_in_join_condition(rml_rule, references, parent_references):
 
 
 def _preprocess_data(data, rml_rule, references, config):
+    data = _normalize_data(data, rml_rule, references, config)
+    data = _clean_data(data, references, config)
+
+    return data
+
+
+def _normalize_data(data, rml_rule, references, config):
     # deal with ORACLE
     if rml_rule['source_type'] == RDB:
         if config.get_db_url(rml_rule['source_name']).lower().startswith(ORACLE.lower()):
@@ -43,6 +70,10 @@ def _preprocess_data(data, rml_rule, references, config):
     # TODO: can this be removed?
     data = data.map(str)
 
+    return data
+
+
+def _clean_data(data, references, config):
     data = remove_null_values_from_dataframe(data, config, references)
     data = data.convert_dtypes(convert_boolean=False)
 
@@ -55,7 +86,7 @@ def _preprocess_data(data, rml_rule, references, config):
     return data
 
 
-def _get_data(config, rml_rule, references, python_source=None):
+def _read_data(config, rml_rule, references, python_source=None):
     if rml_rule['source_type'] == RDB:
         data = get_sql_data(config, rml_rule, references)
     elif rml_rule['source_type'] == PGDB:
@@ -65,11 +96,166 @@ def _get_data(config, rml_rule, references, python_source=None):
     elif rml_rule['source_type'] in IN_MEMORY_TYPES:
         data = get_ram_data(rml_rule, references, python_source)
 
-    data = _preprocess_data(data, rml_rule, references, config)
-
     return data
 
 
+def _get_data(config, rml_rule, references, python_source=None):
+    source_cache = get_source_cache()
+    if source_cache is None or not _is_source_cacheable(rml_rule):
+        data = _read_data(config, rml_rule, references, python_source)
+        return _preprocess_data(data, rml_rule, references, config)
+
+    source_key = _get_source_key(rml_rule, references)
+    data = source_cache.get(source_key, references)
+    if data is None:
+        # read all the references used in the logical source, so that it is read once
+        source_references = source_cache.get_references(source_key, references)
+        data = _read_data(config, rml_rule, source_references, python_source)
+        data = _normalize_data(data, rml_rule, source_references, config)
+        source_cache.put(source_key, data)
+
+        if set(references).issubset(data.columns):
+            data = data[list(references)]
+
+    return _clean_data(data, references, config)
+
+
+def _is_source_cacheable(rml_rule):
+    return rml_rule['source_type'] == RDB or rml_rule['source_type'] in FILE_SOURCE_TYPES
+
+
+def _is_source_data_selectable(rml_rule):
+    """
+    Checks whether the data of the logical source of a mapping rule for some references can be obtained by selecting
+    the columns of the data for more references. This is not the case for SQL tables (NULL values are filtered in the
+    query) and hierarchical files (the iterator results are flattened for the references).
+    """
+
+    if rml_rule['logical_source_type'] == RML_QUERY:
+        # the results of the query do not depend on the references
+        return True
+
+    return rml_rule['source_type'] in [CSV, TSV, PARQUET, ORC, STATA, SPSS] + EXCEL + FEATHER + SAS + ODS
+
+
+def _get_logical_source_key(rml_rule):
+    return tuple(rml_rule[field] if pd.notna(rml_rule[field]) else '' for field in
+                 ['source_name', 'source_type', 'logical_source_type', 'logical_source_value', 'iterator'])
+
+
+def _get_source_key(rml_rule, references):
+    if _is_source_data_selectable(rml_rule):
+        return _get_logical_source_key(rml_rule)
+    else:
+        return _get_logical_source_key(rml_rule) + (frozenset(references),)
+
+
+def _get_source_references(rml_rule, rml_df, fnml_df):
+    """
+    Retrieves the mapping rules whose logical sources are read to materialize a mapping rule, i.e. the rule itself and
+    the parent triples map of a referencing object map, together with the references read from each of them.
+    """
+
+    source_references = [(rml_rule, set(_get_references_in_rml_rule(rml_rule, rml_df, fnml_df)))]
+
+    if rml_rule['object_map_type'] == RML_PARENT_TRIPLES_MAP:
+        parent_triples_map_rule = get_rml_rule(rml_df, rml_rule['object_map_value'])
+        parent_references = set(
+            _get_references_in_rml_rule(parent_triples_map_rule, rml_df, fnml_df, only_subject_map=True))
+        _, parent_references = _add_references_in_join_condition(rml_rule, set(), parent_references)
+        source_references.append((parent_triples_map_rule, parent_references))
+
+    return source_references
+
+
+def _read_data_in_chunks(config, rml_rule, references, source_partition=None):
+    """
+    Reads the data of a mapping rule in chunks if its logical source is read chunk by chunk, which is the case of
+    relational databases and files if chunking is enabled or source_partition is provided. The data is not
+    preprocessed. Returns None if the logical source is read at once.
+    """
+
+    chunk_size = config.get_chunk_size()
+    partition_chunk_size = chunk_size if chunk_size > 0 else SOURCE_PARTITION_CHUNK_SIZE
+
+    if source_partition is not None and rml_rule['source_type'] == RDB:
+        return get_sql_data_partition_in_chunks(config, rml_rule, references, partition_chunk_size, source_partition)
+    elif source_partition is not None and rml_rule['source_type'] in FILE_SOURCE_TYPES:
+        return get_file_data_partition_in_chunks(rml_rule, references, partition_chunk_size, source_partition)
+    elif source_partition is None and config.is_chunking_enabled() and rml_rule['source_type'] == RDB:
+        return get_sql_data_in_chunks(config, rml_rule, references, chunk_size)
+    elif source_partition is None and config.is_chunking_enabled() and rml_rule['source_type'] in FILE_SOURCE_TYPES:
+        return get_file_data_in_chunks(rml_rule, references, chunk_size)
+
+    return None
+
+
+def _get_data_in_chunks(config, rml_rule, references, python_source=None, source_partition=None):
+    """
+    Yields the preprocessed data of a mapping rule in chunks of at most chunk_size rows. Relational databases, CSV and
+    Parquet files and tabular views are read chunk by chunk, the rest of the sources are read at once and then split.
+    If source_partition (the index of the partition and the number of partitions) is provided, only the data in that
+    partition of the logical source is yielded.
+    """
+
+    chunk_size = config.get_chunk_size()
+
+    data_chunks = _read_data_in_chunks(config, rml_rule, references, source_partition)
+    if data_chunks is None:
+        data = _get_data(config, rml_rule, references, python_source)
+        if source_partition is not None:
+            data = data.iloc[source_partition[0]::source_partition[1]]
+        yield from _split_in_chunks(data, chunk_size)
+        return
+
+    for data in data_chunks:
+        data = _preprocess_data(data, rml_rule, references, config)
+        yield from _split_in_chunks(data, chunk_size)
+
+
+def _is_join_pushed_down_to_rdb(rml_rule, rml_df):
+    """
+    Checks whether the logical sources of a referencing object map and of its parent triples map are joined in their
+    relational database, which is the case if both are in the same database.
+    """
+
+    if rml_rule['object_map_type'] != RML_PARENT_TRIPLES_MAP or rml_rule['source_type'] != RDB:
+        return False
+    elif pd.isna(rml_rule['object_join_conditions']) or not rml_rule['object_join_conditions']:
+        return False
+
+    parent_triples_map_rule = get_rml_rule(rml_df, rml_rule['object_map_value'])
+    if parent_triples_map_rule['source_type'] != RDB or \
+            parent_triples_map_rule['source_name'] != rml_rule['source_name']:
+        return False
+
+    # the columns of schema-qualified references are not named after the references
+    child_join_references, parent_join_references = get_references_in_join_condition(rml_rule,
+                                                                                     'object_join_conditions')
+    return all('.' not in reference for reference in child_join_references + parent_join_references)
+
+
+def _get_joined_data_in_chunks(config, rml_rule, parent_triples_map_rule, references, parent_references,
+                               source_partition=None):
+    """
+    Yields the preprocessed data of a mapping rule joined with the data of the parent triples map of its referencing
+    object map in chunks of at most chunk_size rows. The logical sources are joined in their relational database, and
+    the columns of the parent triples map are prefixed with `parent_`, as after merging the data in pandas.
+    """
+
+    chunk_size = config.get_chunk_size()
+    if source_partition is not None and chunk_size == 0:
+        sql_chunk_size = SOURCE_PARTITION_CHUNK_SIZE
+    else:
+        sql_chunk_size = chunk_size
+
+    joined_references = list(references) + ['parent_' + reference for reference in parent_references]
+    for data in get_sql_join_data_in_chunks(config, rml_rule, parent_triples_map_rule, references, parent_references,
+                                            sql_chunk_size, source_partition):
+        data = _preprocess_data(data, rml_rule, joined_references, config)
+        yield from _split_in_chunks(data, chunk_size)
+
+
 def _get_references_in_rml_rule(rml_rule, rml_df, fnml_df, only_subject_map=False):
     references = []
 
@@ -103,62 +289,106 @@ def _get_references_in_rml_rule(rml_rule, rml_df, fnml_df, only_subject_map=Fals
     return references
 
 
-def _materialize_template(results_df, template, expression_type, config, position, columns_alias='', termtype='', datatype=''):
+@lru_cache(maxsize=None)
+def _compile_template(template, expression_type, termtype=''):
+    """
+    Parses a template once into its literal segments and the list of references in order, a term is the concatenation
+    of the segments interleaved with the values of the references. The segments also include the characters of the
+    termtype (e.g., `<` and `>` for IRIs), so that a term is built with a single concatenation.
+    """
+
     if expression_type == RML_REFERENCE:
         # convert RML reference to template
         template = f'{{{template}}}'
 
     references = get_references_in_template(template)
 
-
     # Curly braces that do not enclose column names MUST be escaped by a backslash character (“\”).
     # This also applies to curly braces within column names.
     template = template.replace('\\{', '{').replace('\\}', '}')
-    # formatting according to the termtype is done at the end
-    results_df[position] = ''
 
+    template_segments = []
     for reference in references:
-        results_df['reference_results'] = results_df[columns_alias + reference]
+        splitted_template = template.split('{' + reference + '}')
+        template_segments.append(splitted_template[0])
+        template = str('{' + reference + '}').join(splitted_template[1:])
+    # add what remains in the template after the last reference
+    template_segments.append(template)
+
+    if termtype.strip() == RML_IRI:
+        template_segments[0] = '<' + template_segments[0]
+        template_segments[-1] = template_segments[-1] + '>'
+    elif termtype.strip() == RML_BLANK_NODE:
+        template_segments[0] = '_:' + template_segments[0]
+    elif termtype.strip() == RML_LITERAL:
+        template_segments[0] = '"' + template_segments[0]
+        template_segments[-1] = template_segments[-1] + '"'
+    # language and datatype maps are not formatted
+
+    return tuple(template_segments), references
+
+
+@lru_cache(maxsize=None)
+def _get_iri_encoding_pattern(safe_percent_encoding=''):
+    # unreserved characters in RFC 3986 are not percent-encoded, neither are the safe ASCII characters
+    safe_characters = re.escape(''.join(char for char in safe_percent_encoding if char.isascii()))
+
+    return re.compile(f'[^A-Za-z0-9\\-._~{safe_characters}]')
+
+
+def _encode_iri_values(values, safe_percent_encoding=''):
+    # only the values with characters that must be encoded are encoded
+    iri_encoding_pattern = _get_iri_encoding_pattern(safe_percent_encoding)
+    if safe_percent_encoding:
+        return [quote(value, safe=safe_percent_encoding) if iri_encoding_pattern.search(value) else value
+                for value in values]
+    else:
+        return [encode_value(value) if iri_encoding_pattern.search(value) else value for value in values]
+
+
+def _escape_literal_values(values):
+    # only the values with characters that must be escaped are escaped
+    return [value.translate(LITERAL_ESCAPE_TABLE) if LITERAL_ESCAPE_PATTERN.search(value) else value
+            for value in values]
+
+
+def _materialize_template(results_df, template, expression_type, config, position, columns_alias='', termtype='', datatype=''):
+    template_segments, references = _compile_template(template, expression_type, termtype)
+
+    if not references:
+        results_df[position] = template_segments[0]
+        return results_df
+
+    reference_results = []
+    for reference in references:
+        values = results_df[columns_alias + reference]
 
         if config.only_write_printable_characters():
-            results_df['reference_results'] = results_df['reference_results'].apply(
-                lambda x: remove_non_printable_characters(x))
+            values = values.apply(lambda x: remove_non_printable_characters(x))
 
-        if termtype.strip() == RML_IRI and expression_type == RML_TEMPLATE:
-            if config.get_safe_percent_encoding():
-                results_df['reference_results'] = results_df['reference_results'].apply(
-                    lambda x: quote(x, safe=config.get_safe_percent_encoding()))
-            else:
-                results_df['reference_results'] = results_df['reference_results'].apply(lambda x: encode_value(x))
-        elif termtype.strip() == RML_LITERAL:
+        if termtype.strip() == RML_LITERAL:
             # Natural Mapping of SQL Values (https://www.w3.org/TR/r2rml/#natural-mapping)
             if datatype == XSD_BOOLEAN:
-                results_df['reference_results'] = results_df['reference_results'].str.lower()
+                values = values.str.lower()
             elif datatype == XSD_DATETIME:
-                results_df['reference_results'] = results_df['reference_results'].str.replace(' ', 'T', regex=False)
-                # Make integers not end with .0
+                values = values.str.replace(' ', 'T', regex=False)
+            # Make integers not end with .0
             elif datatype == XSD_INTEGER:
-                results_df['reference_results'] = results_df['reference_results'].astype(float).astype(int).astype(str)
+                values = values.astype(float).astype(int).astype(str)
 
-            # TODO: this can be avoided for most cases (if '\\' in data_value)
-            results_df['reference_results'] = results_df['reference_results'].str.replace('\\', '\\\\', regex=False).str.replace('\n', '\\n', regex=False).str.replace('\t', '\\t', regex=False).str.replace('\b', '\\b', regex=False).str.replace('\f', '\\f', regex=False).str.replace('\r', '\\r', regex=False).str.replace('"', '\\"', regex=False).str.replace("'", "\\'", regex=False)
+        # the terms are built with lists, which is faster than operating with Series of strings
+        values = values.tolist()
+        if termtype.strip() == RML_IRI and expression_type == RML_TEMPLATE:
+            values = _encode_iri_values(values, config.get_safe_percent_encoding())
+        elif termtype.strip() == RML_LITERAL:
+            values = _escape_literal_values(values)
 
-        splitted_template = template.split('{' + reference + '}')
-        results_df[position] = results_df[position] + splitted_template[0] + results_df['reference_results']
-        template = str('{' + reference + '}').join(splitted_template[1:])
-    if template:
-        # add what remains in the template after the last reference
-        results_df[position] = results_df[position] + template
+        reference_results.append(values)
 
-    if termtype.strip() == RML_IRI:
-        results_df[position] = '<' + results_df[position] + '>'
-    elif termtype.strip() == RML_BLANK_NODE:
-        results_df[position] = '_:' + results_df[position]
-    elif termtype.strip() == RML_LITERAL:
-        results_df[position] = '"' + results_df[position] + '"'
-    else:
-        # this case is for language and datatype maps, do nothing
-        pass
+    # build all the terms in one pass with a printf-style format string
+    format_string = '%s'.join(template_segment.replace('%', '%%') for template_segment in template_segments)
+    results_df[position] = pd.Series([format_string % reference_values for reference_values in zip(*reference_results)],
+                                     index=results_df.index, dtype=object)
 
     return results_df
 
@@ -893,22 +1123,188 @@ def _materialize_rml_rule_terms_named_cc_SM(results_df, rml_rule):
 
 
 
-def _merge_data(data, parent_data, rml_rule, join_condition):
+def _prepare_parent_data(parent_data, rml_rule, join_condition):
+    """
+    Prefixes the columns of the parent data and, if there is only one join condition, indexes it by the parent join
+    reference. The prepared parent data can be joined with several chunks of the child data.
+    """
+
     parent_data = parent_data.add_prefix('parent_')
     child_join_references, parent_join_references = get_references_in_join_condition(rml_rule, join_condition)
     parent_join_references = ['parent_' + reference for reference in parent_join_references]
 
+    if len(child_join_references) == 1:
+        parent_data = parent_data.set_index(parent_join_references, drop=False)
+
+    return parent_data
+
+
+def _get_parent_join_key(rml_rule):
+    if rml_rule['object_map_type'] != RML_PARENT_TRIPLES_MAP:
+        return None
+
+    child_join_references, parent_join_references = get_references_in_join_condition(rml_rule,
+                                                                                     'object_join_conditions')
+    return rml_rule['object_map_value'], tuple(parent_join_references)
+
+
+def _get_join_values(data, rml_rule):
+    child_join_references, parent_join_references = get_references_in_join_condition(rml_rule,
+                                                                                     'object_join_conditions')
+    return {parent_reference: set(data[child_reference]) for child_reference, parent_reference in
+            zip(child_join_references, parent_join_references)}
+
+
+def _semi_join_data(parent_data, join_values):
+    for parent_reference, values in join_values.items():
+        parent_data = parent_data[parent_data[parent_reference].isin(values)]
+
+    return parent_data
+
+
+def _read_parent_data_in_chunks(config, parent_triples_map_rule, parent_references, python_source=None,
+                                join_values=None):
+    """
+    Yields the preprocessed data of the parent triples map of a referencing object map. Relational databases, CSV and
+    Parquet files and tabular views are read in chunks, the rest of the sources are read at once. If join_values (the
+    values of the join references in the child data) is provided, only the rows whose join values are in the child
+    data are kept (semi-join), so that the rows that cannot be joined are not kept in memory. The values are compared
+    as strings, as in the join.
+    """
+
+    source_cache = get_source_cache()
+    if source_cache is not None and _is_source_cacheable(parent_triples_map_rule):
+        source_key = _get_source_key(parent_triples_map_rule, parent_references)
+        if source_cache.is_shared(source_key):
+            # the data of the parent logical source is read through the cache, as other mapping rules use it
+            parent_data = _get_data(config, parent_triples_map_rule, parent_references, python_source)
+            yield parent_data if join_values is None else _semi_join_data(parent_data, join_values)
+            return
+
+        # the parent logical source is not read through the cache
+        source_cache.release(source_key)
+
+    if parent_triples_map_rule['source_type'] == RDB:
+        data_chunks = get_sql_data_in_chunks(config, parent_triples_map_rule, parent_references, PARENT_CHUNK_SIZE)
+    elif parent_triples_map_rule['source_type'] in FILE_SOURCE_TYPES:
+        data_chunks = get_file_data_in_chunks(parent_triples_map_rule, parent_references, PARENT_CHUNK_SIZE)
+    else:
+        data_chunks = [_read_data(config, parent_triples_map_rule, parent_references, python_source)]
+
+    for parent_data in data_chunks:
+        parent_data = _preprocess_data(parent_data, parent_triples_map_rule, parent_references, config)
+        yield parent_data if join_values is None else _semi_join_data(parent_data, join_values)
+
+
+def _get_parent_data(config, rml_rule, parent_triples_map_rule, parent_references, python_source=None,
+                     join_cache=None, join_values=None, join_memory_limit=0):
+    """
+    Retrieves the data of the parent triples map of a referencing object map prepared to be joined. If join_cache is
+    provided, the prepared data is kept in it by parent triples map and parent join references, so that the mapping
+    rules of a mapping group referencing the same parent triples map with the same join condition read, prefix and
+    index it once. If join_values is provided, only the parent data that joins with the child data is read. If the
+    parent data exceeds join_memory_limit (in bytes, 0 means no limit), it is partitioned to temporary files and the
+    GraceHashJoin is returned instead of the data, otherwise the returned GraceHashJoin is None.
+    """
+
+    join_key = _get_parent_join_key(rml_rule)
+    if join_cache is not None and join_key in join_cache:
+        # the parent logical source is not read, release its use
+        source_cache = get_source_cache()
+        if source_cache is not None and _is_source_cacheable(parent_triples_map_rule):
+            source_cache.release(_get_source_key(parent_triples_map_rule, parent_references))
+        return join_cache[join_key], None
+
+    data_chunks = _read_parent_data_in_chunks(config, parent_triples_map_rule, parent_references, python_source,
+                                              join_values)
+
+    parent_data = []
+    memory_usage = 0
+    for parent_data_chunk in data_chunks:
+        parent_data.append(parent_data_chunk)
+
+        if join_memory_limit > 0:
+            memory_usage += parent_data_chunk.memory_usage(index=True, deep=True).sum()
+            if memory_usage > join_memory_limit:
+                from .scheduler import _estimate_source_rows
+
+                # the size of the parent data is estimated with the memory usage of the rows read so far and the
+                # estimated number of rows of its logical source
+                num_rows = sum(map(len, parent_data))
+                estimated_rows = _estimate_source_rows(config, parent_triples_map_rule, python_source)
+                estimated_size = memory_usage * max(1, estimated_rows / max(1, num_rows))
+
+                child_join_references, parent_join_references = get_references_in_join_condition(
+                    rml_rule, 'object_join_conditions')
+                hash_join = GraceHashJoin(child_join_references, parent_join_references,
+                                          num_partitions=get_num_hash_join_partitions(estimated_size,
+                                                                                      join_memory_limit),
+                                          temporary_dir=config.get_temporary_dir(), memory_limit=join_memory_limit)
+                # the chunks read so far and the rest of the parent data are partitioned
+                for parent_data_chunk in chain(parent_data, data_chunks):
+                    hash_join.add_parent_data(parent_data_chunk)
+                logging.debug(f"The data of parent triples map `{parent_triples_map_rule['triples_map_id']}` "
+                              "exceeds join_memory_limit, it is partitioned to temporary files.")
+                return None, hash_join
+
+    if len(parent_data) == 0:
+        parent_data = pd.DataFrame(columns=list(parent_references))
+    elif len(parent_data) == 1:
+        parent_data = parent_data[0]
+    else:
+        # duplicates are removed in each chunk
+        parent_data = pd.concat(parent_data, ignore_index=True).drop_duplicates()
+    parent_data = _prepare_parent_data(parent_data, rml_rule, 'object_join_conditions')
+
+    if join_cache is not None:
+        join_cache[join_key] = parent_data
+
+    return parent_data, None
+
+
+def _join_data(data, parent_data, rml_rule, join_condition):
+    child_join_references, parent_join_references = get_references_in_join_condition(rml_rule, join_condition)
+    parent_join_references = ['parent_' + reference for reference in parent_join_references]
+
     # if there is only one join condition use join, otherwise use merge
     if len(child_join_references) == 1:
+        if parent_data.index.is_unique:
+            # probe the index of the parent data, its hash table is built once for all the chunks and rules
+            parent_positions = parent_data.index.get_indexer(data[child_join_references[0]])
+            matches = parent_positions != -1
+            return pd.concat([data[matches].reset_index(drop=True),
+                              parent_data.iloc[parent_positions[matches]].reset_index(drop=True)], axis=1)
+
         data = data.set_index(child_join_references, drop=False)
-        parent_data = parent_data.set_index(parent_join_references, drop=False)
         return data.join(parent_data, how='inner')
     else:
         return data.merge(parent_data, how='inner', left_on=child_join_references, right_on=parent_join_references)
 
 
+def _join_data_partitions(data_chunks, hash_join, rml_rule):
+    """
+    Joins the child data with the parent data partitioned in a GraceHashJoin, yielding the joined data. The child data
+    is partitioned as the parent data and then each partition of the parent data is joined with the chunks of the
+    child data in the same partition.
+    """
+
+    for data in data_chunks:
+        hash_join.add_child_data(data)
+
+    for parent_data, partition_data_chunks in hash_join.get_partitions():
+        parent_data = _prepare_parent_data(parent_data, rml_rule, 'object_join_conditions')
+        for data in partition_data_chunks:
+            yield _join_data(data, parent_data, rml_rule, 'object_join_conditions')
+
+
+def _merge_data(data, parent_data, rml_rule, join_condition):
+    parent_data = _prepare_parent_data(parent_data, rml_rule, join_condition)
+
+    return _join_data(data, parent_data, rml_rule, join_condition)
+
+
 def _materialize_rml_rule(rml_rule, rml_df, fnml_df, config, data=None, parent_join_references=set(), nest_level=0,
-                          python_source=None):
+                          python_source=None, join_cache=None):
 
     references = set(_get_references_in_rml_rule(rml_rule, rml_df, fnml_df))
 
@@ -975,14 +1371,21 @@ def _materialize_rml_rule(rml_rule, rml_df, fnml_df, config, data=None, parent_j
         # add references used in the join condition
         references, parent_references = _add_references_in_join_condition(rml_rule, references, parent_references)
 
-        if data is None:
-            data = _get_data(config, rml_rule, references, python_source)
+        if data is None and _is_join_pushed_down_to_rdb(rml_rule, rml_df):
+            # the logical sources are joined in the database
+            merged_data = pd.concat(_get_joined_data_in_chunks(config, rml_rule, parent_triples_map_rule, references,
+                                                               parent_references))
+        else:
+            if data is None:
+                data = _get_data(config, rml_rule, references, python_source)
 
-        parent_data = _get_data(config, parent_triples_map_rule, parent_references, python_source)
-        merged_data = _merge_data(data, parent_data, rml_rule, 'object_join_conditions')
+            # only the parent data that joins with the child data is read, unless it is kept in join_cache
+            join_values = _get_join_values(data, rml_rule) if join_cache is None else None
+            parent_data, _ = _get_parent_data(config, rml_rule, parent_triples_map_rule, parent_references,
+                                              python_source, join_cache, join_values)
+            merged_data = _join_data(data, parent_data, rml_rule, 'object_join_conditions')
 
-        rml_rule['object_map_type'] = parent_triples_map_rule['subject_map_type']
-        rml_rule['object_map_value'] = parent_triples_map_rule['subject_map_value']
+        _replace_object_map_with_parent_subject_map(rml_rule, parent_triples_map_rule)
 
         data = _materialize_rml_rule_terms(merged_data, rml_rule, fnml_df, config, columns_alias='parent_')
 
@@ -1022,6 +1425,13 @@ def _materialize_rml_rule(rml_rule, rml_df, fnml_df, config, data=None, parent_j
 
         data = _materialize_rml_rule_terms(data, rml_rule, fnml_df, config)
 
+    return _materialize_triples(data, rml_rule, fnml_df, config, nest_level)
+
+
+def _materialize_triples(data, rml_rule, fnml_df, config, nest_level=0):
+    """
+    Builds the triples (or quads) from the subject, predicate and object terms of the mapping rule in the DataFrame.
+    """
 
     # TODO: this is slow reduce the number of vectorized operations
     data['triple'] = data['subject'] + ' ' + data['predicate'] + ' ' + data['object']
@@ -1040,43 +1450,430 @@ def _materialize_rml_rule(rml_rule, rml_df, fnml_df, config, data=None, parent_j
     return data
 
 
-def _materialize_mapping_group_to_set(mapping_group_df, rml_df, fnml_df, config, python_source=None):
-    triples = set()
-    for i, rml_rule in mapping_group_df.iterrows():
-        data = _materialize_rml_rule(rml_rule, rml_df, fnml_df, config, python_source=python_source)
-        triples.update(set(data['triple']))
+def _replace_object_map_with_parent_subject_map(rml_rule, parent_triples_map_rule):
+    # the terms of a referencing object map are generated with the subject map of the parent triples map
+    rml_rule['object_map_type'] = parent_triples_map_rule['subject_map_type']
+    rml_rule['object_map_value'] = parent_triples_map_rule['subject_map_value']
 
-    return triples
 
+def _is_rml_rule_chunkable(rml_rule):
+    """
+    Checks whether the terms of a mapping rule can be generated independently for different chunks of its data.
+    Rules with constant-valued terms only, quoted triples maps or RML-CC gather maps are materialized at once.
+    """
 
-def _materialize_mapping_group_to_file(mapping_group_df, rml_df, fnml_df, config):
-    triples = set()
-    for i, rml_rule in mapping_group_df.iterrows():
-        start_time = time.time()
-        data = _materialize_rml_rule(rml_rule, rml_df, fnml_df, config)
-        triples.update(set(data['triple']))
+    if rml_rule['subject_map_type'] == RML_CONSTANT and rml_rule['predicate_map_type'] == RML_CONSTANT and rml_rule['object_map_type'] == RML_CONSTANT and rml_rule['graph_map_type'] == RML_CONSTANT:
+        return False
+    elif rml_rule['subject_map_type'] == RML_QUOTED_TRIPLES_MAP or rml_rule['object_map_type'] == RML_QUOTED_TRIPLES_MAP:
+        return False
+    elif rml_rule['object_map_type'] == RML_PARENT_TRIPLES_MAP:
+        return True
 
-        logging.debug(f"{len(triples)} triples generated for mapping rule `{rml_rule['triples_map_id']}` "
-                      f"in {get_delta_time(start_time)} seconds.")
+    return pd.isna(rml_rule['gather']) and pd.isna(rml_rule['gather_subject']) and rml_rule['subject_map_type'] != RML_GATHER
 
-    triples_to_file(triples, config, mapping_group_df.iloc[0]['mapping_partition'])
 
-    return len(triples)
+def _is_source_readable_by_execution_engine(rml_rule, execution_engine):
+    if rml_rule['logical_source_type'] == RML_QUERY:
+        # tabular views
+        return rml_rule['source_type'] in FILE_SOURCE_TYPES
 
+    if execution_engine == ARROW_EXECUTION_ENGINE:
+        file_source_types = [CSV, TSV, PARQUET, ORC] + FEATHER
+    else:
+        file_source_types = [CSV, TSV, PARQUET]
 
-def _materialize_mapping_group_to_kafka(mapping_group_df, rml_df, fnml_df, config, python_source=None):
-    triples = set()
+    return rml_rule['source_type'] in file_source_types and os.path.isfile(rml_rule['logical_source_value'])
+
+
+def _are_term_maps_compilable(rml_rule, rml_df):
+    """
+    Checks whether the term maps of a mapping rule are templates, constants or references (or a referencing object
+    map whose parent subject map is so), which can be compiled to the query language of an execution engine.
+    """
+
+    term_map_types = [RML_TEMPLATE, RML_CONSTANT, RML_REFERENCE]
+    if rml_rule['subject_map_type'] not in term_map_types or rml_rule['predicate_map_type'] not in term_map_types:
+        return False
+    elif rml_rule['graph_map_type'] == RML_EXECUTION:
+        return False
+    elif pd.notna(rml_rule['lang_datatype']) and rml_rule['lang_datatype_map_type'] not in term_map_types:
+        return False
+    elif rml_rule['object_map_type'] == RML_PARENT_TRIPLES_MAP:
+        parent_triples_map_rule = get_rml_rule(rml_df, rml_rule['object_map_value'])
+        return parent_triples_map_rule['subject_map_type'] in term_map_types
+
+    return rml_rule['object_map_type'] in term_map_types
+
+
+def _is_rml_rule_materializable_by_execution_engine(rml_rule, rml_df, config):
+    """
+    Checks whether a mapping rule is materialized with the ARROW or DUCKDB execution engine. The logical sources of the
+    rule (and of its parent triples map) must be tabular files or views readable by the engine, and its term maps must
+    be compilable. The rest of the rules are materialized with PANDAS.
+    """
+
+    execution_engine = config.get_execution_engine()
+    if execution_engine == PANDAS_EXECUTION_ENGINE or config.only_write_printable_characters():
+        return False
+    elif not _is_rml_rule_chunkable(rml_rule) or not _is_source_readable_by_execution_engine(rml_rule,
+                                                                                            execution_engine):
+        return False
+    elif rml_rule['object_map_type'] == RML_PARENT_TRIPLES_MAP:
+        parent_triples_map_rule = get_rml_rule(rml_df, rml_rule['object_map_value'])
+        if not _is_source_readable_by_execution_engine(parent_triples_map_rule, execution_engine):
+            return False
+
+    return _are_term_maps_compilable(rml_rule, rml_df)
+
+
+def _are_iri_template_values_ascii(rml_rule, rml_df, config):
+    """
+    Checks whether the values of the references in the IRI templates of a mapping rule (and of the subject map of its
+    parent triples map) are ASCII, i.e. the datatypes of their columns in the schema catalog are not strings or binary.
+    The values are percent-encoded in the relational database for the ASCII characters only.
+    """
+
+    iri_templates = [(rml_rule, 'predicate_map', RML_IRI), (rml_rule, 'subject_map', rml_rule['subject_termtype']),
+                     (rml_rule, 'object_map', rml_rule['object_termtype']), (rml_rule, 'graph_map', RML_IRI)]
+    if rml_rule['lang_datatype'] == RML_DATATYPE_MAP:
+        iri_templates.append((rml_rule, 'lang_datatype_map', RML_IRI))
+    if rml_rule['object_map_type'] == RML_PARENT_TRIPLES_MAP:
+        parent_triples_map_rule = get_rml_rule(rml_df, rml_rule['object_map_value'])
+        iri_templates.append((parent_triples_map_rule, 'subject_map', parent_triples_map_rule['subject_termtype']))
+
+    for rule, term_map, termtype in iri_templates:
+        if rule[f'{term_map}_type'] != RML_TEMPLATE or str(termtype).strip() != RML_IRI:
+            continue
+        for reference in get_references_in_template(rule[f'{term_map}_value']):
+            datatype = get_rdb_reference_datatype(config, rule, reference, get_rdb_table_names(rule))
+            if not datatype or datatype == XSD_HEX_BINARY:
+                # the datatype is unknown (e.g., in SQLite) or the values may have non-ASCII characters
+                return False
+
+    return True
+
+
+def _is_rml_rule_pushed_down_to_rdb(rml_rule, rml_df, config):
+    """
+    Checks whether the triples of a mapping rule are generated in the relational database. The logical source of the
+    rule (and of its parent triples map) must be in the same database, its term maps must be compilable and the values
+    of its IRI templates must be ASCII.
+    """
+
+    if not config.push_down_sql() or config.only_write_printable_characters():
+        return False
+    elif rml_rule['source_type'] != RDB or not _is_rml_rule_chunkable(rml_rule):
+        return False
+    elif rml_rule['object_map_type'] == RML_PARENT_TRIPLES_MAP:
+        parent_triples_map_rule = get_rml_rule(rml_df, rml_rule['object_map_value'])
+        if parent_triples_map_rule['source_type'] != RDB or \
+                parent_triples_map_rule['source_name'] != rml_rule['source_name']:
+            return False
+
+    return _are_term_maps_compilable(rml_rule, rml_df) and _are_iri_template_values_ascii(rml_rule, rml_df, config)
+
+
+def _is_rml_rule_scan_shareable(rml_rule, rml_df, config, source_partition=None):
+    """
+    Checks whether the logical source of a mapping rule can be read in a scan shared with other mapping rules. The rule
+    must be materialized in chunks with PANDAS and its terms must be generated from the data of its logical source
+    only, which must be read chunk by chunk and selectable.
+    """
+
+    if not config.is_chunking_enabled() and source_partition is None:
+        # the logical sources read at once are shared with the source cache
+        return False
+    elif rml_rule['source_type'] != RDB and rml_rule['source_type'] not in FILE_SOURCE_TYPES:
+        return False
+    elif not _is_rml_rule_chunkable(rml_rule) or rml_rule['object_map_type'] == RML_PARENT_TRIPLES_MAP:
+        return False
+    elif _is_rml_rule_materializable_by_execution_engine(rml_rule, rml_df, config) or \
+            _is_rml_rule_pushed_down_to_rdb(rml_rule, rml_df, config):
+        return False
+
+    return _is_source_data_selectable(rml_rule)
+
+
+def _get_shared_scans(mapping_group_df, rml_df, fnml_df, config, source_partition=None):
+    """
+    Plans the scans of the logical sources of a mapping group. The mapping rules that can share a scan are grouped by
+    their logical source (the source and its iterator), and the logical sources used by several rules are scanned
+    once with the references of all of them. Returns a list with the rules of each shared scan.
+    """
+
+    logical_source_rules = {}
     for i, rml_rule in mapping_group_df.iterrows():
+        if _is_rml_rule_scan_shareable(rml_rule, rml_df, config, source_partition) and \
+                _get_references_in_rml_rule(rml_rule, rml_df, fnml_df):
+            logical_source_rules.setdefault(_get_logical_source_key(rml_rule), []).append(i)
+
+    return [mapping_group_df.loc[rule_indexes] for rule_indexes in logical_source_rules.values() if
+            len(rule_indexes) > 1]
+
+
+def _split_in_chunks(data, chunk_size):
+    if 0 < chunk_size < len(data):
+        for i in range(0, len(data), chunk_size):
+            yield data.iloc[i:i + chunk_size].copy()
+    else:
+        yield data
+
+
+def _materialize_rml_rule_in_chunks(rml_rule, rml_df, fnml_df, config, python_source=None, source_partition=None,
+                                    join_cache=None):
+    """
+    Materializes a mapping rule yielding DataFrames with the generated triples in the `triple` column. If chunking is
+    enabled, the data of the rule is read, preprocessed and materialized in chunks of at most chunk_size rows, so that
+    the triples can be written to the output before the rest of the data is read. The data of the parent triples map
+    of a referencing object map is read at once, as every chunk of the child data is joined with all of it. If
+    source_partition is provided, only that partition of the logical source of the rule is materialized. The prepared
+    data of the parent triples map is kept in join_cache if it is provided, otherwise, if the child data is read at
+    once, only the parent data that joins with it is read.
+    """
+
+    if _is_rml_rule_materializable_by_execution_engine(rml_rule, rml_df, config):
+        if config.get_execution_engine() == ARROW_EXECUTION_ENGINE:
+            # pyarrow is only required for the ARROW execution engine
+            from .arrow_materializer import _materialize_rml_rule_in_chunks_with_arrow
+
+            yield from _materialize_rml_rule_in_chunks_with_arrow(rml_rule, rml_df, fnml_df, config, source_partition)
+        else:
+            from .duckdb_materializer import _materialize_rml_rule_in_chunks_with_duckdb
+
+            yield from _materialize_rml_rule_in_chunks_with_duckdb(rml_rule, rml_df, fnml_df, config, source_partition)
+        return
+    elif _is_rml_rule_pushed_down_to_rdb(rml_rule, rml_df, config):
+        from .sql_materializer import _materialize_rml_rule_in_chunks_in_rdb
+
+        yield from _materialize_rml_rule_in_chunks_in_rdb(rml_rule, rml_df, fnml_df, config, source_partition)
+        return
+
+    rml_rule = rml_rule.copy()
+    chunk_size = config.get_chunk_size()
+
+    if not _is_rml_rule_chunkable(rml_rule):
+        data = _materialize_rml_rule(rml_rule, rml_df, fnml_df, config, python_source=python_source,
+                                     join_cache=join_cache)
+        yield from _split_in_chunks(data, chunk_size)
+        return
+
+    references = set(_get_references_in_rml_rule(rml_rule, rml_df, fnml_df))
+
+    parent_data = None
+    hash_join = None
+    columns_alias = ''
+    data_chunks = None
+    if rml_rule['object_map_type'] == RML_PARENT_TRIPLES_MAP:
+        parent_triples_map_rule = get_rml_rule(rml_df, rml_rule['object_map_value'])
+        parent_references = set(
+            _get_references_in_rml_rule(parent_triples_map_rule, rml_df, fnml_df, only_subject_map=True))
+        references, parent_references = _add_references_in_join_condition(rml_rule, references, parent_references)
+
+        if _is_join_pushed_down_to_rdb(rml_rule, rml_df):
+            # the logical sources are joined in the database
+            data_chunks = _get_joined_data_in_chunks(config, rml_rule, parent_triples_map_rule, references,
+                                                     parent_references, source_partition)
+        else:
+            join_values = None
+            if join_cache is None and source_partition is None and not config.is_chunking_enabled():
+                # the child data is read at once, only the parent data that joins with it is read
+                data = _get_data(config, rml_rule, references, python_source)
+                join_values = _get_join_values(data, rml_rule)
+                data_chunks = [data]
+
+            parent_data, hash_join = _get_parent_data(config, rml_rule, parent_triples_map_rule, parent_references,
+                                                      python_source, join_cache, join_values,
+                                                      config.get_join_memory_limit() * 1024 * 1024)
+
+        _replace_object_map_with_parent_subject_map(rml_rule, parent_triples_map_rule)
+        columns_alias = 'parent_'
+
+    if data_chunks is None:
+        data_chunks = _get_data_in_chunks(config, rml_rule, references, python_source, source_partition)
+
+    if hash_join is not None:
+        data_chunks = _join_data_partitions(data_chunks, hash_join, rml_rule)
+    for data in data_chunks:
+        if parent_data is not None:
+            data = _join_data(data, parent_data, rml_rule, 'object_join_conditions')
+
+        # the join can generate more rows than the chunk had
+        for data_chunk in _split_in_chunks(data, chunk_size):
+            data_chunk = _materialize_rml_rule_terms(data_chunk, rml_rule, fnml_df, config, columns_alias=columns_alias)
+            yield _materialize_triples(data_chunk, rml_rule, fnml_df, config)
+
+
+def _materialize_shared_scan_in_chunks(shared_scan_df, rml_df, fnml_df, config, source_partition=None):
+    """
+    Materializes the mapping rules of a shared scan yielding DataFrames with the generated triples in the `triple`
+    column. The logical source is read in chunks once with the references of all the rules, and each chunk is
+    preprocessed and materialized for every rule, selecting the references of the rule.
+    """
+
+    start_time = time.time()
+    chunk_size = config.get_chunk_size()
+
+    rml_rules = [rml_rule for i, rml_rule in shared_scan_df.iterrows()]
+    rules_references = [set(_get_references_in_rml_rule(rml_rule, rml_df, fnml_df)) for rml_rule in rml_rules]
+    references = set().union(*rules_references)
+    rules_num_triples = [0] * len(rml_rules)
+
+    for data in _read_data_in_chunks(config, rml_rules[0], references, source_partition):
+        data = _normalize_data(data, rml_rules[0], references, config)
+        for position, (rml_rule, rule_references) in enumerate(zip(rml_rules, rules_references)):
+            rule_data = _clean_data(data[list(rule_references)], rule_references, config)
+            for data_chunk in _split_in_chunks(rule_data, chunk_size):
+                data_chunk = _materialize_rml_rule_terms(data_chunk, rml_rule, fnml_df, config)
+                data_chunk = _materialize_triples(data_chunk, rml_rule, fnml_df, config)
+                rules_num_triples[position] += len(data_chunk)
+                yield data_chunk
+
+    for rml_rule, num_triples in zip(rml_rules, rules_num_triples):
+        logging.debug(f"{num_triples} triples generated for mapping rule `{rml_rule['triples_map_id']}` in a scan "
+                      f"shared by {len(rml_rules)} mapping rules in {get_delta_time(start_time)} seconds.")
+
+
+def _materialize_mapping_group_in_chunks(mapping_group_df, rml_df, fnml_df, config, python_source=None,
+                                         source_partition=None, shard=None):
+    """
+    Yields the triples of a mapping group in chunks. If source_partition is provided, only that partition of the
+    logical sources of the mapping rules is materialized. If shard is provided, the triples are read from the shard
+    files written for the partitions of the mapping group instead.
+    """
+
+    if shard is not None:
+        yield from _read_triples_shard(shard)
+        return
+
+    # the logical sources used by several mapping rules are scanned once for all of them
+    for shared_scan_df in _get_shared_scans(mapping_group_df, rml_df, fnml_df, config, source_partition):
+        for data in _materialize_shared_scan_in_chunks(shared_scan_df, rml_df, fnml_df, config, source_partition):
+            yield data['triple']
+        mapping_group_df = mapping_group_df.drop(shared_scan_df.index)
+
+    # the prepared data of a parent triples map is kept while other mapping rules of the group join it, the parent
+    # data of the rest of referencing object maps is filtered with the child join values
+    join_keys = [_get_parent_join_key(rml_rule) for i, rml_rule in mapping_group_df.iterrows()]
+    join_cache = {}
+
+    for position, (i, rml_rule) in enumerate(mapping_group_df.iterrows()):
         start_time = time.time()
-        data = _materialize_rml_rule(rml_rule, rml_df, fnml_df, config, python_source=python_source)
-        triples.update(set(data['triple']))
+        num_triples = 0
+        rule_join_cache = join_cache if join_keys.count(join_keys[position]) > 1 else None
+        for data in _materialize_rml_rule_in_chunks(rml_rule, rml_df, fnml_df, config, python_source=python_source,
+                                                    source_partition=source_partition, join_cache=rule_join_cache):
+            num_triples += len(data)
+            yield data['triple']
 
-        logging.debug(f"{len(triples)} triples generated for mapping rule `{rml_rule['triples_map_id']}` "
+        if join_keys[position] not in join_keys[position + 1:]:
+            join_cache.pop(join_keys[position], None)
+
+        logging.debug(f"{num_triples} triples generated for mapping rule `{rml_rule['triples_map_id']}` "
                       f"in {get_delta_time(start_time)} seconds.")
 
-    triples_to_kafka(triples, config)
 
-    return len(triples)
+def _write_triples_to_shards(triples, shard_files):
+    # triples are assigned to shards by their hash, so that equal triples are written to the same shard
+    triples = pd.Series(list(triples), dtype=object)
+    shard_indexes = pd.util.hash_pandas_object(triples, index=False) % len(shard_files)
+    for shard_index, shard_file in enumerate(shard_files):
+        for triple in triples[(shard_indexes == shard_index).values]:
+            shard_file.write(f'{triple}\n')
+
+
+def _read_triples_shard(shard):
+    shards_dir, shard_index, num_partitions = shard
+
+    for partition_index in range(num_partitions):
+        with open(os.path.join(shards_dir, f'{partition_index}_{shard_index}.nt'), encoding='utf-8') as shard_file:
+            triples = [line[:-1] for line in islice(shard_file, SHARD_BATCH_SIZE)]
+            while triples:
+                yield triples
+                triples = [line[:-1] for line in islice(shard_file, SHARD_BATCH_SIZE)]
+
+
+def _materialize_mapping_group_partition_to_shards(mapping_group_df, rml_df, fnml_df, config, source_partition,
+                                                   shards_dir, python_source=None):
+    """
+    Materializes a partition of the logical sources of a mapping group and writes its triples to as many shard files
+    as partitions. A triple generated in several partitions is written to the same shard by all of them, hence the
+    duplicates across partitions are removed when each shard is materialized.
+    """
+
+    partition_index, num_partitions = source_partition
+
+    shard_files = [open(os.path.join(shards_dir, f'{partition_index}_{shard_index}.nt'), 'w', encoding='utf-8')
+                   for shard_index in range(num_partitions)]
+    try:
+        triples_deduplicator = get_triples_deduplicator(config)
+        for triples in _materialize_mapping_group_in_chunks(mapping_group_df, rml_df, fnml_df, config,
+                                                            python_source=python_source,
+                                                            source_partition=source_partition):
+            _write_triples_to_shards(triples_deduplicator.add(triples), shard_files)
+        for triples in triples_deduplicator.finish():
+            _write_triples_to_shards(triples, shard_files)
+    finally:
+        for shard_file in shard_files:
+            shard_file.close()
+
+
+def _materialize_mapping_group_to_set(mapping_group_df, rml_df, fnml_df, config, python_source=None, shard=None):
+    triples = set()
+    for triples_chunk in _materialize_mapping_group_in_chunks(mapping_group_df, rml_df, fnml_df, config,
+                                                              python_source=python_source, shard=shard):
+        triples.update(triples_chunk)
+
+    return triples
+
+
+def _materialize_mapping_group_to_file(mapping_group_df, rml_df, fnml_df, config, python_source=None, shard=None):
+    mapping_group = mapping_group_df.iloc[0]['mapping_partition']
+
+    # the output file is opened once for all the chunks of the mapping group (if it generates triples) and it is
+    # synced to disk once at the end
+    output_file = None
+
+    def write_triples(triples):
+        nonlocal output_file
+        if output_file is None:
+            output_file = open(config.get_output_file_path(mapping_group), 'a', encoding='utf-8')
+        triples_to_file(triples, output_file)
+
+    try:
+        triples_deduplicator = get_triples_deduplicator(config)
+        for triples in _materialize_mapping_group_in_chunks(mapping_group_df, rml_df, fnml_df, config,
+                                                            python_source=python_source, shard=shard):
+            # write the triples of the chunk straight away, only those not generated before are written
+            triples = triples_deduplicator.add(triples)
+            if triples:
+                write_triples(triples)
+
+        # write the triples whose output was postponed by the deduplicator
+        for triples in triples_deduplicator.finish():
+            write_triples(triples)
+
+        if output_file is not None:
+            os.fsync(output_file.fileno())
+    finally:
+        if output_file is not None:
+            output_file.close()
+
+    return len(triples_deduplicator)
+
+
+def _materialize_mapping_group_to_kafka(mapping_group_df, rml_df, fnml_df, config, python_source=None, shard=None):
+    triples_deduplicator = get_triples_deduplicator(config)
+    for triples in _materialize_mapping_group_in_chunks(mapping_group_df, rml_df, fnml_df, config,
+                                                        python_source=python_source, shard=shard):
+        triples = triples_deduplicator.add(triples)
+        if triples:
+            triples_to_kafka(triples, config)
+
+    # write the triples whose output was postponed by the deduplicator
+    for triples in triples_deduplicator.finish():
+        triples_to_kafka(triples, config)
+
+    return len(triples_deduplicator)
 
 
 def manage_several_templates_named_cc(json_data, refs, rml_rule, df, results_df):
@@ -0,0 +1,357 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import os
+import shutil
+import logging
+import tempfile
+import multiprocessing as mp
+
+from .constants import *
+from .materializer import _get_logical_source_key, _get_source_key, _get_source_references, _is_source_cacheable, \
+    _is_rml_rule_chunkable, _is_rml_rule_materializable_by_execution_engine, _is_rml_rule_pushed_down_to_rdb, \
+    _is_join_pushed_down_to_rdb, _materialize_mapping_group_partition_to_shards
+from .data_source.data_file import _is_csv_file_splittable, get_csv_partition_offsets, set_csv_partition_offsets, \
+    clear_csv_partition_offsets
+from .data_source.relational_db import get_sql_row_count, log_db_engines_statistics, dispose_db_engines
+from .data_source.source_cache import SourceCache, get_source_cache, set_source_cache
+
+
+# estimated size in bytes of a record in a data file, used to estimate the number of records of files
+ESTIMATED_RECORD_SIZE = 100
+# estimated number of rows of the logical sources whose size is unknown (e.g. SQL tables without count_sql_rows)
+DEFAULT_SOURCE_ROWS = 100000
+# the join in a referencing object map is more costly than materializing the rows of the child and parent sources
+JOIN_COST_FACTOR = 2
+
+
+# state of the worker process, it is set once by the initializer of the pool
+_worker_state = {}
+
+
+def _init_worker(rml_df, fnml_df, config, python_source=None, csv_partition_offsets=None):
+    """
+    Initializes a worker process with the mapping rules, the config and the Python source, so that they are sent once
+    to each worker instead of with every task. csv_partition_offsets are the offsets of the partitions of the CSV files
+    computed in the main process.
+    """
+
+    _worker_state['rml_df'] = rml_df
+    _worker_state['fnml_df'] = fnml_df
+    _worker_state['config'] = config
+    _worker_state['python_source'] = python_source
+    # keep only asserted mapping rules
+    _worker_state['asserted_mapping_df'] = rml_df.loc[rml_df['triples_map_type'] == RML_TRIPLES_MAP_CLASS]
+    if csv_partition_offsets:
+        set_csv_partition_offsets(csv_partition_offsets)
+
+    # the source cache is opt-in, and it is not used with chunking, as it would hold whole logical sources
+    if config.get_source_cache_memory_limit() > 0 and not config.is_chunking_enabled():
+        # the memory limit is provided in MB
+        set_source_cache(SourceCache(config.get_source_cache_memory_limit() * 1024 * 1024))
+
+
+def _materialize_bundle(mapping_partitions, materialize_mapping_group):
+    """
+    Materializes the mapping groups in a bundle with materialize_mapping_group. The uses of logical sources in the
+    bundle are declared in the source cache of the process, so that the sources shared by mapping rules are read once.
+    """
+
+    rml_df = _worker_state['rml_df']
+    fnml_df = _worker_state['fnml_df']
+    config = _worker_state['config']
+    python_source = _worker_state['python_source']
+    asserted_mapping_df = _worker_state['asserted_mapping_df']
+
+    mapping_groups = [asserted_mapping_df.loc[asserted_mapping_df['mapping_partition'] == mapping_partition]
+                      for mapping_partition in mapping_partitions]
+
+    source_cache = get_source_cache()
+    if source_cache is not None:
+        for mapping_group_df in mapping_groups:
+            for i, rml_rule in mapping_group_df.iterrows():
+                if _is_rml_rule_materializable_by_execution_engine(rml_rule, rml_df, config) or \
+                        _is_rml_rule_pushed_down_to_rdb(rml_rule, rml_df, config) or \
+                        _is_join_pushed_down_to_rdb(rml_rule, rml_df):
+                    # the ARROW and DUCKDB execution engines and the SQL push-downs do not use the source cache
+                    continue
+                for source_rml_rule, references in _get_source_references(rml_rule, rml_df, fnml_df):
+                    if _is_source_cacheable(source_rml_rule):
+                        source_cache.declare_use(_get_source_key(source_rml_rule, references), references)
+
+    mapping_groups_results = [
+        materialize_mapping_group(mapping_group_df, rml_df, fnml_df, config, python_source=python_source)
+        for mapping_group_df in mapping_groups]
+
+    if source_cache is not None:
+        source_cache.log_statistics()
+    log_db_engines_statistics()
+
+    return mapping_groups_results
+
+
+def _materialize_source_partition(mapping_partition, source_partition, shards_dir):
+    """
+    Materializes a partition of the logical sources of a mapping group, writing its triples to the shard files in
+    shards_dir. The triples are output when the shards are materialized.
+    """
+
+    asserted_mapping_df = _worker_state['asserted_mapping_df']
+    mapping_group_df = asserted_mapping_df.loc[asserted_mapping_df['mapping_partition'] == mapping_partition]
+
+    _materialize_mapping_group_partition_to_shards(mapping_group_df, _worker_state['rml_df'],
+                                                   _worker_state['fnml_df'], _worker_state['config'],
+                                                   source_partition, shards_dir, _worker_state['python_source'])
+
+    return []
+
+
+def _materialize_shard(mapping_partition, shard, materialize_mapping_group):
+    """
+    Materializes with materialize_mapping_group a shard of the triples of a mapping group whose logical sources were
+    split in partitions, removing the duplicated triples generated in different partitions.
+    """
+
+    asserted_mapping_df = _worker_state['asserted_mapping_df']
+    mapping_group_df = asserted_mapping_df.loc[asserted_mapping_df['mapping_partition'] == mapping_partition]
+
+    return [materialize_mapping_group(mapping_group_df, _worker_state['rml_df'], _worker_state['fnml_df'],
+                                      _worker_state['config'], python_source=_worker_state['python_source'],
+                                      shard=shard)]
+
+
+def _run_task(task):
+    # tasks are sent to the pool with their function, so that different kinds of tasks are scheduled together
+    task_function, task_args = task
+    return task_function(*task_args)
+
+
+def _estimate_source_rows(config, rml_rule, python_source=None):
+    """
+    Estimates the number of rows of the logical source of a mapping rule with the number of rows in the metadata of
+    Parquet files, the size of other local files, the length of Python sources and, if count_sql_rows is enabled, with
+    a COUNT(*) SQL query.
+    """
+
+    source_type = rml_rule['source_type']
+    logical_source_value = rml_rule['logical_source_value']
+
+    try:
+        if source_type == RDB:
+            if config.count_sql_rows():
+                return get_sql_row_count(config, rml_rule)
+        elif rml_rule['logical_source_type'] == RML_QUERY:
+            # the size of the results of tabular views is unknown
+            pass
+        elif source_type == PARQUET and os.path.isfile(logical_source_value):
+            import pyarrow.parquet as pq
+
+            return pq.ParquetFile(logical_source_value).metadata.num_rows
+        elif source_type in FILE_SOURCE_TYPES and os.path.isfile(logical_source_value):
+            return os.path.getsize(logical_source_value) // ESTIMATED_RECORD_SIZE + 1
+        elif source_type in IN_MEMORY_TYPES and python_source:
+            return len(python_source[logical_source_value[1:-1]])
+    except Exception as e:
+        logging.debug(f"The size of the logical source of mapping rule `{rml_rule['triples_map_id']}` could not be "
+                      f"estimated: {e}")
+
+    return DEFAULT_SOURCE_ROWS
+
+
+def _estimate_mapping_group_costs(asserted_mapping_df, rml_df, fnml_df, config, python_source=None):
+    """
+    Estimates the cost of materializing each mapping group as the number of rows read by its mapping rules, weighting
+    the rows of referencing object maps with JOIN_COST_FACTOR. Returns a dictionary with the cost of each mapping
+    partition and another with the logical sources used in each mapping partition.
+    """
+
+    sources_rows = {}
+    mapping_group_costs = {}
+    mapping_group_sources = {}
+    for i, rml_rule in asserted_mapping_df.iterrows():
+        mapping_partition = rml_rule['mapping_partition']
+
+        rml_rule_cost = 0
+        source_references = _get_source_references(rml_rule, rml_df, fnml_df)
+        for source_rml_rule, references in source_references:
+            logical_source_key = _get_logical_source_key(source_rml_rule)
+            if logical_source_key not in sources_rows:
+                sources_rows[logical_source_key] = _estimate_source_rows(config, source_rml_rule, python_source)
+            rml_rule_cost += sources_rows[logical_source_key]
+            mapping_group_sources.setdefault(mapping_partition, set()).add(logical_source_key)
+        if len(source_references) > 1:
+            rml_rule_cost *= JOIN_COST_FACTOR
+
+        mapping_group_costs[mapping_partition] = mapping_group_costs.get(mapping_partition, 0) + rml_rule_cost
+
+    return mapping_group_costs, mapping_group_sources
+
+
+def _split_bundle(bundle, mapping_group_costs):
+    # assign the mapping groups from the most costly to the half with less cost
+    bundle_halves = [[], []]
+    bundle_halves_costs = [0, 0]
+    for mapping_partition in sorted(bundle, key=lambda mapping_partition: mapping_group_costs[mapping_partition],
+                                    reverse=True):
+        i = bundle_halves_costs.index(min(bundle_halves_costs))
+        bundle_halves[i].append(mapping_partition)
+        bundle_halves_costs[i] += mapping_group_costs[mapping_partition]
+
+    return bundle_halves
+
+
+def _get_mapping_group_bundles(asserted_mapping_df, rml_df, fnml_df, config, number_of_bundles, python_source=None):
+    """
+    Bundles the mapping groups that share logical sources, so that they are materialized by the same worker and the
+    sources are read once. If there are fewer bundles than number_of_bundles, the most costly bundles are split so
+    that all the workers are used. Bundles are lists of mapping partitions, they are returned with their estimated
+    costs sorted from the most costly to the least, so that the most costly are not the last to be scheduled.
+    """
+
+    mapping_group_costs, partitions_sources = _estimate_mapping_group_costs(asserted_mapping_df, rml_df, fnml_df,
+                                                                            config, python_source)
+
+    # each bundle is a list of mapping partitions and the set of logical sources used in them
+    bundles = []
+    for mapping_partition in sorted(partitions_sources):
+        bundle_partitions, bundle_sources = [mapping_partition], set(partitions_sources[mapping_partition])
+        # merge the bundles that share a logical source with the mapping partition
+        for other_bundle_partitions, other_bundle_sources in [bundle for bundle in bundles if
+                                                              bundle[1] & bundle_sources]:
+            bundles.remove((other_bundle_partitions, other_bundle_sources))
+            bundle_partitions = other_bundle_partitions + bundle_partitions
+            bundle_sources.update(other_bundle_sources)
+        bundles.append((bundle_partitions, bundle_sources))
+    bundles = [bundle_partitions for bundle_partitions, bundle_sources in bundles]
+
+    bundles = [(sum(mapping_group_costs[mapping_partition] for mapping_partition in bundle), bundle)
+               for bundle in bundles]
+    while len(bundles) < number_of_bundles:
+        splittable_bundles = [bundle for bundle in bundles if len(bundle[1]) > 1]
+        if not splittable_bundles:
+            break
+        most_costly_bundle = max(splittable_bundles)
+        bundles.remove(most_costly_bundle)
+        for bundle_half in _split_bundle(most_costly_bundle[1], mapping_group_costs):
+            bundles.append((sum(mapping_group_costs[mapping_partition] for mapping_partition in bundle_half),
+                            bundle_half))
+
+    return sorted(bundles, reverse=True)
+
+
+def _get_source_partitioned_mapping_groups(bundles, asserted_mapping_df, config):
+    """
+    Selects the bundles with a single mapping group whose estimated cost is larger than the share of a process, so that
+    the logical sources of their mapping groups are split in source_partitions partitions. Mapping groups with rules
+    that cannot be materialized in chunks are not split. Returns the remaining bundles and the mapping partitions of
+    the selected mapping groups, both with their estimated costs.
+    """
+
+    if config.get_source_partitions() < 2:
+        return bundles, []
+
+    process_cost = sum(bundle_cost for bundle_cost, bundle in bundles) / config.get_number_of_processes()
+
+    remaining_bundles = []
+    source_partitioned_mapping_groups = []
+    for bundle_cost, bundle in bundles:
+        if len(bundle) == 1 and bundle_cost > process_cost and all(
+                _is_rml_rule_chunkable(rml_rule) for i, rml_rule in
+                asserted_mapping_df.loc[asserted_mapping_df['mapping_partition'] == bundle[0]].iterrows()):
+            source_partitioned_mapping_groups.append((bundle_cost, bundle[0]))
+        else:
+            remaining_bundles.append((bundle_cost, bundle))
+
+    return remaining_bundles, source_partitioned_mapping_groups
+
+
+def _get_csv_partition_offsets(mapping_partitions, asserted_mapping_df, num_partitions):
+    """
+    Computes the offsets of the partitions of the CSV files of the mapping groups whose logical sources are split in
+    partitions. Each file is scanned once in the main process instead of once in each partition.
+    """
+
+    csv_partition_offsets = {}
+    for i, rml_rule in asserted_mapping_df.loc[
+            asserted_mapping_df['mapping_partition'].isin(mapping_partitions)].iterrows():
+        if rml_rule['source_type'] in [CSV, TSV] and rml_rule['logical_source_type'] != RML_QUERY and \
+                _is_csv_file_splittable(rml_rule['logical_source_value']):
+            file_path = rml_rule['logical_source_value']
+            csv_partition_offsets[(file_path, num_partitions)] = get_csv_partition_offsets(file_path, num_partitions)
+
+    return csv_partition_offsets
+
+
+def materialize_mapping_groups(materialize_mapping_group, rml_df, fnml_df, config, python_source=None):
+    """
+    Materializes the mapping groups of the asserted mapping rules with the function materialize_mapping_group, which
+    is called with the DataFrame of each mapping group. Returns a list with the results for all the mapping groups.
+    """
+
+    # keep only asserted mapping rules
+    asserted_mapping_df = rml_df.loc[rml_df['triples_map_type'] == RML_TRIPLES_MAP_CLASS]
+
+    if config.is_multiprocessing_enabled():
+        logging.debug(f'Parallelizing with {config.get_number_of_processes()} cores.')
+
+        bundles = _get_mapping_group_bundles(asserted_mapping_df, rml_df, fnml_df, config,
+                                             config.get_number_of_processes(), python_source)
+        logging.debug(f'{len(bundles)} bundles of mapping groups sharing logical sources with estimated costs: '
+                      f'{[bundle_cost for bundle_cost, bundle in bundles]}.')
+
+        bundles, source_partitioned_mapping_groups = _get_source_partitioned_mapping_groups(bundles,
+                                                                                            asserted_mapping_df, config)
+        num_partitions = config.get_source_partitions()
+
+        tasks = [(bundle_cost, (_materialize_bundle, (bundle, materialize_mapping_group)))
+                 for bundle_cost, bundle in bundles]
+        shard_tasks = []
+        shards_dirs = []
+        for mapping_group_cost, mapping_partition in source_partitioned_mapping_groups:
+            logging.debug(f'The logical sources of mapping group {mapping_partition} are split in {num_partitions} '
+                          f'partitions.')
+            shards_dir = tempfile.mkdtemp(prefix='morph_kgc_', dir=config.get_temporary_dir() or None)
+            shards_dirs.append(shards_dir)
+            for i in range(num_partitions):
+                tasks.append((mapping_group_cost / num_partitions,
+                              (_materialize_source_partition, (mapping_partition, (i, num_partitions), shards_dir))))
+                shard_tasks.append((mapping_group_cost / num_partitions,
+                                    (_materialize_shard, (mapping_partition, (shards_dir, i, num_partitions),
+                                                          materialize_mapping_group))))
+
+        csv_partition_offsets = _get_csv_partition_offsets(
+            [mapping_partition for mapping_group_cost, mapping_partition in source_partitioned_mapping_groups],
+            asserted_mapping_df, num_partitions)
+
+        pool = mp.Pool(config.get_number_of_processes(), initializer=_init_worker,
+                       initargs=(rml_df, fnml_df, config, python_source, csv_partition_offsets))
+        try:
+            # tasks are dispatched from the most costly to the least as workers become available, the shards are
+            # materialized once all the partitions of their mapping groups were materialized
+            bundles_results = []
+            for phase_tasks in [tasks, shard_tasks]:
+                phase_tasks.sort(key=lambda task: task[0], reverse=True)
+                bundles_results.extend(pool.imap_unordered(_run_task, [task for task_cost, task in phase_tasks]))
+            pool.close()
+            pool.join()
+        finally:
+            for shards_dir in shards_dirs:
+                shutil.rmtree(shards_dir, ignore_errors=True)
+    else:
+        bundles = _get_mapping_group_bundles(asserted_mapping_df, rml_df, fnml_df, config, 1, python_source)
+
+        _init_worker(rml_df, fnml_df, config, python_source)
+        bundles_results = [_materialize_bundle(bundle, materialize_mapping_group) for bundle_cost, bundle in bundles]
+        _worker_state.clear()
+        set_source_cache(None)
+
+    # the connections of the engines used in the materialization and to parse the mappings are closed
+    dispose_db_engines()
+    clear_csv_partition_offsets()
+
+    return [result for bundle_results in bundles_results for result in bundle_results]
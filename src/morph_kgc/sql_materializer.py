@@ -0,0 +1,275 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import string
+import logging
+
+from .constants import *
+from .utils import get_rml_rule, get_references_in_join_condition
+from .materializer import _add_references_in_join_condition, _compile_template, _get_references_in_rml_rule, \
+    _replace_object_map_with_parent_subject_map, LITERAL_ESCAPES
+from .data_source.relational_db import _relational_db_connection, _replace_query_enclosing_characters, \
+    _get_sql_partition_conditions, get_sql_query_results_in_chunks
+
+
+# ASCII characters that are percent-encoded in IRIs, unreserved characters in RFC 3986 are not
+IRI_ENCODED_CHARACTERS = [char for char in ' ' + string.punctuation if char not in '-._~']
+
+# string types to cast the values of the references in each SQL dialect
+SQL_STRING_TYPE = {
+    MYSQL: 'CHAR',
+    MARIADB: 'CHAR',
+    MSSQL: 'NVARCHAR(MAX)',
+    ORACLE: 'VARCHAR2(4000)',
+    DATABRICKS: 'STRING',
+}
+
+# integer types to cast the values of the references in each SQL dialect
+SQL_INTEGER_TYPE = {
+    MYSQL: 'SIGNED',
+    MARIADB: 'SIGNED',
+    ORACLE: 'NUMBER(19)',
+}
+
+
+def _sql_identifier(identifier, db_dialect):
+    # replacements of `.` to deal with schema-qualified names (see issue #89)
+    return _replace_query_enclosing_characters(f"`{identifier.replace('.', '`.`')}`", db_dialect)
+
+
+def _sql_alias(identifier, db_dialect):
+    # aliases are not schema-qualified
+    return _replace_query_enclosing_characters(f'`{identifier}`', db_dialect)
+
+
+def _sql_concat(expressions, db_dialect):
+    if len(expressions) == 1:
+        return expressions[0]
+    elif db_dialect in [MYSQL, MARIADB, MSSQL]:
+        return f"CONCAT({', '.join(expressions)})"
+    else:
+        return ' || '.join(expressions)
+
+
+def _sql_character(char, db_dialect):
+    if db_dialect in [MYSQL, MARIADB]:
+        return f'CHAR({ord(char)} USING utf8mb4)'
+    elif db_dialect in [POSTGRESQL, ORACLE]:
+        return f'CHR({ord(char)})'
+    else:
+        return f'CHAR({ord(char)})'
+
+
+def _sql_string(value, db_dialect):
+    """
+    Writes a string as a SQL expression. Control characters and backslashes (which are escape characters in MySQL) are
+    written with the character function of the dialect.
+    """
+
+    expressions = []
+    literal = ''
+    for char in value:
+        if char == '\\' or not char.isprintable():
+            if literal:
+                expressions.append(f"'{literal}'")
+                literal = ''
+            expressions.append(_sql_character(char, db_dialect))
+        else:
+            literal += "''" if char == "'" else char
+    if literal or not expressions:
+        expressions.append(f"'{literal}'")
+
+    return _sql_concat(expressions, db_dialect)
+
+
+def _sql_cast(expression, sql_type):
+    return f'CAST({expression} AS {sql_type})'
+
+
+def _get_source_query(rml_rule, references, config, db_dialect, columns_prefix='', partition_condition=None):
+    """
+    Builds the query that selects the references of a mapping rule from its logical source as strings, removing the
+    rows with NULL values in any reference. The partition_condition selects the rows of a partition of a table.
+    """
+
+    if rml_rule['logical_source_type'] == RML_QUERY:
+        # the query is nested, remove the final semicolon
+        relation = f"({rml_rule['logical_source_value'].strip().rstrip(';')}) logical_source"
+    else:
+        relation = _sql_identifier(rml_rule['logical_source_value'], db_dialect)
+
+    string_type = SQL_STRING_TYPE.get(db_dialect, 'VARCHAR')
+    na_values = config.get_na_values()
+    if db_dialect == ORACLE:
+        # empty strings are NULL in Oracle, comparing with them would remove all the rows
+        na_values = [na_value for na_value in na_values if na_value]
+    na_values = ', '.join(_sql_string(na_value, db_dialect) for na_value in na_values)
+
+    select_clause = []
+    where_clause = []
+    for reference in sorted(references):
+        column = _sql_identifier(reference, db_dialect)
+        select_clause.append(f'{_sql_cast(column, string_type)} AS {_sql_alias(columns_prefix + reference, db_dialect)}')
+        where_clause.append(f'{column} IS NOT NULL')
+        if na_values:
+            where_clause.append(f'{_sql_cast(column, string_type)} NOT IN ({na_values})')
+    if partition_condition:
+        where_clause.append(_replace_query_enclosing_characters(partition_condition, db_dialect))
+
+    source_query = f"SELECT {', '.join(select_clause)} FROM {relation}"
+    if where_clause:
+        source_query += f" WHERE {' AND '.join(where_clause)}"
+
+    return source_query
+
+
+def _materialize_template_sql(template, expression_type, config, db_dialect, columns_alias='', termtype='',
+                              datatype=''):
+    """
+    Compiles a term map to a SQL expression concatenating the segments of the template with the values of the
+    references. IRIs are percent-encoded with nested replacements of the ASCII characters that must be encoded, the
+    rules whose IRI templates may have non-ASCII values are not pushed down (see _are_iri_template_values_ascii).
+    """
+
+    template_segments, references = _compile_template(template, expression_type, termtype)
+
+    if not references:
+        return _sql_string(template_segments[0], db_dialect)
+
+    template_expressions = []
+    for template_segment, reference in zip(template_segments, references):
+        # the columns of the parent triples map are prefixed, so the columns are not qualified
+        value = _sql_alias(columns_alias + reference, db_dialect)
+
+        if termtype.strip() == RML_IRI and expression_type == RML_TEMPLATE:
+            # the percent character must be replaced first
+            safe_percent_encoding = config.get_safe_percent_encoding()
+            for char in ['%'] + [char for char in IRI_ENCODED_CHARACTERS if char != '%']:
+                if char not in safe_percent_encoding:
+                    value = f"REPLACE({value}, {_sql_string(char, db_dialect)}, '%{ord(char):02X}')"
+        elif termtype.strip() == RML_LITERAL:
+            # Natural Mapping of SQL Values (https://www.w3.org/TR/r2rml/#natural-mapping)
+            if datatype == XSD_BOOLEAN:
+                value = f'LOWER({value})'
+            elif datatype == XSD_DATETIME:
+                value = f"REPLACE({value}, ' ', 'T')"
+            # Make integers not end with .0
+            elif datatype == XSD_INTEGER:
+                value = _sql_cast(_sql_cast(_sql_cast(value, 'DECIMAL(38, 10)'),
+                                            SQL_INTEGER_TYPE.get(db_dialect, 'BIGINT')),
+                                  SQL_STRING_TYPE.get(db_dialect, 'VARCHAR'))
+
+            for char, escaped_char in LITERAL_ESCAPES:
+                value = f'REPLACE({value}, {_sql_string(char, db_dialect)}, {_sql_string(escaped_char, db_dialect)})'
+
+        if template_segment:
+            template_expressions.append(_sql_string(template_segment, db_dialect))
+        template_expressions.append(value)
+    if template_segments[-1]:
+        template_expressions.append(_sql_string(template_segments[-1], db_dialect))
+
+    return _sql_concat(template_expressions, db_dialect)
+
+
+def _materialize_triples_sql(rml_rule, config, db_dialect, columns_alias=''):
+    """
+    Compiles the triples (or quads) of a mapping rule to a SQL expression.
+    """
+
+    subject = _materialize_template_sql(rml_rule['subject_map_value'], rml_rule['subject_map_type'], config,
+                                        db_dialect, termtype=rml_rule['subject_termtype'])
+    predicate = _materialize_template_sql(rml_rule['predicate_map_value'], rml_rule['predicate_map_type'], config,
+                                          db_dialect, termtype=RML_IRI)
+    object = _materialize_template_sql(rml_rule['object_map_value'], rml_rule['object_map_type'], config, db_dialect,
+                                       columns_alias=columns_alias, termtype=rml_rule['object_termtype'],
+                                       datatype=rml_rule['lang_datatype_map_value'])
+
+    triple_expressions = [subject, "' '", predicate, "' '", object]
+    if rml_rule['lang_datatype'] == RML_LANGUAGE_MAP:
+        language = _materialize_template_sql(rml_rule['lang_datatype_map_value'], rml_rule['lang_datatype_map_type'],
+                                             config, db_dialect)
+        triple_expressions.extend(["'@'", language])
+    elif rml_rule['lang_datatype'] == RML_DATATYPE_MAP:
+        datatype = _materialize_template_sql(rml_rule['lang_datatype_map_value'], rml_rule['lang_datatype_map_type'],
+                                             config, db_dialect, termtype=RML_IRI)
+        triple_expressions.extend(["'^^'", datatype])
+
+    if config.get_output_format() == NQUADS:
+        triple_expressions.append("' '")
+        if rml_rule['graph_map_type'] in [RML_TEMPLATE, RML_CONSTANT, RML_REFERENCE] and rml_rule['graph_map_value'] != RML_DEFAULT_GRAPH:
+            triple_expressions.append(_materialize_template_sql(rml_rule['graph_map_value'],
+                                                                rml_rule['graph_map_type'], config, db_dialect,
+                                                                termtype=RML_IRI))
+
+    return _sql_concat(triple_expressions, db_dialect)
+
+
+def _compile_rml_rule(rml_rule, rml_df, fnml_df, config, db_dialect, partition_condition=None):
+    """
+    Compiles a mapping rule to a single SQL query returning its distinct triples in the `triple` column. The logical
+    source of the parent triples map of a referencing object map, which is in the same database, is joined in the
+    query. The partition_condition selects a partition of the logical source of the mapping rule.
+    """
+
+    rml_rule = rml_rule.copy()
+
+    references = set(_get_references_in_rml_rule(rml_rule, rml_df, fnml_df))
+
+    join_clause = ''
+    columns_alias = ''
+    if rml_rule['object_map_type'] == RML_PARENT_TRIPLES_MAP:
+        parent_triples_map_rule = get_rml_rule(rml_df, rml_rule['object_map_value'])
+        parent_references = set(
+            _get_references_in_rml_rule(parent_triples_map_rule, rml_df, fnml_df, only_subject_map=True))
+        references, parent_references = _add_references_in_join_condition(rml_rule, references, parent_references)
+
+        child_join_references, parent_join_references = get_references_in_join_condition(rml_rule,
+                                                                                         'object_join_conditions')
+        join_condition = ' AND '.join(
+            f'child_source.{_sql_alias(child_reference, db_dialect)} = '
+            f'parent_source.{_sql_alias("parent_" + parent_reference, db_dialect)}'
+            for child_reference, parent_reference in zip(child_join_references, parent_join_references))
+        parent_query = _get_source_query(parent_triples_map_rule, parent_references, config, db_dialect,
+                                         columns_prefix='parent_')
+        join_clause = f' JOIN ({parent_query}) parent_source ON {join_condition}'
+
+        _replace_object_map_with_parent_subject_map(rml_rule, parent_triples_map_rule)
+        columns_alias = 'parent_'
+
+    triples = _materialize_triples_sql(rml_rule, config, db_dialect, columns_alias)
+    source_query = _get_source_query(rml_rule, references, config, db_dialect,
+                                     partition_condition=partition_condition)
+
+    return f'SELECT DISTINCT {triples} AS {_sql_alias("triple", db_dialect)} ' \
+           f'FROM ({source_query}) child_source{join_clause}'
+
+
+def _materialize_rml_rule_in_chunks_in_rdb(rml_rule, rml_df, fnml_df, config, source_partition=None):
+    """
+    Materializes a mapping rule pushing down the generation of the triples to its relational database, yielding
+    DataFrames with the generated triples in the `triple` column. The mapping rule is compiled to a single SQL query
+    that builds the terms, joins the logical source of the parent triples map and removes duplicated triples, so that
+    only the triples are transferred from the database. If source_partition is provided, only the rows in that
+    partition of the logical source of the mapping rule are materialized, the triples generated in several partitions
+    are removed when the shards of the mapping group are materialized.
+    """
+
+    partition_condition = None
+    if source_partition is not None:
+        partition_index, num_partitions = source_partition
+        partition_conditions = _get_sql_partition_conditions(config, rml_rule, num_partitions)
+        if partition_index >= len(partition_conditions):
+            return
+        partition_condition = partition_conditions[partition_index]
+
+    db_connection, db_dialect = _relational_db_connection(config, rml_rule['source_name'])
+    sql_query = _compile_rml_rule(rml_rule, rml_df, fnml_df, config, db_dialect, partition_condition)
+
+    logging.debug(f"SQL query for mapping rule `{rml_rule['triples_map_id']}`: [{sql_query}]")
+
+    yield from get_sql_query_results_in_chunks(config, rml_rule['source_name'], sql_query, config.get_chunk_size())
@@ -168,8 +168,7 @@ def replace_predicates_in_graph(graph, predicate_to_remove, predicate_to_add):
     """
 
     # get the triples with the predicate to be replaced
-    query = f'SELECT ?s ?o WHERE {{?s <{predicate_to_remove}> ?o .}}'
-    subjects_objects_matched = graph.query(query)
+    subjects_objects_matched = list(graph.subject_objects(rdflib.term.URIRef(predicate_to_remove)))
 
     # for each triple to be replaced add a similar one (same subject and object) but with the new predicate
     for s, o in subjects_objects_matched:
@@ -187,8 +186,7 @@ def replace_objects_in_graph(graph, object_to_remove, object_to_add):
     """
 
     # get the triples with the object to be replaced
-    query = f'SELECT ?s ?p WHERE {{?s ?p <{object_to_remove}> .}}'
-    subjects_predicates_matched = graph.query(query)
+    subjects_predicates_matched = list(graph.subject_predicates(rdflib.term.URIRef(object_to_remove)))
 
     # for each triple to be replaced add a similar one (same subject and predicate) but with the new object
     for s, p in subjects_predicates_matched:
@@ -282,19 +280,13 @@ def normalize_hierarchical_data(data):
     else:
         yield data
 
-def triples_to_file(triples, config, mapping_group=None):
+def triples_to_file(triples, output_file):
     """
-    Writes triples to file.
+    Writes triples to an output file opened in append mode.
     """
 
-    lock = mp.Lock()    # necessary for issue #65
-    with lock:
-        f = open(config.get_output_file_path(mapping_group), 'a', encoding='utf-8')
-        for triple in triples:
-            f.write(f'{triple} .\n')
-        f.flush()
-        os.fsync(f.fileno())
-        f.close()
+    output_file.writelines(f'{triple} .\n' for triple in triples)
+    output_file.flush()
 
 
 def triples_to_kafka(triples, config):
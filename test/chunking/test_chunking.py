@@ -0,0 +1,186 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import os
+import tempfile
+import morph_kgc
+import pandas as pd
+
+from rdflib.graph import Graph
+from rdflib import compare
+
+
+MAPPING = '''
+@prefix foaf: <http://xmlns.com/foaf/0.1/> .
+@prefix rml: <http://w3id.org/rml/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@base <http://example.com/base/> .
+
+<TriplesMap1> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/student.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/resource/student_{{ID}}" ];
+  rml:predicateObjectMap [ rml:predicate foaf:name; rml:objectMap [ rml:reference "Name" ] ];
+  rml:predicateObjectMap [
+    rml:predicate <http://example.com/ontology/practises>;
+    rml:objectMap [
+      a rml:RefObjectMap;
+      rml:parentTriplesMap <TriplesMap2>;
+      rml:joinCondition [ rml:child "Sport"; rml:parent "ID" ]
+    ]
+  ].
+
+<TriplesMap2> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/sport.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/resource/sport_{{ID}}" ];
+  rml:predicateObjectMap [ rml:predicate rdfs:label; rml:objectMap [ rml:reference "Name" ] ].
+'''
+
+
+def _write_sources(sources_dir, num_students):
+    sources_dir = sources_dir.replace('\\', '/')
+    # the names of some students have line breaks and quotes, which are quoted in the CSV file
+    with open(os.path.join(sources_dir, 'student.csv'), 'w') as student_file:
+        student_file.write('ID,Sport,Name\n')
+        for i in range(num_students):
+            name = f'"Student ""{i}""\nof sport {i % 10}"' if i % 7 == 0 else f'Student {i}'
+            student_file.write(f'{i},{100 + i % 10},{name}\n')
+    with open(os.path.join(sources_dir, 'sport.csv'), 'w') as sport_file:
+        sport_file.write('ID,Name\n')
+        for i in range(10):
+            sport_file.write(f'{100 + i},Sport {i}\n')
+
+    mapping_path = os.path.join(sources_dir, 'mapping.ttl')
+    with open(mapping_path, 'w') as mapping_file:
+        mapping_file.write(MAPPING.format(sources_dir=sources_dir))
+
+    return mapping_path
+
+
+PARQUET_MAPPING = '''
+@prefix foaf: <http://xmlns.com/foaf/0.1/> .
+@prefix ex: <http://example.com/> .
+@prefix rml: <http://w3id.org/rml/> .
+
+<TriplesMap1> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{parquet_path}"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/{{ID}}/{{Name}}"; rml:class foaf:Person ];
+  rml:predicateObjectMap [ rml:predicate ex:id; rml:objectMap [ rml:reference "ID" ] ];
+  rml:predicateObjectMap [ rml:predicate foaf:name; rml:objectMap [ rml:reference "Name" ] ].
+'''
+
+
+def test_chunk_size():
+    from morph_kgc.constants import CSV, RML_SOURCE
+    from morph_kgc.data_source.data_file import get_file_data, get_file_data_in_chunks
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path = _write_sources(temporary_dir, 1000)
+        rml_rule = {'source_type': CSV, 'logical_source_type': RML_SOURCE,
+                    'logical_source_value': os.path.join(temporary_dir, 'student.csv')}
+        data = get_file_data(rml_rule, ['ID', 'Name'])
+        data_chunks = list(get_file_data_in_chunks(rml_rule, ['ID', 'Name'], 300))
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\n[DataSource]\nmappings={mapping_path}'
+        g = morph_kgc.materialize(config)
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nchunk_size=300\n[DataSource]\nmappings={mapping_path}'
+        g_morph = morph_kgc.materialize(config)
+
+    # the records (some of them with line breaks) are read in chunks of at most chunk_size records
+    assert [len(data_chunk) for data_chunk in data_chunks] == [300, 300, 300, 100]
+    assert pd.concat(data_chunks, ignore_index=True).equals(data)
+    assert compare.isomorphic(g, g_morph)
+    assert len(g) == 2000 + 10
+    assert compare.isomorphic(g, g_morph)
+
+
+def test_chunk_size_output_file(monkeypatch):
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.mapping.mapping_parser import retrieve_mappings
+    from morph_kgc.materializer import _materialize_mapping_group_to_file
+    from morph_kgc.scheduler import materialize_mapping_groups
+    from morph_kgc.utils import prepare_output_files
+
+    # count the files synced to disk
+    synced_fds = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, 'fsync', lambda fd: synced_fds.append(fd) or fsync(fd))
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path = _write_sources(temporary_dir, 1000)
+        g = morph_kgc.materialize(f'[CONFIGURATION]\n[DataSource]\nmappings={mapping_path}')
+
+        # the triples are written to the output file as in the command line interface
+        output_path = os.path.join(temporary_dir, 'knowledge-graph.nt')
+        config = load_config_from_argument(f'[CONFIGURATION]\noutput_file={output_path}\nchunk_size=100\n'
+                                           f'number_of_processes=1\n[DataSource]\nmappings={mapping_path}')
+        rml_df, fnml_df = retrieve_mappings(config)
+        prepare_output_files(config, rml_df)
+        num_triples = sum(materialize_mapping_groups(_materialize_mapping_group_to_file, rml_df, fnml_df, config))
+        g_morph = Graph()
+        g_morph.parse(output_path, format='nquads')
+
+    # the chunks of each mapping group are written to the same file handle, which is synced to disk once
+    assert len(synced_fds) == len(set(rml_df['mapping_partition'])) == 3
+    assert num_triples == len(g) == 2000 + 10
+    assert compare.isomorphic(g, g_morph)
+
+
+def test_parquet_chunk_size_nulls():
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from morph_kgc.constants import PARQUET, RML_SOURCE
+    from morph_kgc.data_source.data_file import get_file_data, get_file_data_in_chunks
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        # the first chunk of the integer column has nulls and the last one does not
+        parquet_path = os.path.join(temporary_dir, 'student.parquet')
+        pq.write_table(pa.table({'ID': pa.array([10, None, 30, 40, 50, 60], type=pa.int64()),
+                                 'Name': ['Venus', 'Serena', None, 'Rafa', 'Roger', 'Novak']}), parquet_path)
+        mapping_path = os.path.join(temporary_dir, 'mapping.ttl')
+        with open(mapping_path, 'w') as mapping_file:
+            mapping_file.write(PARQUET_MAPPING.format(parquet_path=parquet_path.replace('\\', '/')))
+
+        rml_rule = {'source_type': PARQUET, 'logical_source_type': RML_SOURCE, 'logical_source_value': parquet_path}
+        data = get_file_data(rml_rule, ['ID', 'Name'])
+        data_chunks = list(get_file_data_in_chunks(rml_rule, ['ID', 'Name'], 4))
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\n[DataSource]\nmappings={mapping_path}'
+        g = morph_kgc.materialize(config)
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nchunk_size=2\n[DataSource]\nmappings={mapping_path}'
+        g_morph = morph_kgc.materialize(config)
+
+    # the integers with nulls are floats whether the file is read at once or in chunks (with or without nulls)
+    assert [len(data_chunk) for data_chunk in data_chunks] == [4, 2]
+    assert all(data_chunk['ID'].dtype == data['ID'].dtype == 'float64' for data_chunk in data_chunks)
+    assert pd.concat(data_chunks, ignore_index=True).equals(data)
+    assert '<http://example.com/10.0/Venus> <http://example.com/id> "10.0" .' in g.serialize(format='nt')
+    # the row with a null in the subject template does not generate triples
+    assert len(g) == 5 * 3
+    assert compare.isomorphic(g, g_morph)
+
+
+def test_tabular_view_chunk_size():
+    from morph_kgc.constants import CSV, RML_QUERY
+    from morph_kgc.data_source.data_file import get_file_data, get_file_data_in_chunks
+
+    rml_rule = {'source_type': CSV, 'logical_source_type': RML_QUERY,
+                'logical_source_value': 'SELECT CAST(i AS VARCHAR) AS ID FROM range(5000) AS t(i)'}
+    data = get_file_data(rml_rule, ['ID'])
+    data_chunks = list(get_file_data_in_chunks(rml_rule, ['ID'], 300))
+
+    # the tabular view of RMLTVTC0009c aggregates the students, its chunks have a single row
+    tabular_view_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', 'rml-tv', 'RMLTVTC0009c')
+    g = Graph()
+    g.parse(os.path.join(tabular_view_path, 'output.nq'))
+    config = f'[CONFIGURATION]\nchunk_size=1\n[DataSource]\nmappings={os.path.join(tabular_view_path, "mapping.ttl")}'
+    g_morph = morph_kgc.materialize(config)
+
+    # the vectors of 2048 rows fetched from DuckDB are sliced in chunks of chunk_size rows
+    assert [len(data_chunk) for data_chunk in data_chunks] == 16 * [300] + [200]
+    assert pd.concat(data_chunks, ignore_index=True).equals(data)
+    assert compare.isomorphic(g, g_morph)
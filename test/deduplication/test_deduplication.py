@@ -0,0 +1,178 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import os
+import random
+import pytest
+import logging
+import tempfile
+import numpy as np
+
+from rdflib.graph import Graph
+from rdflib import compare
+from morph_kgc.args_parser import load_config_from_argument
+from morph_kgc.mapping.mapping_parser import retrieve_mappings
+from morph_kgc.materializer import _materialize_mapping_group_to_file
+from morph_kgc.scheduler import materialize_mapping_groups
+from morph_kgc.utils import prepare_output_files
+from morph_kgc.deduplicator import SpillingTriplesDeduplicator, HashTriplesDeduplicator
+
+
+MAPPING = '''
+@prefix foaf: <http://xmlns.com/foaf/0.1/> .
+@prefix rml: <http://w3id.org/rml/> .
+@base <http://example.com/base/> .
+
+<TriplesMap1> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{source_path}"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/student/{{ID}}" ];
+  rml:predicateObjectMap [ rml:predicate foaf:name; rml:objectMap [ rml:reference "Name" ] ].
+'''
+
+
+def _get_triples_chunks(num_triples, num_chunks):
+    # chunks with triples repeated within and across chunks
+    random_generator = random.Random(0)
+    triples = [f'<http://example.com/student/{i}> <http://xmlns.com/foaf/0.1/name> "Student {i}"'
+               for i in range(num_triples)]
+    return [[random_generator.choice(triples) for j in range(num_triples // num_chunks)] for i in range(num_chunks)]
+
+
+def _deduplicate(triples_deduplicator, triples_chunks):
+    returned_triples = []
+    for triples_chunk in triples_chunks:
+        returned_triples.extend(triples_deduplicator.add(triples_chunk))
+    for triples in triples_deduplicator.finish():
+        returned_triples.extend(triples)
+
+    return returned_triples
+
+
+def _write_sources(sources_dir, num_students):
+    # each student is repeated twice
+    source_path = os.path.join(sources_dir, 'student.csv').replace('\\', '/')
+    with open(source_path, 'w') as student_file:
+        student_file.write('ID,Name\n')
+        for i in list(range(num_students)) * 2:
+            student_file.write(f'{i},Student {i} with a long name to fill the memory of the deduplicator\n')
+
+    mapping_path = os.path.join(sources_dir, 'mapping.ttl')
+    with open(mapping_path, 'w') as mapping_file:
+        mapping_file.write(MAPPING.format(source_path=source_path))
+
+    return mapping_path
+
+
+def _materialize_to_file(config):
+    # the deduplicator is used when the triples are written to files, as in the command line interface
+    config = load_config_from_argument(config)
+    rml_df, fnml_df = retrieve_mappings(config)
+    prepare_output_files(config, rml_df)
+    num_triples = sum(materialize_mapping_groups(_materialize_mapping_group_to_file, rml_df, fnml_df, config))
+
+    with open(config.get_output_file_path(), encoding='utf-8') as output_file:
+        # each triple is written once
+        assert len(output_file.readlines()) == num_triples
+
+    g = Graph()
+    g.parse(config.get_output_file_path(), format='nquads')
+
+    return g, num_triples
+
+
+def test_spilling_deduplicator():
+    triples_chunks = _get_triples_chunks(10000, 20)
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        # the limit is exceeded several times, hence there are several runs of returned and postponed triples
+        triples_deduplicator = SpillingTriplesDeduplicator(20000, temporary_dir)
+        returned_triples = _deduplicate(triples_deduplicator, triples_chunks)
+        num_runs = triples_deduplicator.num_runs
+        temporary_files = os.listdir(temporary_dir)
+
+    assert num_runs > 5
+    # each triple is returned once
+    assert len(returned_triples) == len(set(returned_triples))
+    assert set(returned_triples) == set().union(*triples_chunks)
+    assert len(triples_deduplicator) == len(set(returned_triples))
+    # the spilled runs are removed
+    assert temporary_files == []
+
+
+def test_spilling_deduplicator_within_limit():
+    triples_chunks = _get_triples_chunks(1000, 5)
+
+    triples_deduplicator = SpillingTriplesDeduplicator(10 ** 9)
+    returned_triples = _deduplicate(triples_deduplicator, triples_chunks)
+
+    # nothing is spilled and all the triples are returned by add()
+    assert triples_deduplicator.spill_dir is None
+    assert triples_deduplicator.finish() == []
+    assert sorted(returned_triples) == sorted(set().union(*triples_chunks))
+
+
+def test_deduplication_memory_limit(caplog):
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path = _write_sources(temporary_dir, 10000)
+        output_path = os.path.join(temporary_dir, 'knowledge-graph.nt')
+
+        config = f'[CONFIGURATION]\noutput_file={output_path}\nchunk_size=1000\n[DataSource]\nmappings={mapping_path}'
+        g, num_triples = _materialize_to_file(config)
+
+        # the triples of the mapping group do not fit in 1 MB
+        config = f'[CONFIGURATION]\noutput_file={output_path}\nchunk_size=1000\ndeduplication_memory_limit=1\n' \
+                 f'temporary_dir={temporary_dir}\nnumber_of_processes=1\nlogging_level=DEBUG\n' \
+                 f'[DataSource]\nmappings={mapping_path}'
+        with caplog.at_level(logging.DEBUG):
+            g_morph, num_triples_morph = _materialize_to_file(config)
+
+    assert 'triples spilled to' in caplog.text
+    assert num_triples == num_triples_morph == len(g) == 10000
+    assert compare.isomorphic(g, g_morph)
+
+
+@pytest.mark.parametrize('hash_bits', [64, 128])
+def test_hash_deduplicator(hash_bits):
+    triples_chunks = _get_triples_chunks(10000, 50)
+
+    triples_deduplicator = HashTriplesDeduplicator(hash_bits=hash_bits)
+    returned_triples = _deduplicate(triples_deduplicator, triples_chunks)
+
+    # each triple is returned once by add() and a hash is kept for each of them
+    assert len(returned_triples) == len(set(returned_triples))
+    assert set(returned_triples) == set().union(*triples_chunks)
+    assert len(triples_deduplicator) == len(set(returned_triples))
+    # the sorted arrays of hashes are merged as they grow
+    assert len(triples_deduplicator.hash_runs) <= 8
+    assert all(np.array_equal(hash_run, np.unique(hash_run)) for hash_run in triples_deduplicator.hash_runs)
+
+
+def test_hash_deduplicator_collision():
+    # different triples with the same hash are considered duplicates
+    triples_deduplicator = HashTriplesDeduplicator(hash_bits=64)
+    triples_deduplicator._hash_triples = lambda triples: np.zeros(len(triples), dtype=np.uint64)
+
+    assert len(triples_deduplicator.add(['<a> <b> <c>', '<a> <b> <d>'])) == 1
+    assert triples_deduplicator.add(['<a> <b> <e>']) == set()
+
+
+@pytest.mark.parametrize('deduplication', ['HASH-64', 'HASH-128'])
+def test_hash_deduplication(deduplication):
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path = _write_sources(temporary_dir, 10000)
+        output_path = os.path.join(temporary_dir, 'knowledge-graph.nt')
+
+        config = f'[CONFIGURATION]\noutput_file={output_path}\nchunk_size=1000\n[DataSource]\nmappings={mapping_path}'
+        g, num_triples = _materialize_to_file(config)
+
+        config = f'[CONFIGURATION]\noutput_file={output_path}\nchunk_size=1000\ndeduplication={deduplication}\n' \
+                 f'[DataSource]\nmappings={mapping_path}'
+        g_morph, num_triples_morph = _materialize_to_file(config)
+
+    assert num_triples == num_triples_morph == len(g) == 10000
+    assert compare.isomorphic(g, g_morph)
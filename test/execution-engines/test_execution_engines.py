@@ -0,0 +1,150 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import os
+import tempfile
+import morph_kgc
+
+from rdflib.graph import Graph
+from rdflib import compare
+
+
+MAPPING = '''
+@prefix foaf: <http://xmlns.com/foaf/0.1/> .
+@prefix rml: <http://w3id.org/rml/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@base <http://example.com/base/> .
+
+<TriplesMap1> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/student.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/resource/student_{{ID}}" ];
+  rml:predicateObjectMap [ rml:predicate foaf:name; rml:objectMap [ rml:reference "Name" ] ];
+  rml:predicateObjectMap [
+    rml:predicate <http://example.com/ontology/practises>;
+    rml:objectMap [
+      a rml:RefObjectMap;
+      rml:parentTriplesMap <TriplesMap2>;
+      rml:joinCondition [ rml:child "Sport"; rml:parent "ID" ]
+    ]
+  ].
+
+<TriplesMap2> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/sport.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/resource/sport_{{ID}}" ];
+  rml:predicateObjectMap [ rml:predicate rdfs:label; rml:objectMap [ rml:reference "Name" ] ].
+'''
+
+
+def _write_sources(sources_dir, num_students):
+    sources_dir = sources_dir.replace('\\', '/')
+    # the names of some students have line breaks and quotes, which are quoted in the CSV file
+    with open(os.path.join(sources_dir, 'student.csv'), 'w') as student_file:
+        student_file.write('ID,Sport,Name\n')
+        for i in range(num_students):
+            name = f'"Student ""{i}""\nof sport {i % 10}"' if i % 7 == 0 else f'Student {i}'
+            student_file.write(f'{i},{100 + i % 10},{name}\n')
+    with open(os.path.join(sources_dir, 'sport.csv'), 'w') as sport_file:
+        sport_file.write('ID,Name\n')
+        for i in range(10):
+            sport_file.write(f'{100 + i},Sport {i}\n')
+
+    mapping_path = os.path.join(sources_dir, 'mapping.ttl')
+    with open(mapping_path, 'w') as mapping_file:
+        mapping_file.write(MAPPING.format(sources_dir=sources_dir))
+
+    return mapping_path
+
+
+def _get_rml_rules(config):
+    from morph_kgc.mapping.mapping_parser import retrieve_mappings
+
+    rml_df, fnml_df = retrieve_mappings(config)
+    # the rule of the names of the students
+    name_rml_rule = rml_df[rml_df['logical_source_value'].str.endswith('student.csv') &
+                           (rml_df['object_map_value'] == 'Name')].iloc[0]
+
+    return rml_df, fnml_df, name_rml_rule
+
+
+def test_arrow():
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.materializer import _is_rml_rule_materializable_by_execution_engine
+    from morph_kgc.arrow_materializer import _materialize_rml_rule_in_chunks_with_arrow
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path = _write_sources(temporary_dir, 1000)
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\n[DataSource]\nmappings={mapping_path}'
+        g = morph_kgc.materialize(config)
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nexecution_engine=ARROW\nchunk_size=300\n' \
+                 f'[DataSource]\nmappings={mapping_path}'
+        arrow_config = load_config_from_argument(config)
+        rml_df, fnml_df, name_rml_rule = _get_rml_rules(arrow_config)
+        is_materializable = [_is_rml_rule_materializable_by_execution_engine(rml_rule, rml_df, arrow_config)
+                             for i, rml_rule in rml_df.iterrows()]
+        name_triples_chunks = list(_materialize_rml_rule_in_chunks_with_arrow(name_rml_rule, rml_df, fnml_df,
+                                                                              arrow_config))
+        g_morph = morph_kgc.materialize(config)
+
+    # all the rules, including the join, are materialized with Arrow in chunks
+    assert all(is_materializable)
+    assert [len(triples_chunk) for triples_chunk in name_triples_chunks] == [300, 300, 300, 100]
+    # the names with line breaks and quotes are escaped as with the PANDAS execution engine
+    assert len(g) == 2000 + 10
+    assert compare.isomorphic(g, g_morph)
+
+
+def test_duckdb():
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.materializer import _is_rml_rule_materializable_by_execution_engine
+    from morph_kgc.duckdb_materializer import _materialize_rml_rule_in_chunks_with_duckdb
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path = _write_sources(temporary_dir, 5000)
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\n[DataSource]\nmappings={mapping_path}'
+        g = morph_kgc.materialize(config)
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nexecution_engine=DUCKDB\nchunk_size=300\n' \
+                 f'[DataSource]\nmappings={mapping_path}'
+        duckdb_config = load_config_from_argument(config)
+        rml_df, fnml_df, name_rml_rule = _get_rml_rules(duckdb_config)
+        is_materializable = [_is_rml_rule_materializable_by_execution_engine(rml_rule, rml_df, duckdb_config)
+                             for i, rml_rule in rml_df.iterrows()]
+        name_triples_chunks = list(_materialize_rml_rule_in_chunks_with_duckdb(name_rml_rule, rml_df, fnml_df,
+                                                                               duckdb_config))
+        g_morph = morph_kgc.materialize(config)
+
+    # all the rules, including the join, are compiled to SQL queries whose results are fetched in chunks
+    assert all(is_materializable)
+    # the vectors fetched from DuckDB are sliced in chunks of chunk_size triples
+    assert [len(triples_chunk) for triples_chunk in name_triples_chunks] == 16 * [300] + [200]
+    assert len(g) == 2 * 5000 + 10
+    assert compare.isomorphic(g, g_morph)
+
+
+def test_duckdb_empty_na_values(monkeypatch):
+    import duckdb
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.duckdb_materializer import _get_source_query
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path = _write_sources(temporary_dir, 100)
+        config = load_config_from_argument(f'[CONFIGURATION]\nexecution_engine=DUCKDB\n[DataSource]\n'
+                                           f'mappings={mapping_path}')
+        rml_df, fnml_df, name_rml_rule = _get_rml_rules(config)
+        monkeypatch.setattr(config, 'get_na_values', lambda: [])
+        connection = duckdb.connect()
+        source_query = _get_source_query(connection, name_rml_rule, ['ID', 'Name'], config)
+        num_rows = len(connection.execute(source_query).fetchall())
+        connection.close()
+
+    # without NA values only the NULL values are removed
+    assert 'NOT IN' not in source_query
+    assert num_rows == 100
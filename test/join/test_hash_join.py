@@ -0,0 +1,196 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import os
+import logging
+import tempfile
+import morph_kgc
+import pandas as pd
+
+from rdflib import compare
+from morph_kgc.constants import RML_PARENT_TRIPLES_MAP
+from morph_kgc.args_parser import load_config_from_argument
+from morph_kgc.mapping.mapping_parser import retrieve_mappings
+from morph_kgc.hash_join import GraceHashJoin, get_num_hash_join_partitions, HASH_JOIN_PARTITIONS, \
+    MAX_HASH_JOIN_PARTITIONS
+from morph_kgc.utils import get_references_in_join_condition, get_rml_rule
+from morph_kgc.materializer import _get_parent_data, _join_data, _join_data_partitions, _merge_data
+
+
+MAPPING = '''
+@prefix foaf: <http://xmlns.com/foaf/0.1/> .
+@prefix rml: <http://w3id.org/rml/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@base <http://example.com/base/> .
+
+<TriplesMap1> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/student.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/student/{{ID}}" ];
+  rml:predicateObjectMap [
+    rml:predicate <http://example.com/ontology/practises>;
+    rml:objectMap [
+      a rml:RefObjectMap;
+      rml:parentTriplesMap <TriplesMap2>;
+      rml:joinCondition [ rml:child "Sport"; rml:parent "ID" ]
+    ]
+  ].
+
+<TriplesMap2> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/sport.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/sport/{{ID}}/{{Name}}" ];
+  rml:predicateObjectMap [ rml:predicate rdfs:label; rml:objectMap [ rml:reference "Name" ] ].
+'''
+
+
+def _write_sources(sources_dir, num_students, num_sports):
+    sources_dir = sources_dir.replace('\\', '/')
+    # some students practise sports that do not exist, and some sports are repeated
+    with open(os.path.join(sources_dir, 'student.csv'), 'w') as student_file:
+        student_file.write('ID,Sport\n')
+        for i in range(num_students):
+            student_file.write(f'{i},{i % (num_sports + 10)}\n')
+    with open(os.path.join(sources_dir, 'sport.csv'), 'w') as sport_file:
+        sport_file.write('ID,Name\n')
+        for i in list(range(num_sports)) + list(range(0, num_sports, 3)):
+            sport_file.write(f'{i},Sport {i} with a long name to fill the memory of the join\n')
+
+    mapping_path = os.path.join(sources_dir, 'mapping.ttl')
+    with open(mapping_path, 'w') as mapping_file:
+        mapping_file.write(MAPPING.format(sources_dir=sources_dir))
+
+    return mapping_path
+
+
+def _sort_data(data):
+    data = data.reset_index(drop=True)
+    return data[sorted(data.columns)].sort_values(sorted(data.columns)).reset_index(drop=True)
+
+
+def test_grace_hash_join():
+    # join on two references, the chunks of the child data have values without parent rows
+    rml_rule = {'object_join_conditions': str({'jc1': {'child_value': 'A', 'parent_value': 'X'},
+                                                'jc2': {'child_value': 'B', 'parent_value': 'Y'}})}
+    data_chunks = [pd.DataFrame({'A': [str(i % 50) for i in range(j, j + 100)],
+                                 'B': [str(i % 7) for i in range(j, j + 100)],
+                                 'C': [str(i) for i in range(j, j + 100)]}) for j in range(0, 1000, 100)]
+    parent_data_chunks = [pd.DataFrame({'X': [str(i % 40) for i in range(j, j + 100)],
+                                        'Y': [str(i % 7) for i in range(j, j + 100)],
+                                        'Z': [f'z{i % 40}' for i in range(j, j + 100)]}) for j in range(0, 500, 100)]
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        child_join_references, parent_join_references = get_references_in_join_condition(rml_rule,
+                                                                                         'object_join_conditions')
+        hash_join = GraceHashJoin(child_join_references, parent_join_references, num_partitions=8,
+                                  temporary_dir=temporary_dir)
+        for parent_data in parent_data_chunks:
+            hash_join.add_parent_data(parent_data)
+        partitioned_join_data = pd.concat(list(_join_data_partitions(data_chunks, hash_join, rml_rule)))
+        temporary_files = os.listdir(temporary_dir)
+
+    join_data = _merge_data(pd.concat(data_chunks), pd.concat(parent_data_chunks).drop_duplicates(), rml_rule,
+                            'object_join_conditions')
+
+    assert len(join_data) > 0
+    assert _sort_data(partitioned_join_data).equals(_sort_data(join_data))
+    # the partition files are removed
+    assert temporary_files == []
+
+
+def test_num_hash_join_partitions():
+    # the partitions fill half of the memory limit on average
+    assert get_num_hash_join_partitions(10 * 1024 * 1024, 0) == HASH_JOIN_PARTITIONS
+    assert get_num_hash_join_partitions(10 * 1024 * 1024, 1024 * 1024) == 20
+    assert get_num_hash_join_partitions(100, 1024 * 1024) == 2
+    assert get_num_hash_join_partitions(10 * 1024 * 1024, 1) == MAX_HASH_JOIN_PARTITIONS
+
+
+def test_grace_hash_join_repartition():
+    rml_rule = {'object_join_conditions': str({'jc1': {'child_value': 'A', 'parent_value': 'X'}})}
+    data_chunks = [pd.DataFrame({'A': [str(i % 1100) for i in range(j, j + 500)],
+                                 'C': [str(i) for i in range(j, j + 500)]}) for j in range(0, 3000, 500)]
+    # the parent data has 1000 join values and 200 rows with the same join value, which cannot be split
+    parent_data_chunks = [pd.DataFrame({'X': [str(i) for i in range(j, j + 100)],
+                                        'Z': [f'z{i}' for i in range(j, j + 100)]}) for j in range(0, 1000, 100)] + \
+                         [pd.DataFrame({'X': ['0'] * 200, 'Z': [f'y{i}' for i in range(200)]})]
+    memory_limit = sum(parent_data.memory_usage(index=True, deep=True).sum()
+                       for parent_data in parent_data_chunks) // 10
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        child_join_references, parent_join_references = get_references_in_join_condition(rml_rule,
+                                                                                         'object_join_conditions')
+        # the partitions exceed the memory limit and are partitioned again
+        hash_join = GraceHashJoin(child_join_references, parent_join_references, num_partitions=2,
+                                  temporary_dir=temporary_dir, memory_limit=memory_limit)
+        for parent_data in parent_data_chunks:
+            hash_join.add_parent_data(parent_data)
+        for data in data_chunks:
+            hash_join.add_child_data(data)
+        partitions_fit = []
+        partitioned_join_data = []
+        for parent_data, partition_data_chunks in hash_join.get_partitions():
+            partitions_fit.append((parent_data['X'] == '0').all() or
+                                   parent_data.memory_usage(index=True, deep=True).sum() <= memory_limit)
+            partitioned_join_data.extend(_merge_data(data, parent_data, rml_rule, 'object_join_conditions')
+                                         for data in partition_data_chunks)
+        temporary_files = os.listdir(temporary_dir)
+
+    join_data = _merge_data(pd.concat(data_chunks), pd.concat(parent_data_chunks), rml_rule,
+                            'object_join_conditions')
+
+    # only the partition with the repeated join value exceeds the memory limit
+    assert len(partitions_fit) > 2
+    assert all(partitions_fit)
+    assert _sort_data(pd.concat(partitioned_join_data)).equals(_sort_data(join_data))
+    assert temporary_files == []
+
+
+def test_join_memory_limit_parent_data():
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path = _write_sources(temporary_dir, 1000, 100)
+        config = load_config_from_argument(f'[CONFIGURATION]\ntemporary_dir={temporary_dir}\n'
+                                           f'[DataSource]\nmappings={mapping_path}')
+        rml_df, fnml_df = retrieve_mappings(config)
+        rml_rule = rml_df[rml_df['object_map_type'] == RML_PARENT_TRIPLES_MAP].iloc[0]
+        parent_triples_map_rule = get_rml_rule(rml_df, rml_rule['object_map_value'])
+        data = pd.DataFrame({'ID': [str(i) for i in range(1000)], 'Sport': [str(i % 110) for i in range(1000)]})
+
+        # the parent data is joined in memory
+        parent_data, hash_join = _get_parent_data(config, rml_rule, parent_triples_map_rule, {'ID'})
+        assert hash_join is None
+        join_data = _join_data(data, parent_data, rml_rule, 'object_join_conditions')
+
+        # the parent data exceeds the limit of 1 byte, it is partitioned to temporary files
+        parent_data, hash_join = _get_parent_data(config, rml_rule, parent_triples_map_rule, {'ID'},
+                                                  join_memory_limit=1)
+        assert parent_data is None
+        # the repeated sports are removed when the parent data is read
+        assert hash_join.num_parent_rows == 100
+        partitioned_join_data = pd.concat(list(_join_data_partitions([data[:500], data[500:]], hash_join,
+                                                                     rml_rule)))
+
+    # the students of the 10 sports that do not exist are not joined
+    assert len(join_data) == 1000 - 10 * 9
+    assert _sort_data(partitioned_join_data).equals(_sort_data(join_data))
+
+
+def test_join_memory_limit(caplog):
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path = _write_sources(temporary_dir, 10000, 20000)
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\n[DataSource]\nmappings={mapping_path}'
+        g = morph_kgc.materialize(config)
+
+        # the parent data does not fit in 1 MB
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\njoin_memory_limit=1\ntemporary_dir={temporary_dir}\n' \
+                 f'number_of_processes=1\nlogging_level=DEBUG\n[DataSource]\nmappings={mapping_path}'
+        with caplog.at_level(logging.DEBUG):
+            g_morph = morph_kgc.materialize(config)
+
+    assert 'it is partitioned to temporary files' in caplog.text
+    assert len(g) == 10000 + 20000
+    assert compare.isomorphic(g, g_morph)
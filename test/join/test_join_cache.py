@@ -0,0 +1,92 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import os
+import tempfile
+
+
+MAPPING = '''
+@prefix foaf: <http://xmlns.com/foaf/0.1/> .
+@prefix rml: <http://w3id.org/rml/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@base <http://example.com/base/> .
+
+<TriplesMap1> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/student.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/resource/student_{{ID}}" ];
+  rml:predicateObjectMap [ rml:predicate foaf:name; rml:objectMap [ rml:reference "Name" ] ];
+  rml:predicateObjectMap [
+    rml:predicate <http://example.com/ontology/practises>;
+    rml:objectMap [
+      a rml:RefObjectMap;
+      rml:parentTriplesMap <TriplesMap2>;
+      rml:joinCondition [ rml:child "Sport"; rml:parent "ID" ]
+    ]
+  ];
+  rml:predicateObjectMap [
+    rml:predicate <http://example.com/ontology/plays>;
+    rml:objectMap [
+      a rml:RefObjectMap;
+      rml:parentTriplesMap <TriplesMap2>;
+      rml:joinCondition [ rml:child "Sport"; rml:parent "ID" ]
+    ]
+  ].
+
+<TriplesMap2> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/sport.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/resource/sport_{{ID}}" ];
+  rml:predicateObjectMap [ rml:predicate rdfs:label; rml:objectMap [ rml:reference "Name" ] ].
+'''
+
+
+def _write_sources(sources_dir, num_students):
+    sources_dir = sources_dir.replace('\\', '/')
+    with open(os.path.join(sources_dir, 'student.csv'), 'w') as student_file:
+        student_file.write('ID,Sport,Name\n')
+        for i in range(num_students):
+            student_file.write(f'{i},{100 + i % 10},Student {i}\n')
+    with open(os.path.join(sources_dir, 'sport.csv'), 'w') as sport_file:
+        sport_file.write('ID,Name\n')
+        for i in range(10):
+            sport_file.write(f'{100 + i},Sport {i}\n')
+
+    mapping_path = os.path.join(sources_dir, 'mapping.ttl')
+    with open(mapping_path, 'w') as mapping_file:
+        mapping_file.write(MAPPING.format(sources_dir=sources_dir))
+
+    return mapping_path
+
+
+def test_join_cache_source_uses():
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.mapping.mapping_parser import retrieve_mappings
+    from morph_kgc.materializer import _materialize_mapping_group_to_set
+    from morph_kgc.scheduler import _init_worker, _materialize_bundle, _worker_state
+    from morph_kgc.data_source.source_cache import get_source_cache, set_source_cache
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path = _write_sources(temporary_dir, 100)
+        config = load_config_from_argument(f'[CONFIGURATION]\noutput_format=N-QUADS\nmapping_partitioning=no\n'
+                                           f'source_cache_memory_limit=100\n[DataSource]\nmappings={mapping_path}')
+        rml_df, fnml_df = retrieve_mappings(config)
+        _init_worker(rml_df, fnml_df, config)
+        try:
+            # all the mapping rules are in the same mapping group, the parent data of the second join is reused
+            triples = _materialize_bundle(list(rml_df['mapping_partition'].unique()),
+                                          _materialize_mapping_group_to_set)
+            source_cache = get_source_cache()
+            source_uses = dict(source_cache.source_uses)
+            num_cached_sources = len(source_cache.source_data)
+        finally:
+            _worker_state.clear()
+            set_source_cache(None)
+
+    assert len(set().union(*triples)) == 3 * 100 + 10
+    # the uses of the logical sources are released and their data is evicted from the cache
+    assert source_uses == {}
+    assert num_cached_sources == 0
@@ -0,0 +1,62 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import os
+import glob
+import rdflib
+
+from morph_kgc.constants import RML_GATHER
+from morph_kgc.args_parser import load_config_from_argument
+from morph_kgc.mapping import mapping_parser
+from morph_kgc.mapping.mapping_constants import RML_PARSING_QUERY, FNML_PARSING_QUERY
+
+
+TEST_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), '..')
+# test cases of R2RML, functions, RML-star, tabular views, issues and CSV files, the parsing queries are slow
+TEST_CASES_DIRS = ['r2rml', 'rml-fnml', 'rml-star', 'rml-tv', 'issues', os.path.join('rml-core', 'csv')]
+
+
+def _get_normalized_mapping_graphs(monkeypatch):
+    # the mapping graphs of the test cases are captured after they are normalized, before they are parsed
+    mapping_graphs = []
+    transform_mappings_into_dataframe = mapping_parser._transform_mappings_into_dataframe
+    monkeypatch.setattr(mapping_parser, '_transform_mappings_into_dataframe', lambda mapping_graph, section_name:
+                        mapping_graphs.append(mapping_graph) or
+                        transform_mappings_into_dataframe(mapping_graph, section_name))
+
+    mapping_paths = sorted(mapping_path for test_cases_dir in TEST_CASES_DIRS for mapping_path in
+                           glob.glob(os.path.join(TEST_DIR, test_cases_dir, '**', 'mapping.*'), recursive=True))
+    for mapping_path in mapping_paths:
+        config = load_config_from_argument(f'[CONFIGURATION]\n[DataSource]\nmappings={mapping_path}')
+        try:
+            mapping_parser.MappingParser(config)._parse_data_source_mapping_files('DataSource')
+        except Exception:
+            # the mappings of the test cases with invalid mappings are not normalized
+            pass
+
+    return mapping_graphs
+
+
+def _get_rules(rules):
+    # the rules are compared regardless of their order, the unbound values and the empty results are not included
+    rules = {frozenset((str(column), value) for column, value in rule.items() if value is not None) for rule in rules}
+    return {rule for rule in rules if rule}
+
+
+def test_mapping_parsing_queries(monkeypatch):
+    mapping_graphs = _get_normalized_mapping_graphs(monkeypatch)
+    mapping_graphs = [mapping_graph for mapping_graph in mapping_graphs if
+                      (None, rdflib.term.URIRef(RML_GATHER), None) not in mapping_graph]
+
+    # the mapping rules and function executions built walking the mapping graphs are the ones of the queries
+    assert len(mapping_graphs) > 100
+    for mapping_graph in mapping_graphs:
+        assert _get_rules(mapping_parser._get_rml_rules(mapping_graph)) == \
+               _get_rules(mapping_graph.query(RML_PARSING_QUERY).bindings)
+        assert _get_rules(mapping_parser._get_fnml_rules(mapping_graph)) == \
+               _get_rules(mapping_graph.query(FNML_PARSING_QUERY).bindings)
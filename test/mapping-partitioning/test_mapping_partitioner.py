@@ -0,0 +1,144 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import random
+import numpy as np
+import pandas as pd
+
+from itertools import permutations
+from morph_kgc.constants import *
+from morph_kgc.args_parser import load_config_from_argument
+from morph_kgc.mapping.mapping_partitioner import MappingPartitioner, _get_invariant_groups, _get_position_groups, \
+    _get_finest_position_keys, _refine_partitions
+
+
+SUBJECT_MAPS = [(RML_TEMPLATE, 'http://example.com/{ID}', RML_IRI),
+                (RML_TEMPLATE, 'http://example.com/student/{ID}', RML_IRI),
+                (RML_TEMPLATE, 'http://example.org/{ID}', RML_IRI),
+                (RML_CONSTANT, 'http://example.com/', RML_IRI),
+                (RML_TEMPLATE, '{ID}', RML_BLANK_NODE)]
+PREDICATE_MAPS = [(RML_CONSTANT, 'http://example.com/name'), (RML_CONSTANT, 'http://example.com/id'),
+                  (RML_TEMPLATE, 'http://example.com/{Attribute}')]
+OBJECT_MAPS = [(RML_TEMPLATE, 'http://example.com/{Sport}', RML_IRI),
+               (RML_REFERENCE, 'Name', RML_LITERAL),
+               (RML_TEMPLATE, '{Sport}', RML_BLANK_NODE),
+               (RML_PARENT_TRIPLES_MAP, None, np.nan)]
+LITERAL_TYPES = [(np.nan, np.nan), (RML_DATATYPE_MAP, XSD_INTEGER), (RML_DATATYPE_MAP, XSD_STRING),
+                 (RML_LANGUAGE_MAP, 'en')]
+GRAPH_MAPS = [RML_DEFAULT_GRAPH, 'http://example.com/graph']
+
+
+def _get_mapping_partitioner(rml_df, mapping_partitioning=MAXIMAL_PARTITIONING):
+    config = load_config_from_argument(f'[CONFIGURATION]\nmapping_partitioning={mapping_partitioning}\n'
+                                       '[DataSource]\nmappings=mapping.ttl')
+    return MappingPartitioner(rml_df, config)
+
+
+def _generate_rml_df(rand, num_rules):
+    # the triples maps have a subject map each, the referencing object maps use the subject maps of the triples maps
+    triples_maps = {f'#TM{i}': rand.choice(SUBJECT_MAPS) for i in range(3)}
+
+    rml_rules = []
+    for _ in range(num_rules):
+        triples_map_id = rand.choice(list(triples_maps))
+        subject_map_type, subject_map_value, subject_termtype = triples_maps[triples_map_id]
+        predicate_map_type, predicate_map_value = rand.choice(PREDICATE_MAPS)
+        object_map_type, object_map_value, object_termtype = rand.choice(OBJECT_MAPS)
+        if object_map_type == RML_PARENT_TRIPLES_MAP:
+            object_map_value = rand.choice(list(triples_maps))
+        lang_datatype, lang_datatype_map_value = rand.choice(LITERAL_TYPES) if object_termtype == RML_LITERAL else \
+            (np.nan, np.nan)
+        rml_rules.append({
+            'triples_map_id': triples_map_id,
+            'subject_map_type': subject_map_type, 'subject_map_value': subject_map_value,
+            'subject_termtype': subject_termtype,
+            'predicate_map_type': predicate_map_type, 'predicate_map_value': predicate_map_value,
+            'object_map_type': object_map_type, 'object_map_value': object_map_value,
+            'object_termtype': object_termtype,
+            'lang_datatype': lang_datatype, 'lang_datatype_map_value': lang_datatype_map_value,
+            'lang_datatype_map_type': np.nan if pd.isna(lang_datatype) else RML_CONSTANT,
+            'graph_map_type': RML_CONSTANT, 'graph_map_value': rand.choice(GRAPH_MAPS)})
+
+    return pd.DataFrame(rml_rules)
+
+
+def _get_brute_force_num_groups(rml_df):
+    # the groups are generated position by position in all the orderings of the positions
+    max_num_groups = 0
+    for positions in permutations('SPOG'):
+        partitions = [''] * len(rml_df)
+        for position in positions:
+            partitions = _refine_partitions(partitions, _get_position_groups(rml_df, position, partitions))
+        max_num_groups = max(max_num_groups, len(set(partitions)))
+
+    return max_num_groups
+
+
+def test_invariant_groups_prefixes():
+    invariants = ['http://example.com/a', 'http://example.com/ab', 'http://example.com/', 'http://example.org/',
+                  'http://example.com/b', 'http://example.com/a']
+    partitions = ['1', '1', '1', '1', '1', '2']
+
+    invariant_groups, num_partition_groups = _get_invariant_groups(partitions, invariants)
+
+    # the invariants are in the group of the shortest invariant of their partition that is a prefix of them
+    assert invariant_groups == [1, 1, 1, 2, 1, 1]
+    assert num_partition_groups == {'1': 2, '2': 1}
+
+
+def test_invariant_groups_exact_match():
+    invariants = ['http://example.com/a', 'http://example.com/ab', 'http://example.com/', 'http://example.com/a']
+
+    invariant_groups, num_partition_groups = _get_invariant_groups([''] * len(invariants), invariants,
+                                                                   exact_match=True)
+
+    # only equal invariants are grouped, the groups are numbered in the order of the invariants
+    assert invariant_groups == [2, 3, 1, 2]
+    assert num_partition_groups == {'': 3}
+
+
+def test_position_groups_blank_nodes_and_literal_types():
+    rml_df = pd.DataFrame({
+        'subject_termtype': [RML_IRI, RML_BLANK_NODE, RML_IRI, RML_BLANK_NODE, RML_IRI, RML_IRI, RML_IRI],
+        'subject_invariant': ['http://example.com/', '', 'http://example.com/a', '', 'http://example.org/', '', ''],
+        'object_termtype': [RML_IRI, RML_BLANK_NODE, RML_LITERAL, RML_LITERAL, RML_LITERAL, np.nan, RML_IRI],
+        'object_invariant': ['http://example.com/', '', '', '', '', 'http://example.com/', 'http://example.com/a'],
+        'literal_type': [np.nan, np.nan, XSD_INTEGER, XSD_INTEGER, 'en', np.nan, np.nan]})
+    partitions = [''] * len(rml_df)
+
+    subject_groups = _get_position_groups(rml_df, 'S', partitions)
+    object_groups = _get_position_groups(rml_df, 'O', partitions)
+
+    # blank nodes are in group 0, the empty invariants of references are prefixes of all the invariants
+    assert subject_groups == [1, 0, 1, 0, 1, 1, 1]
+    # the literals are grouped by their literal types and the objects with different termtypes are not grouped
+    assert object_groups[1] == 0
+    assert object_groups[2] == object_groups[3] != object_groups[4]
+    assert object_groups[0] == object_groups[6] != object_groups[5]
+    assert len(set(object_groups)) == 5
+    # the finest keys bound the groups of the objects, also of the objects with equal invariants and different termtypes
+    assert len(set(_get_finest_position_keys(rml_df, 'O'))) >= len(set(object_groups))
+    iri_rml_df = rml_df.iloc[[0, 5]]
+    assert len(set(_get_finest_position_keys(iri_rml_df, 'O'))) == \
+        len(set(_get_position_groups(iri_rml_df, 'O', ['', '']))) == 2
+
+
+def test_maximal_partition_brute_force():
+    rand = random.Random(0)
+    for _ in range(200):
+        rml_df = _generate_rml_df(rand, rand.randint(1, 8))
+
+        mapping_partitioner = _get_mapping_partitioner(rml_df.copy())
+        mapping_partitioner._get_term_invariants()
+        mapping_partitioner.rml_df['literal_type'] = mapping_partitioner.rml_df['lang_datatype_map_value']
+        brute_force_num_groups = _get_brute_force_num_groups(mapping_partitioner.rml_df)
+
+        maximal_rml_df = _get_mapping_partitioner(rml_df.copy()).partition_mappings()
+
+        # the pruned search finds a partition with as many groups as the best ordering of the positions
+        assert len(set(maximal_rml_df['mapping_partition'])) == brute_force_num_groups
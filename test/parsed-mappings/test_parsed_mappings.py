@@ -0,0 +1,96 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import os
+import logging
+import tempfile
+import morph_kgc
+
+from rdflib import compare
+
+
+MAPPING = '''
+@prefix foaf: <http://xmlns.com/foaf/0.1/> .
+@prefix rml: <http://w3id.org/rml/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@base <http://example.com/base/> .
+
+<TriplesMap1> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/student.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/resource/student_{{ID}}" ];
+  rml:predicateObjectMap [ rml:predicate foaf:name; rml:objectMap [ rml:reference "Name" ] ];
+  rml:predicateObjectMap [
+    rml:predicate <http://example.com/ontology/practises>;
+    rml:objectMap [
+      a rml:RefObjectMap;
+      rml:parentTriplesMap <TriplesMap2>;
+      rml:joinCondition [ rml:child "Sport"; rml:parent "ID" ]
+    ]
+  ].
+
+<TriplesMap2> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/sport.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/resource/sport_{{ID}}" ];
+  rml:predicateObjectMap [ rml:predicate rdfs:label; rml:objectMap [ rml:reference "Name" ] ].
+'''
+
+
+def _write_sources(sources_dir, num_students):
+    sources_dir = sources_dir.replace('\\', '/')
+    # the names of some students have line breaks and quotes, which are quoted in the CSV file
+    with open(os.path.join(sources_dir, 'student.csv'), 'w') as student_file:
+        student_file.write('ID,Sport,Name\n')
+        for i in range(num_students):
+            name = f'"Student ""{i}""\nof sport {i % 10}"' if i % 7 == 0 else f'Student {i}'
+            student_file.write(f'{i},{100 + i % 10},{name}\n')
+    with open(os.path.join(sources_dir, 'sport.csv'), 'w') as sport_file:
+        sport_file.write('ID,Name\n')
+        for i in range(10):
+            sport_file.write(f'{100 + i},Sport {i}\n')
+
+    mapping_path = os.path.join(sources_dir, 'mapping.ttl')
+    with open(mapping_path, 'w') as mapping_file:
+        mapping_file.write(MAPPING.format(sources_dir=sources_dir))
+
+    return mapping_path
+
+
+def test_parsed_mappings(caplog):
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path = _write_sources(temporary_dir, 100)
+        parsed_mappings_path = os.path.join(temporary_dir, 'mappings.pkl')
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nread_parsed_mappings_path={parsed_mappings_path}\n' \
+                 f'write_parsed_mappings_path={parsed_mappings_path}\n[DataSource]\nmappings={mapping_path}'
+
+        # the first run processes the mappings and writes them
+        with caplog.at_level(logging.INFO):
+            g = morph_kgc.materialize(config)
+        assert 'Mappings processed' in caplog.text
+        assert os.path.isfile(parsed_mappings_path)
+        parsed_mappings_mtime = os.path.getmtime(parsed_mappings_path)
+        caplog.clear()
+
+        # the second run reads the parsed mappings instead of processing the mappings
+        with caplog.at_level(logging.INFO):
+            g_morph = morph_kgc.materialize(config)
+        assert f'mapping rules loaded from `{parsed_mappings_path}`' in caplog.text
+        assert 'Mappings processed' not in caplog.text
+        assert os.path.getmtime(parsed_mappings_path) == parsed_mappings_mtime
+        assert compare.isomorphic(g, g_morph)
+        caplog.clear()
+
+        # the parsed mappings are outdated when the mappings change
+        with open(mapping_path, 'a') as mapping_file:
+            mapping_file.write('\n# changed mappings\n')
+        with caplog.at_level(logging.INFO):
+            g_morph = morph_kgc.materialize(config)
+        assert 'are outdated, mappings will be processed' in caplog.text
+        assert 'Mappings processed' in caplog.text
+        assert compare.isomorphic(g, g_morph)
+
+    assert len(g) == 200 + 10
@@ -0,0 +1,514 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import os
+import time
+import logging
+import sqlite3
+import tempfile
+import morph_kgc
+import pandas as pd
+
+from rdflib import compare
+
+
+MAPPING = '''
+@prefix rr: <http://www.w3.org/ns/r2rml#> .
+@prefix foaf: <http://xmlns.com/foaf/0.1/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@base <http://example.com/base/> .
+
+<TriplesMap1> a rr:TriplesMap;
+  rr:logicalTable [ rr:tableName "\\"Student\\"" ];
+  rr:subjectMap [ rr:template "http://example.com/resource/student_{\\"ID\\"}" ];
+  rr:predicateObjectMap [ rr:predicate foaf:name; rr:objectMap [ rr:column "\\"Name\\"" ] ];
+  rr:predicateObjectMap [
+    rr:predicate <http://example.com/ontology/practises>;
+    rr:objectMap [
+      a rr:RefObjectMap;
+      rr:parentTriplesMap <TriplesMap2>;
+      rr:joinCondition [ rr:child "\\"Sport\\""; rr:parent "\\"ID\\"" ]
+    ]
+  ].
+
+<TriplesMap2> a rr:TriplesMap;
+  rr:logicalTable [ rr:tableName "\\"Sport\\"" ];
+  rr:subjectMap [ rr:template "http://example.com/resource/sport_{\\"ID\\"}" ];
+  rr:predicateObjectMap [ rr:predicate rdfs:label; rr:objectMap [ rr:column "\\"Name\\"" ] ].
+'''
+
+RESOURCE_SQL = '''
+CREATE TABLE "Sport" ("ID" integer, "Name" varchar (50), PRIMARY KEY ("ID"));
+CREATE TABLE "Student" ("ID" integer, "Name" varchar(50), "Sport" integer, PRIMARY KEY ("ID"),
+                        FOREIGN KEY("Sport") REFERENCES "Sport"("ID"));
+INSERT INTO "Sport" ("ID", "Name") VALUES (100,'Tennis');
+INSERT INTO "Student" ("ID", "Name", "Sport") VALUES (10,'Venus Williams', 100);
+INSERT INTO "Student" ("ID", "Name", "Sport") VALUES (20,'Demi Moore', NULL);
+'''
+
+# the columns of SQLite are dynamically typed, the schema catalog of the tables with their declared types
+SCHEMA_CATALOG = {('Sport', 'ID'): 'integer', ('Sport', 'Name'): 'varchar', ('Student', 'ID'): 'integer',
+                  ('Student', 'Name'): 'varchar', ('Student', 'Sport'): 'integer'}
+
+
+def _create_db(sources_dir, num_students):
+    # the rows of R2RMLTC0009a, one student without sport, and the generated students and sports
+    db_path = os.path.join(sources_dir, 'resource.db')
+    with sqlite3.connect(db_path) as db_connection:
+        db_connection.executescript(RESOURCE_SQL)
+        db_connection.executemany('INSERT INTO "Sport" ("ID", "Name") VALUES (?, ?)',
+                                  [(101 + i, f'Sport {i}') for i in range(9)])
+        db_connection.executemany('INSERT INTO "Student" ("ID", "Name", "Sport") VALUES (?, ?, ?)',
+                                  [(100 + i, f'Student {i}', 100 + i % 10) for i in range(num_students)])
+    db_connection.close()
+
+    mapping_path = os.path.join(sources_dir, 'mapping.ttl')
+    with open(mapping_path, 'w') as mapping_file:
+        mapping_file.write(MAPPING)
+
+    return mapping_path, db_path
+
+
+def _get_rml_rule():
+    from morph_kgc.constants import RDB, RML_TABLE_NAME
+
+    return {'source_name': 'DataSource', 'source_type': RDB, 'logical_source_type': RML_TABLE_NAME,
+            'logical_source_value': 'Student', 'triples_map_id': '#TriplesMap1'}
+
+
+def test_sql_chunk_size():
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.data_source.relational_db import get_sql_data, get_sql_data_in_chunks, dispose_db_engines
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path, db_path = _create_db(temporary_dir, 1000)
+        rml_rule = _get_rml_rule()
+        config = load_config_from_argument(f'[CONFIGURATION]\n[DataSource]\nmappings={mapping_path}\n'
+                                           f'db_url=sqlite:///{db_path}')
+        data = get_sql_data(config, rml_rule, ['ID', 'Name'])
+        data_chunks = list(get_sql_data_in_chunks(config, rml_rule, ['ID', 'Name'], 300))
+        dispose_db_engines()
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\n[DataSource]\nmappings={mapping_path}\n' \
+                 f'db_url=sqlite:///{db_path}'
+        g = morph_kgc.materialize(config)
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nchunk_size=300\n[DataSource]\nmappings={mapping_path}\n' \
+                 f'db_url=sqlite:///{db_path}'
+        g_morph = morph_kgc.materialize(config)
+
+    # the rows of the table are read in chunks of at most chunk_size rows
+    assert [len(data_chunk) for data_chunk in data_chunks] == [300, 300, 300, 102]
+    assert pd.concat(data_chunks, ignore_index=True).sort_values('ID').reset_index(drop=True).equals(
+        data.sort_values('ID').reset_index(drop=True))
+    # the students of the conformance test case and the generated ones with their sports, and the sports
+    assert len(g) == 2 + 1 + 2 * 1000 + 10
+    assert compare.isomorphic(g, g_morph)
+
+
+def test_count_sql_rows():
+    from morph_kgc.constants import RDB, RML_QUERY
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.scheduler import _estimate_source_rows, DEFAULT_SOURCE_ROWS
+    from morph_kgc.data_source.relational_db import get_sql_row_count, dispose_db_engines
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path, db_path = _create_db(temporary_dir, 1000)
+        table_rml_rule = _get_rml_rule()
+        query_rml_rule = {'source_name': 'DataSource', 'source_type': RDB, 'logical_source_type': RML_QUERY,
+                          'logical_source_value': 'SELECT "ID" FROM "Student" WHERE "Sport" = 100',
+                          'triples_map_id': '#TriplesMap1'}
+
+        config = load_config_from_argument(f'[CONFIGURATION]\n[DataSource]\nmappings={mapping_path}\n'
+                                           f'db_url=sqlite:///{db_path}')
+        table_row_count = get_sql_row_count(config, table_rml_rule)
+        query_row_count = get_sql_row_count(config, query_rml_rule)
+        # the rows are not counted unless count_sql_rows is enabled
+        estimated_rows = _estimate_source_rows(config, table_rml_rule)
+        config = load_config_from_argument(f'[CONFIGURATION]\ncount_sql_rows=yes\n[DataSource]\n'
+                                           f'mappings={mapping_path}\ndb_url=sqlite:///{db_path}')
+        counted_rows = _estimate_source_rows(config, table_rml_rule)
+        dispose_db_engines()
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\n[DataSource]\nmappings={mapping_path}\n' \
+                 f'db_url=sqlite:///{db_path}'
+        g = morph_kgc.materialize(config)
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nnumber_of_processes=2\ncount_sql_rows=yes\n' \
+                 f'[DataSource]\nmappings={mapping_path}\ndb_url=sqlite:///{db_path}'
+        g_morph = morph_kgc.materialize(config)
+
+    # the students of the conformance test case and the generated ones
+    assert table_row_count == 2 + 1000
+    # Venus Williams and the generated students of sport 100
+    assert query_row_count == 1 + 100
+    assert estimated_rows == DEFAULT_SOURCE_ROWS
+    assert counted_rows == 2 + 1000
+    assert compare.isomorphic(g, g_morph)
+
+
+def test_sql_source_partitions():
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.data_source.relational_db import get_sql_data, get_sql_data_partition_in_chunks, dispose_db_engines
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path, db_path = _create_db(temporary_dir, 1000)
+        config = load_config_from_argument(f'[CONFIGURATION]\nsource_partitions=3\n'
+                                           f'[DataSource]\nmappings={mapping_path}\ndb_url=sqlite:///{db_path}')
+        rml_rule = _get_rml_rule()
+
+        data = get_sql_data(config, rml_rule, ['ID', 'Name'])
+        partitions_data = []
+        for partition_index in range(3):
+            partition_chunks = list(get_sql_data_partition_in_chunks(config, rml_rule, ['ID', 'Name'], 100,
+                                                                     (partition_index, 3)))
+            assert all(len(chunk) <= 100 for chunk in partition_chunks)
+            partitions_data.append(pd.concat(partition_chunks))
+        dispose_db_engines()
+
+    # the partitions are ranges of the primary key of about the same size
+    assert all(250 < len(partition_data) < 420 for partition_data in partitions_data)
+    assert partitions_data[0]['ID'].max() < partitions_data[1]['ID'].min()
+    assert partitions_data[1]['ID'].max() < partitions_data[2]['ID'].min()
+    partitions_data = pd.concat(partitions_data, ignore_index=True)
+    assert partitions_data.sort_values('ID').reset_index(drop=True).equals(
+        data.sort_values('ID').reset_index(drop=True))
+
+
+def test_sql_source_partitions_materialization():
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path, db_path = _create_db(temporary_dir, 1000)
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nnumber_of_processes=1\n' \
+                 f'[DataSource]\nmappings={mapping_path}\ndb_url=sqlite:///{db_path}'
+        g = morph_kgc.materialize(config)
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nnumber_of_processes=4\nsource_partitions=3\n' \
+                 f'[DataSource]\nmappings={mapping_path}\ndb_url=sqlite:///{db_path}'
+        g_morph = morph_kgc.materialize(config)
+
+    # the students of the conformance test case and the generated ones with their sports, and the sports
+    assert len(g) == 2 + 1 + 2 * 1000 + 10
+    assert compare.isomorphic(g, g_morph)
+
+
+def test_sql_pushdown(monkeypatch):
+    from morph_kgc.data_source import relational_db
+
+    # the IRI templates are over integer columns, so the mapping rules are pushed down
+    monkeypatch.setattr(relational_db, '_query_schema_catalog', lambda *args: SCHEMA_CATALOG)
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path, db_path = _create_db(temporary_dir, 100)
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\ninfer_sql_datatypes=yes\n[DataSource]\n' \
+                 f'mappings={mapping_path}\ndb_url=sqlite:///{db_path}'
+        g = morph_kgc.materialize(config)
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\ninfer_sql_datatypes=yes\nsql_pushdown=yes\n[DataSource]\n' \
+                 f'mappings={mapping_path}\ndb_url=sqlite:///{db_path}'
+        g_morph = morph_kgc.materialize(config)
+
+    assert len(g) == 2 + 1 + 2 * 100 + 10
+    assert compare.isomorphic(g, g_morph)
+
+
+def test_sql_pushdown_source_partitions(monkeypatch):
+    from morph_kgc.data_source import relational_db
+
+    monkeypatch.setattr(relational_db, '_query_schema_catalog', lambda *args: SCHEMA_CATALOG)
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path, db_path = _create_db(temporary_dir, 1000)
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nnumber_of_processes=1\n' \
+                 f'[DataSource]\nmappings={mapping_path}\ndb_url=sqlite:///{db_path}'
+        g = morph_kgc.materialize(config)
+
+        # the partitions of the pushed-down queries are read at once
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nnumber_of_processes=2\nsource_partitions=2\nchunk_size=0\n' \
+                 f'sql_pushdown=yes\n[DataSource]\nmappings={mapping_path}\ndb_url=sqlite:///{db_path}'
+        g_morph = morph_kgc.materialize(config)
+
+    assert len(g) == 2 + 1 + 2 * 1000 + 10
+    assert compare.isomorphic(g, g_morph)
+
+
+def test_sql_pushdown_percent_characters():
+    from morph_kgc.constants import RDB
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.mapping.mapping_parser import retrieve_mappings
+    from morph_kgc.sql_materializer import _materialize_rml_rule_in_chunks_in_rdb
+    from morph_kgc.data_source.relational_db import _relational_db_connection, dispose_db_engines
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path, db_path = _create_db(temporary_dir, 10)
+        with sqlite3.connect(db_path) as db_connection:
+            db_connection.execute('''UPDATE "Sport" SET "Name" = '100% Tennis/Padel' WHERE "ID" = 100''')
+        db_connection.close()
+        with open(mapping_path, 'w') as mapping_file:
+            mapping_file.write(MAPPING.replace('sport_{\\"ID\\"}', 'sport_{\\"Name\\"}'))
+
+        config = load_config_from_argument(f'[CONFIGURATION]\nsql_pushdown=yes\nna_values=%\n[DataSource]\n'
+                                           f'mappings={mapping_path}\ndb_url=sqlite:///{db_path}')
+        rml_df, fnml_df = retrieve_mappings(config)
+        rml_df = rml_df[rml_df['source_type'] == RDB]
+
+        # the parameters are formatted in the queries as in the drivers with format and pyformat paramstyles (e.g.,
+        # psycopg2 and PyMySQL), which parse the percent characters as placeholders if the query has parameters
+        db_dialect = _relational_db_connection(config, 'DataSource')[0].dialect
+        db_dialect.do_execute = lambda cursor, statement, parameters, context=None: \
+            cursor.execute(statement % tuple(parameters))
+        triples = pd.concat([triples_chunk for _, rml_rule in rml_df.iterrows()
+                             for triples_chunk in _materialize_rml_rule_in_chunks_in_rdb(rml_rule, rml_df, fnml_df,
+                                                                                          config)])
+        dispose_db_engines()
+
+    # the percent characters in the templates and NA values are written in the queries
+    assert '<http://example.com/resource/sport_100%25%20Tennis%2FPadel> ' \
+           '<http://www.w3.org/2000/01/rdf-schema#label> "100% Tennis/Padel"' in list(triples['triple'])
+
+
+def test_sql_pushdown_non_ascii_values(monkeypatch):
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.mapping.mapping_parser import retrieve_mappings
+    from morph_kgc.materializer import _is_rml_rule_pushed_down_to_rdb
+    from morph_kgc.data_source import relational_db
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path, db_path = _create_db(temporary_dir, 10)
+        with sqlite3.connect(db_path) as db_connection:
+            db_connection.execute('''UPDATE "Sport" SET "Name" = 'Ténis' WHERE "ID" = 100''')
+        db_connection.close()
+        with open(mapping_path, 'w') as mapping_file:
+            mapping_file.write(MAPPING.replace('sport_{\\"ID\\"}', 'sport_{\\"Name\\"}'))
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\n[DataSource]\nmappings={mapping_path}\n' \
+                 f'db_url=sqlite:///{db_path}'
+        g = morph_kgc.materialize(config)
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nsql_pushdown=yes\n[DataSource]\n' \
+                 f'mappings={mapping_path}\ndb_url=sqlite:///{db_path}'
+        g_morph = morph_kgc.materialize(config)
+
+        # the datatypes of the columns of SQLite are unknown, no mapping rule is pushed down
+        loaded_config = load_config_from_argument(config)
+        rml_df, fnml_df = retrieve_mappings(loaded_config)
+        unknown_pushed_down_rules = [_is_rml_rule_pushed_down_to_rdb(rml_rule, rml_df, loaded_config)
+                                     for _, rml_rule in rml_df.iterrows()]
+        monkeypatch.setattr(relational_db, '_query_schema_catalog', lambda *args: SCHEMA_CATALOG)
+        monkeypatch.setattr(relational_db, '_schema_catalogs', {})
+        pushed_down_rules = {rml_rule['triples_map_id']:
+                             _is_rml_rule_pushed_down_to_rdb(rml_rule, rml_df, loaded_config)
+                             for _, rml_rule in rml_df.iterrows()}
+        relational_db.dispose_db_engines()
+
+    # the IRIs with non-ASCII characters are percent-encoded as with PANDAS
+    assert '<http://example.com/resource/sport_T%C3%A9nis>' in g.serialize(format='nt')
+    assert compare.isomorphic(g, g_morph)
+    assert not any(unknown_pushed_down_rules)
+    # the student with its name is pushed down, the rules with the IRIs of the sports (with string values) are not
+    assert pushed_down_rules == {'#TM0': True, '#TM1': False, '#TM2': False}
+
+
+def test_sql_pushdown_oracle_na_values():
+    from morph_kgc.constants import ORACLE, POSTGRESQL
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.sql_materializer import _get_source_query
+
+    rml_rule = _get_rml_rule()
+    config = load_config_from_argument('[CONFIGURATION]\nna_values=,nan\n[DataSource]\nmappings=mapping.ttl')
+    empty_config = load_config_from_argument('[CONFIGURATION]\nna_values=\n[DataSource]\nmappings=mapping.ttl')
+
+    # empty strings are NULL in Oracle, they are not compared
+    assert "NOT IN ('', 'nan')" in _get_source_query(rml_rule, ['ID'], config, POSTGRESQL)
+    assert "NOT IN ('nan')" in _get_source_query(rml_rule, ['ID'], config, ORACLE)
+    assert 'NOT IN' not in _get_source_query(rml_rule, ['ID'], empty_config, ORACLE)
+
+
+def test_sql_pool_size(caplog):
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.data_source.relational_db import get_sql_data, get_sql_data_in_chunks, \
+        _relational_db_connection, dispose_db_engines
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path, db_path = _create_db(temporary_dir, 1000)
+        rml_rule = _get_rml_rule()
+
+        # the key ranges are extracted in parallel with the connections of the pool
+        config = load_config_from_argument(f'[CONFIGURATION]\nsql_pool_size=2\nsql_key_ranges=4\n[DataSource]\n'
+                                           f'mappings={mapping_path}\ndb_url=sqlite:///{db_path}')
+        db_engine = _relational_db_connection(config, 'DataSource')[0]
+        for i in range(3):
+            get_sql_data(config, rml_rule, ['ID', 'Name'])
+            list(get_sql_data_in_chunks(config, rml_rule, ['ID', 'Name'], 100))
+        is_engine_reused = _relational_db_connection(config, 'DataSource')[0] is db_engine
+        pool_size = db_engine.pool.size()
+        num_connections = db_engine.pool.num_connections
+        num_checkouts = db_engine.pool.num_checkouts
+        dispose_db_engines()
+
+        # all the queries of the mapping rules and of the datatype inference reuse a single connection
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\ninfer_sql_datatypes=yes\nnumber_of_processes=1\n' \
+                 f'chunk_size=100\nsql_pool_size=1\nlogging_level=DEBUG\n[DataSource]\nmappings={mapping_path}\n' \
+                 f'db_url=sqlite:///{db_path}'
+        with caplog.at_level(logging.DEBUG):
+            g = morph_kgc.materialize(config)
+
+    assert is_engine_reused
+    assert pool_size == 2
+    # 4 key ranges and 1 query in chunks in each iteration, the connections are returned to the pool and reused
+    assert 1 <= num_connections <= 2
+    assert num_checkouts >= 3 * (4 + 1)
+    assert 'Connection pool of data source `DataSource`: 1 connections opened' in caplog.text
+    assert len(g) == 2 + 1 + 2 * 1000 + 10
+
+
+def test_sql_schema_cache_ttl(caplog):
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.data_source.relational_db import get_schema_catalog, _write_schema_catalog, dispose_db_engines
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path, db_path = _create_db(temporary_dir, 10)
+        config = load_config_from_argument(f'[CONFIGURATION]\ninfer_sql_datatypes=yes\nsql_schema_cache_ttl=60\n'
+                                           f'temporary_dir={temporary_dir}\n[DataSource]\nmappings={mapping_path}\n'
+                                           f'db_url=sqlite:///{db_path}')
+
+        # the catalog is written to a file, SQLite catalogs are empty
+        schema_catalog = get_schema_catalog(config, 'DataSource', ['Student', 'Sport'])
+        schema_catalog_files = [file_name for file_name in os.listdir(temporary_dir) if file_name.endswith('.pkl')]
+        schema_catalog_path = os.path.join(temporary_dir, schema_catalog_files[0])
+
+        # the file is read in other processes and executions with the same tables
+        _write_schema_catalog(schema_catalog_path, {('Student', 'Name'): 'VARCHAR'})
+        dispose_db_engines()
+        cached_schema_catalog = get_schema_catalog(config, 'DataSource', ['Sport', 'Student'])
+        # the catalog of other tables is cached in another file
+        other_schema_catalog = get_schema_catalog(config, 'DataSource', ['Student'])
+        num_schema_catalog_files = len([file_name for file_name in os.listdir(temporary_dir)
+                                        if file_name.endswith('.pkl')])
+
+        # the file is not used when it is older than sql_schema_cache_ttl, the catalog is queried again
+        os.utime(schema_catalog_path, (time.time() - 120, time.time() - 120))
+        dispose_db_engines()
+        expired_schema_catalog = get_schema_catalog(config, 'DataSource', ['Student', 'Sport'])
+        is_schema_catalog_file_rewritten = time.time() - os.path.getmtime(schema_catalog_path) < 60
+        dispose_db_engines()
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\ninfer_sql_datatypes=yes\nsql_schema_cache_ttl=60\n' \
+                 f'temporary_dir={temporary_dir}\nnumber_of_processes=1\nlogging_level=DEBUG\n[DataSource]\n' \
+                 f'mappings={mapping_path}\ndb_url=sqlite:///{db_path}'
+        g = morph_kgc.materialize(config)
+        caplog.clear()
+        with caplog.at_level(logging.DEBUG):
+            g_morph = morph_kgc.materialize(config)
+
+    assert schema_catalog == {}
+    assert len(schema_catalog_files) == 1
+    assert cached_schema_catalog == {('Student', 'Name'): 'VARCHAR'}
+    assert other_schema_catalog == {}
+    assert num_schema_catalog_files == 2
+    assert expired_schema_catalog == {}
+    assert is_schema_catalog_file_rewritten
+    # the second materialization reads the catalog written by the first one
+    assert 'Schema catalog of data source `DataSource` loaded from' in caplog.text
+    assert compare.isomorphic(g, g_morph)
+
+
+def test_sql_fetch_size():
+    from sqlalchemy import event
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.data_source.relational_db import get_sql_data, get_sql_data_in_chunks, \
+        _relational_db_connection, dispose_db_engines
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path, db_path = _create_db(temporary_dir, 1000)
+        rml_rule = _get_rml_rule()
+
+        fetch_sizes_data = {}
+        fetch_sizes_chunks = {}
+        fetch_sizes_execution_options = {}
+        for fetch_size in [1, 7, 10000]:
+            config = load_config_from_argument(f'[CONFIGURATION]\nsql_fetch_size={fetch_size}\n[DataSource]\n'
+                                               f'mappings={mapping_path}\ndb_url=sqlite:///{db_path}')
+            execution_options = []
+            event.listen(_relational_db_connection(config, 'DataSource')[0], 'before_cursor_execute',
+                         lambda conn, cursor, statement, parameters, context, executemany:
+                         execution_options.append(context.execution_options))
+            fetch_sizes_data[fetch_size] = get_sql_data(config, rml_rule, ['ID', 'Name', 'Sport'])
+            fetch_sizes_chunks[fetch_size] = list(get_sql_data_in_chunks(config, rml_rule, ['ID', 'Name'], 300))
+            fetch_sizes_execution_options[fetch_size] = execution_options
+            dispose_db_engines()
+
+    for fetch_size in [1, 7, 10000]:
+        # the results are streamed with a buffer of fetch_size rows
+        assert len(fetch_sizes_execution_options[fetch_size]) == 2
+        assert all(execution_options.get('stream_results') and execution_options.get('max_row_buffer') == fetch_size
+                   for execution_options in fetch_sizes_execution_options[fetch_size])
+        # the data and its dtypes do not depend on the batches in which the rows are fetched
+        assert fetch_sizes_data[fetch_size].equals(fetch_sizes_data[10000])
+        assert [len(chunk) for chunk in fetch_sizes_chunks[fetch_size]] == [300, 300, 300, 102]
+        assert pd.concat(fetch_sizes_chunks[fetch_size]).equals(pd.concat(fetch_sizes_chunks[10000]))
+    # the student without sport is not retrieved
+    assert len(fetch_sizes_data[1]) == 1001
+
+
+def test_sql_key_ranges():
+    from sqlalchemy import create_engine
+    from morph_kgc.constants import SQLITE
+    from morph_kgc.args_parser import load_config_from_argument
+    from morph_kgc.data_source.relational_db import get_sql_data, _get_sql_key_range_conditions, dispose_db_engines
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path, db_path = _create_db(temporary_dir, 1000)
+        with sqlite3.connect(db_path) as db_connection:
+            db_connection.execute('CREATE TABLE "Enrollment" ("Student" integer, "Sport" integer, '
+                                  'PRIMARY KEY ("Student", "Sport"))')
+            db_connection.execute('CREATE TABLE "Nickname" ("Name" varchar(50), PRIMARY KEY ("Name"))')
+            db_connection.execute('INSERT INTO "Nickname" ("Name") VALUES (\'Venus\')')
+        db_connection.close()
+
+        db_engine = create_engine(f'sqlite:///{db_path}')
+        # the integer primary key is split between its minimum (10) and maximum (1099) values
+        key_range_conditions = _get_sql_key_range_conditions(db_engine, SQLITE, 'Student', 4)
+        # composite and non-integer primary keys are not split
+        enrollment_key_range_conditions = _get_sql_key_range_conditions(db_engine, SQLITE, 'Enrollment', 4)
+        nickname_key_range_conditions = _get_sql_key_range_conditions(db_engine, SQLITE, 'Nickname', 4)
+        db_engine.dispose()
+
+        rml_rule = _get_rml_rule()
+        config = load_config_from_argument(f'[CONFIGURATION]\n[DataSource]\nmappings={mapping_path}\n'
+                                           f'db_url=sqlite:///{db_path}')
+        data = get_sql_data(config, rml_rule, ['ID', 'Name'])
+        dispose_db_engines()
+        config = load_config_from_argument(f'[CONFIGURATION]\nsql_key_ranges=4\n[DataSource]\n'
+                                           f'mappings={mapping_path}\ndb_url=sqlite:///{db_path}')
+        key_ranges_data = get_sql_data(config, rml_rule, ['ID', 'Name'])
+        dispose_db_engines()
+
+    assert key_range_conditions == ['`ID` < 282', '`ID` >= 282 AND `ID` < 555', '`ID` >= 555 AND `ID` < 827',
+                                    '`ID` >= 827']
+    assert enrollment_key_range_conditions is None
+    assert nickname_key_range_conditions is None
+    assert len(key_ranges_data) == 1002
+    assert key_ranges_data.sort_values('ID').reset_index(drop=True).equals(
+        data.sort_values('ID').reset_index(drop=True))
+
+
+def test_sql_schema_catalog_ambiguous_columns(monkeypatch):
+    from morph_kgc.constants import POSTGRESQL
+    from morph_kgc.data_source import relational_db
+
+    # the table Student is in two schemas, and the datatype of its column Name differs
+    catalog_df = pd.DataFrame({'TABLE_SCHEMA': ['public', 'public', 'archive', 'archive'],
+                               'TABLE_NAME': ['Student', 'Student', 'Student', 'Student'],
+                               'COLUMN_NAME': ['ID', 'Name', 'ID', 'Name'],
+                               'DATA_TYPE': ['integer', 'varchar', 'integer', 'text']})
+    monkeypatch.setattr(relational_db, '_relational_db_connection', lambda config, source_name: (None, POSTGRESQL))
+    monkeypatch.setattr(relational_db.pd, 'read_sql_query', lambda sql_query, con: catalog_df.copy())
+    schema_catalog = relational_db._query_schema_catalog(None, 'DataSource', ['Student'])
+
+    assert schema_catalog == {('Student', 'ID'): 'integer', ('Student', 'Name'): None,
+                              ('public.Student', 'ID'): 'integer', ('public.Student', 'Name'): 'varchar',
+                              ('archive.Student', 'ID'): 'integer', ('archive.Student', 'Name'): 'text'}
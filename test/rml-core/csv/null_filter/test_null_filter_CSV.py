@@ -22,3 +22,16 @@ def test_null_filter():
     g_morph = morph_kgc.materialize(config)
 
     assert compare.isomorphic(g, g_morph)
+
+
+def test_null_filter_shared_scan():
+    g = Graph()
+    g.parse(os.path.join(os.path.dirname(os.path.realpath(__file__)), 'output.nq'))
+
+    # the mapping rules are in the same mapping group and share the scan of the logical source
+    mapping_path = os.path.join(os.path.dirname(os.path.realpath(__file__)), 'mapping.ttl')
+    config = f'[CONFIGURATION]\noutput_format=N-QUADS\nchunk_size=1\nmapping_partitioning=no\n' \
+             f'[DataSource]\nmappings={mapping_path}'
+    g_morph = morph_kgc.materialize(config)
+
+    assert compare.isomorphic(g, g_morph)
@@ -0,0 +1,149 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import os
+import re
+import logging
+import tempfile
+import morph_kgc
+import pandas as pd
+
+from rdflib import compare
+from morph_kgc.data_source.source_cache import SourceCache
+
+
+MAPPING = '''
+@prefix ex: <http://example.com/> .
+@prefix rml: <http://w3id.org/rml/> .
+
+<TriplesMap1> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/a.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/a/{{ID}}" ];
+  rml:predicateObjectMap [ rml:predicate ex:name; rml:objectMap [ rml:reference "Name" ] ].
+
+<TriplesMap2> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/b.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/b/{{ID}}" ];
+  rml:predicateObjectMap [ rml:predicate ex:name; rml:objectMap [ rml:reference "Name" ] ].
+
+<TriplesMap3> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/a.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/a/{{ID}}" ];
+  rml:predicateObjectMap [
+    rml:predicate ex:same;
+    rml:objectMap [ rml:parentTriplesMap <TriplesMap2>; rml:joinCondition [ rml:child "ID"; rml:parent "ID" ] ]
+  ].
+
+<TriplesMap4> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/b.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/b/{{ID}}" ];
+  rml:predicateObjectMap [
+    rml:predicate ex:same;
+    rml:objectMap [ rml:parentTriplesMap <TriplesMap1>; rml:joinCondition [ rml:child "ID"; rml:parent "ID" ] ]
+  ].
+'''
+
+
+def _get_data(num_rows):
+    return pd.DataFrame({'ID': [str(i) for i in range(num_rows)], 'Name': [f'Name {i}' for i in range(num_rows)]})
+
+
+def _get_memory(data):
+    return int(data.memory_usage(index=True, deep=True).sum())
+
+
+def test_source_cache_eviction():
+    data = {source_key: _get_data(1000) for source_key in ['a', 'b', 'c']}
+    # two sources fit in the cache, but not three
+    source_cache = SourceCache(memory_limit=2 * _get_memory(data['a']) + 1)
+    for source_key in ['a', 'a', 'a', 'b', 'b', 'c', 'c']:
+        source_cache.declare_use(source_key, ['ID', 'Name'])
+
+    source_cache.put('a', data['a'])
+    source_cache.put('b', data['b'])
+    # a is used, hence b is the least recently used source when c is cached
+    assert source_cache.get('a', ['ID']).equals(data['a'][['ID']])
+    source_cache.put('c', data['c'])
+
+    assert list(source_cache.source_data) == ['a', 'c']
+    assert source_cache.evictions == 1
+    assert source_cache.get('b', ['ID']) is None
+    assert source_cache.memory_usage == _get_memory(data['a']) + _get_memory(data['c'])
+
+    # the data is released after its last use
+    assert source_cache.get('c', ['ID', 'Name']).equals(data['c'])
+    assert source_cache.get('a', ['Name']).equals(data['a'][['Name']])
+    assert source_cache.source_data == {}
+    assert source_cache.memory_usage == 0
+
+
+def test_source_cache_larger_than_limit():
+    data = _get_data(1000)
+    source_cache = SourceCache(memory_limit=_get_memory(data) - 1)
+    source_cache.declare_use('a', ['ID', 'Name'])
+    source_cache.declare_use('a', ['ID', 'Name'])
+
+    # the data does not fit in the cache, it is read again in the next use
+    source_cache.put('a', data)
+    assert source_cache.source_data == {}
+    assert source_cache.evictions == 0
+    assert source_cache.get('a', ['ID']) is None
+    assert source_cache.source_uses == {'a': 1}
+
+
+def _write_sources(sources_dir, num_rows):
+    sources_dir = sources_dir.replace('\\', '/')
+    for source_name in ['a', 'b']:
+        with open(os.path.join(sources_dir, f'{source_name}.csv'), 'w') as source_file:
+            source_file.write('ID,Name\n')
+            for i in range(num_rows):
+                source_file.write(f'{i},Name {i} of {source_name} with a long name to fill the memory of the cache\n')
+
+    mapping_path = os.path.join(sources_dir, 'mapping.ttl')
+    with open(mapping_path, 'w') as mapping_file:
+        mapping_file.write(MAPPING.format(sources_dir=sources_dir))
+
+    return mapping_path
+
+
+def _get_cache_evictions(log):
+    return sum(int(evictions) for evictions in re.findall(r'Source cache: .* (\d+) evictions', log))
+
+
+def test_source_cache_memory_limit(caplog):
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        # the data of each source takes less than 1 MB, but not the data of both
+        mapping_path = _write_sources(temporary_dir, 3000)
+
+        # the source cache is disabled by default
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nnumber_of_processes=1\nlogging_level=DEBUG\n' \
+                 f'[DataSource]\nmappings={mapping_path}'
+        with caplog.at_level(logging.DEBUG):
+            g = morph_kgc.materialize(config)
+        is_source_cache_enabled = 'Source cache:' in caplog.text
+        caplog.clear()
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nnumber_of_processes=1\nlogging_level=DEBUG\n' \
+                 f'source_cache_memory_limit=100\n[DataSource]\nmappings={mapping_path}'
+        with caplog.at_level(logging.DEBUG):
+            g_cache = morph_kgc.materialize(config)
+        evictions = _get_cache_evictions(caplog.text)
+        caplog.clear()
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nnumber_of_processes=1\nlogging_level=DEBUG\n' \
+                 f'source_cache_memory_limit=1\n[DataSource]\nmappings={mapping_path}'
+        with caplog.at_level(logging.DEBUG):
+            g_morph = morph_kgc.materialize(config)
+        evictions_with_limit = _get_cache_evictions(caplog.text)
+
+    assert not is_source_cache_enabled
+    assert evictions == 0
+    assert evictions_with_limit > 0
+    assert len(g) == 4 * 3000
+    assert compare.isomorphic(g, g_cache)
+    assert compare.isomorphic(g, g_morph)
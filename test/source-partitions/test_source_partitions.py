@@ -0,0 +1,201 @@
+__author__ = "Julián Arenas-Guerrero"
+__credits__ = ["Julián Arenas-Guerrero"]
+
+__license__ = "Apache-2.0"
+__maintainer__ = "Julián Arenas-Guerrero"
+__email__ = "arenas.guerrero.julian@outlook.com"
+
+
+import os
+import tempfile
+import morph_kgc
+import pandas as pd
+
+from rdflib.graph import Graph
+from rdflib import compare
+
+
+MAPPING = '''
+@prefix foaf: <http://xmlns.com/foaf/0.1/> .
+@prefix rml: <http://w3id.org/rml/> .
+@prefix rdfs: <http://www.w3.org/2000/01/rdf-schema#> .
+@base <http://example.com/base/> .
+
+<TriplesMap1> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/student.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/resource/student_{{ID}}" ];
+  rml:predicateObjectMap [ rml:predicate foaf:name; rml:objectMap [ rml:reference "Name" ] ];
+  rml:predicateObjectMap [
+    rml:predicate <http://example.com/ontology/practises>;
+    rml:objectMap [
+      a rml:RefObjectMap;
+      rml:parentTriplesMap <TriplesMap2>;
+      rml:joinCondition [ rml:child "Sport"; rml:parent "ID" ]
+    ]
+  ].
+
+<TriplesMap2> a rml:TriplesMap;
+  rml:logicalSource [ rml:source "{sources_dir}/sport.csv"; rml:referenceFormulation rml:CSV ];
+  rml:subjectMap [ rml:template "http://example.com/resource/sport_{{ID}}" ];
+  rml:predicateObjectMap [ rml:predicate rdfs:label; rml:objectMap [ rml:reference "Name" ] ].
+'''
+
+
+def _write_sources(sources_dir, num_students):
+    sources_dir = sources_dir.replace('\\', '/')
+    # the names of some students have line breaks and quotes, which are quoted in the CSV file
+    with open(os.path.join(sources_dir, 'student.csv'), 'w') as student_file:
+        student_file.write('ID,Sport,Name\n')
+        for i in range(num_students):
+            name = f'"Student ""{i}""\nof sport {i % 10}"' if i % 7 == 0 else f'Student {i}'
+            student_file.write(f'{i},{100 + i % 10},{name}\n')
+    with open(os.path.join(sources_dir, 'sport.csv'), 'w') as sport_file:
+        sport_file.write('ID,Name\n')
+        for i in range(10):
+            sport_file.write(f'{100 + i},Sport {i}\n')
+
+    mapping_path = os.path.join(sources_dir, 'mapping.ttl')
+    with open(mapping_path, 'w') as mapping_file:
+        mapping_file.write(MAPPING.format(sources_dir=sources_dir))
+
+    return mapping_path
+
+
+def test_source_partitions():
+    from morph_kgc.constants import CSV, RML_SOURCE
+    from morph_kgc.data_source.data_file import get_file_data, get_file_data_partition_in_chunks
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        _write_sources(temporary_dir, 1000)
+        rml_rule = {'source_type': CSV, 'logical_source_type': RML_SOURCE,
+                    'logical_source_value': os.path.join(temporary_dir, 'student.csv')}
+
+        data = get_file_data(rml_rule, ['ID', 'Name'])
+        partitions_data = []
+        for partition_index in range(3):
+            partition_chunks = list(get_file_data_partition_in_chunks(rml_rule, ['ID', 'Name'], 100,
+                                                                      (partition_index, 3)))
+            assert all(len(chunk) <= 100 for chunk in partition_chunks)
+            partitions_data.append(pd.concat(partition_chunks))
+
+    # the partitions are ranges of records of about the same size, which are disjoint and cover all the records
+    assert all(250 < len(partition_data) < 420 for partition_data in partitions_data)
+    partitions_data = pd.concat(partitions_data, ignore_index=True)
+    assert partitions_data['ID'].is_unique
+    assert partitions_data.sort_values('ID').reset_index(drop=True).equals(
+        data.sort_values('ID').reset_index(drop=True))
+
+
+def test_source_partitions_materialization():
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path = _write_sources(temporary_dir, 1000)
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nnumber_of_processes=1\n[DataSource]\nmappings={mapping_path}'
+        g = morph_kgc.materialize(config)
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nnumber_of_processes=4\nsource_partitions=3\n' \
+                 f'[DataSource]\nmappings={mapping_path}'
+        g_morph = morph_kgc.materialize(config)
+
+    assert len(g) == 2000 + 10
+    assert compare.isomorphic(g, g_morph)
+
+
+def test_csv_partition_offsets(monkeypatch):
+    from morph_kgc.constants import CSV, RML_SOURCE
+    from morph_kgc.data_source import data_file
+
+    # count the scans of the file, the header and the records are scanned separately
+    scans = []
+    get_csv_record_offsets = data_file._get_csv_record_offsets
+    monkeypatch.setattr(data_file, '_get_csv_record_offsets',
+                        lambda *args, **kwargs: scans.append(args) or get_csv_record_offsets(*args, **kwargs))
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        _write_sources(temporary_dir, 1000)
+        rml_rule = {'source_type': CSV, 'logical_source_type': RML_SOURCE,
+                    'logical_source_value': os.path.join(temporary_dir, 'student.csv')}
+
+        data = data_file.get_file_data(rml_rule, ['ID', 'Name'])
+        # more partitions than some records with line breaks, partitions can be empty
+        partitions_data = [pd.concat(data_file.get_file_data_partition_in_chunks(rml_rule, ['ID', 'Name'], 100,
+                                                                                 (partition_index, 200)))
+                           for partition_index in range(200)]
+        header_end, partition_offsets = data_file.get_csv_partition_offsets(rml_rule['logical_source_value'], 200)
+        with open(rml_rule['logical_source_value'], 'rb') as csv_file:
+            csv_data = csv_file.read()
+
+    # the file is scanned once for all the partitions
+    assert len(scans) == 2
+    assert len(partition_offsets) == 200 + 1
+    assert partition_offsets == sorted(partition_offsets)
+    # the partitions start at the records, which start with the ID of a student after a line break
+    assert all(csv_data[offset - 1:offset] == b'\n' and csv_data[offset:offset + 1].isdigit()
+               for offset in partition_offsets[:-1])
+    partitions_data = pd.concat(partitions_data, ignore_index=True)
+    assert partitions_data['ID'].is_unique
+    assert partitions_data.sort_values('ID').reset_index(drop=True).equals(
+        data.sort_values('ID').reset_index(drop=True))
+
+
+def test_parquet_source_partitions():
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from morph_kgc.constants import PARQUET, RML_SOURCE
+    from morph_kgc.data_source.data_file import get_file_data, get_file_data_partition_in_chunks, \
+        get_file_arrow_tables
+
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        # two row groups
+        parquet_path = os.path.join(temporary_dir, 'student.parquet')
+        pq.write_table(pa.table({'ID': [str(i) for i in range(1000)], 'Name': [f'Student {i}' for i in range(1000)]}),
+                       parquet_path, row_group_size=500)
+        rml_rule = {'source_type': PARQUET, 'logical_source_type': RML_SOURCE, 'logical_source_value': parquet_path}
+
+        data = get_file_data(rml_rule, ['ID', 'Name'])
+        partitions_data = [list(get_file_data_partition_in_chunks(rml_rule, ['ID', 'Name'], 300,
+                                                                  (partition_index, 3)))
+                           for partition_index in range(3)]
+        partitions_tables = [list(get_file_arrow_tables(rml_rule, ['ID', 'Name'], 300, (partition_index, 3)))
+                             for partition_index in range(3)]
+
+    # the file has fewer row groups than partitions, the last partition has no row groups to read
+    assert [[len(chunk) for chunk in partition_data] for partition_data in partitions_data] == \
+           [[300, 200], [300, 200], []]
+    assert [sum(len(table) for table in partition_tables) for partition_tables in partitions_tables] == [500, 500, 0]
+    assert pd.concat(partitions_data[0] + partitions_data[1], ignore_index=True).equals(data)
+
+
+def test_tabular_view_source_partitions():
+    from morph_kgc.constants import CSV, RML_QUERY
+    from morph_kgc.data_source.data_file import get_file_data, get_file_data_partition_in_chunks, \
+        get_file_arrow_tables
+
+    rml_rule = {'source_type': CSV, 'logical_source_type': RML_QUERY,
+                'logical_source_value': 'SELECT CAST(i AS VARCHAR) AS ID FROM range(1000) AS t(i)'}
+    data = get_file_data(rml_rule, ['ID'])
+    partitions_data = [list(get_file_data_partition_in_chunks(rml_rule, ['ID'], 300, (partition_index, 3)))
+                       for partition_index in range(3)]
+    partitions_tables = [list(get_file_arrow_tables(rml_rule, ['ID'], 300, (partition_index, 3)))
+                         for partition_index in range(3)]
+
+    # tabular views are not split, the query is executed by the first partition
+    assert [len(partition_data) for partition_data in partitions_data] == [4, 0, 0]
+    assert pd.concat(partitions_data[0], ignore_index=True).equals(data)
+    assert [sum(len(table) for table in partition_tables) for partition_tables in partitions_tables] == [1000, 0, 0]
+
+
+def test_arrow_source_partitions_materialization():
+    with tempfile.TemporaryDirectory() as temporary_dir:
+        mapping_path = _write_sources(temporary_dir, 1000)
+
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nnumber_of_processes=1\n[DataSource]\nmappings={mapping_path}'
+        g = morph_kgc.materialize(config)
+
+        # the CSV files are split in ranges of bytes that are read with pyarrow
+        config = f'[CONFIGURATION]\noutput_format=N-QUADS\nnumber_of_processes=4\nsource_partitions=3\n' \
+                 f'execution_engine=ARROW\n[DataSource]\nmappings={mapping_path}'
+        g_morph = morph_kgc.materialize(config)
+
+    assert len(g) == 2000 + 10
+    assert compare.isomorphic(g, g_morph)